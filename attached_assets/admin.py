@@ -0,0 +1,132 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.instrumentation import METRICS
+import logging
+import asyncio
+import os
+
+logger = logging.getLogger('trade_bot.admin')
+
+# node_exporter textfile collector target; export is off unless this is set
+METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE')
+METRICS_EXPORT_SECONDS = float(os.getenv('METRICS_EXPORT_SECONDS', '15'))
+
+MAX_METRIC_ROWS = 12  # keeps the table under the 1024-character field limit
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def _metrics_table(rows):
+    """Monospace table of calls, errors and latency percentiles (ms)."""
+    lines = [f"{'name':<22}{'calls':>7}{'err':>5}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for row in rows[:MAX_METRIC_ROWS]:
+        lines.append(
+            f"{row['name'][:21]:<22}{row['calls']:>7}{row['errors']:>5}"
+            f"{_ms(row['p50']):>8}{_ms(row['p95']):>8}{_ms(row['p99']):>8}"
+        )
+    if len(rows) > MAX_METRIC_ROWS:
+        lines.append(f"... and {len(rows) - MAX_METRIC_ROWS} more")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def _format_bytes(count):
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+class Admin(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._export_task = None
+
+    async def cog_load(self):
+        if METRICS_TEXTFILE and METRICS.enabled:
+            self._export_task = asyncio.create_task(self._export_metrics())
+
+    async def cog_unload(self):
+        if self._export_task:
+            self._export_task.cancel()
+
+    async def _export_metrics(self):
+        """Rewrite the Prometheus textfile every METRICS_EXPORT_SECONDS."""
+        logger.info("Exporting metrics to %s every %ss", METRICS_TEXTFILE, METRICS_EXPORT_SECONDS)
+        while True:
+            try:
+                await asyncio.to_thread(METRICS.write_textfile, METRICS_TEXTFILE)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error exporting metrics: %s", e)
+            await asyncio.sleep(METRICS_EXPORT_SECONDS)
+
+    @app_commands.command(
+        name="bot-metrics",
+        description="Show command and storage latency, call and error counts (admins only)"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def show_metrics(self, interaction: discord.Interaction):
+        try:
+            await interaction.response.defer(ephemeral=True)
+        except discord.InteractionResponded:
+            logger.warning("Interaction already responded to during defer in bot-metrics")
+            return
+
+        try:
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.followup.send("Only server administrators can view bot metrics.", ephemeral=True)
+                return
+            if not METRICS.enabled:
+                await interaction.followup.send("Metrics are disabled (METRICS_ENABLED=0).", ephemeral=True)
+                return
+
+            embed = discord.Embed(
+                title="Bot Metrics",
+                description="Latency percentiles in milliseconds since the bot started",
+                color=discord.Color.blue()
+            )
+            for kind, title in (("command", "Commands"), ("storage", "Storage calls")):
+                rows = METRICS.snapshot(kind)
+                embed.add_field(
+                    name=title,
+                    value=_metrics_table(rows) if rows else "No calls recorded yet.",
+                    inline=False
+                )
+            io_bytes = METRICS.bytes_snapshot()
+            if io_bytes:
+                embed.add_field(
+                    name="Storage I/O",
+                    value="\n".join(
+                        f"**{path}** {direction} {_format_bytes(count)}"
+                        for (direction, path), count in sorted(io_bytes.items())
+                    ),
+                    inline=False
+                )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+        except Exception as e:
+            logger.error("Error in bot-metrics command: %s", e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An error occurred while collecting metrics.",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An error occurred while collecting metrics.",
+                        ephemeral=True
+                    )
+            except Exception as send_error:
+                logger.error("Failed to send error message: %s", send_error)
+
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
+    logger.info("Admin cog loaded successfully")
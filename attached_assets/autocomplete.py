@@ -0,0 +1,64 @@
+"""Autocomplete choices for team and player parameters.
+
+Backed by the data manager's prefix indexes (search_teams/search_players),
+so each keystroke is a bisect rather than a scan of the league.
+"""
+import logging
+
+from discord import app_commands
+
+logger = logging.getLogger('trade_bot.autocomplete')
+
+MAX_CHOICES = 25  # Discord shows at most 25 suggestions
+MAX_CHOICE_LENGTH = 100  # ...each with a name and value of up to 100 characters
+
+
+def _choice(name, value):
+    if len(name) > MAX_CHOICE_LENGTH:
+        name = name[:MAX_CHOICE_LENGTH - 1] + "…"
+    return app_commands.Choice(name=name, value=value)
+
+
+async def team_choices(data_manager, current):
+    try:
+        names = await data_manager.search_teams(current.strip(), MAX_CHOICES)
+        return [_choice(name, name) for name in names if len(name) <= MAX_CHOICE_LENGTH]
+    except Exception as e:
+        logger.error("Error in team autocomplete: %s", e)
+        return []
+
+
+async def player_choices(data_manager, team_name, current):
+    """Players on team_name (any team if None) matching what has been typed."""
+    try:
+        players = await data_manager.search_players(team_name, current.strip(), MAX_CHOICES)
+        return [
+            _choice(f"{p['name']} (ID: {p['id']})" + ("" if team_name else f" - {p['team']}"), p['id'])
+            for p in players if len(p['id']) <= MAX_CHOICE_LENGTH
+        ]
+    except Exception as e:
+        logger.error("Error in player autocomplete: %s", e)
+        return []
+
+
+async def player_list_choices(data_manager, team_name, current):
+    """Complete the last id of a comma-separated list, keeping the ids before it."""
+    if not team_name:
+        return []
+    head, comma, last = current.rpartition(',')
+    chosen = {pid.strip() for pid in head.split(',') if pid.strip()}
+    keep = f"{head}{comma}" if comma else ""
+    try:
+        players = await data_manager.search_players(team_name, last.strip(), MAX_CHOICES + len(chosen))
+    except Exception as e:
+        logger.error("Error in player list autocomplete: %s", e)
+        return []
+    choices = []
+    for p in players:
+        value = keep + p['id']
+        if p['id'] in chosen or len(value) > MAX_CHOICE_LENGTH:
+            continue
+        choices.append(_choice(f"{value} ({p['name']})", value))
+        if len(choices) >= MAX_CHOICES:
+            break
+    return choices
@@ -0,0 +1,345 @@
+"""Benchmark every DataManager operation against a synthetic league.
+
+Generates a seeded league (utils.league_generator) in a temporary data
+directory, times each storage call one call at a time, and writes the
+per-operation latencies as JSON. Given a baseline file from an earlier run,
+it prints the change in median latency per operation and exits with
+status 1 if any got slower than the tolerance allows. Needs no network.
+
+Usage: python -m utils.bench_data_manager [--backend json|sqlite] [--teams 1000] [--players 50]
+           [--trades 500000] [--seed 1] [--repeat 200] [--output bench.json]
+           [--baseline baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from utils.data_manager import DataManager, create_data_manager, guild_data_dir
+from utils.league_generator import generate_league, generate_trades, write_league
+
+# Median changes smaller than this are noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        "runs": n,
+        "mean_ms": round(sum(samples) / n * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+        "p50_ms": round(samples[n // 2] * 1000, 4),
+        "p95_ms": round(samples[min(n - 1, int(n * 0.95))] * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+
+
+def measure(repeat, timed, setup=None):
+    """Time timed(setup()) repeat times, leaving setup() out of the timing."""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        timed(arg)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# The benchmark league is stored as this guild's
+BENCH_GUILD_ID = 1
+
+
+def open_backend(backend):
+    os.environ['DATA_BACKEND'] = backend
+    return create_data_manager(BENCH_GUILD_ID)
+
+
+def _expect_ok(result):
+    """Fail loudly if a mutation reported failure: False, None or (False, message)."""
+    if isinstance(result, tuple):
+        ok, message = result
+    else:
+        ok, message = result not in (False, None), f"returned {result!r}"
+    if not ok:
+        raise RuntimeError(f"Benchmark operation failed: {message}")
+
+
+class Workload:
+    """Picks inputs for each operation from the live league, seeded for repeatability."""
+
+    def __init__(self, dm, league, traded_players, seed):
+        self.dm = dm
+        self.rng = random.Random(seed)
+        self.team_names = list(league)
+        self.owner_ids = [team['owner_id'] for team in league.values()]
+        self.player_names = [p['name'] for team in league.values() for p in team['players'][:5]]
+        self.traded_players = traded_players or [None]
+        self.serial = itertools.count()
+
+    def team(self):
+        return self.rng.choice(self.team_names)
+
+    def teams(self, k):
+        return self.rng.sample(self.team_names, k)
+
+    def first_player(self, team_name):
+        return self.dm.get_team_by_name(team_name)['players'][0]['id']
+
+    def new_player(self):
+        n = next(self.serial)
+        return {"name": f"Bench Player {n}", "id": f"bench{n}"}
+
+    def typo(self):
+        """A player name with one character dropped, as a fuzzy query."""
+        name = self.rng.choice(self.player_names)
+        i = self.rng.randrange(len(name))
+        return name[:i] + name[i + 1:]
+
+    def operations(self):
+        """name -> (timed, setup) for every DataManager operation."""
+        dm = self.dm
+        since = (datetime.now() - timedelta(days=30)).isoformat()
+
+        def player_setup():
+            team_name = self.team()
+            return team_name, self.rng.choice(dm.get_team_by_name(team_name)['players'])['id']
+
+        def trade_setup():
+            team1, team2 = self.teams(2)
+            return team1, team2, self.first_player(team1), self.first_player(team2)
+
+        def multi_trade_setup():
+            teams = self.teams(3)
+            return [(self.first_player(team), team, teams[(i + 1) % 3]) for i, team in enumerate(teams)]
+
+        def add_setup():
+            return self.team(), self.new_player()
+
+        def added_setup():
+            team_name, player = add_setup()
+            dm.add_player_to_team(team_name, player)
+            return team_name, player['id']
+
+        def transaction(arg):
+            team_name, player = arg
+            with dm.transaction(team_name) as tx:
+                _expect_ok(tx.add_player(team_name, player))
+                _expect_ok(tx.remove_player(team_name, player['id']))
+
+        def add_players(arg):
+            team_name = arg
+            players = [self.new_player() for _ in range(3)]
+            _expect_ok(dm.add_players_to_team(team_name, players))
+            for player in players:
+                dm.remove_player_from_team(team_name, player['id'])
+
+        def create_team(_):
+            n = next(self.serial)
+            _expect_ok(dm.create_team({
+                "name": f"Bench Team {n}", "owner_id": 900000000000000000 + n, "max_size": 20, "players": []
+            }))
+
+        return {
+            "get_team_by_name": (lambda name: dm.get_team_by_name(name), self.team),
+            "get_team_by_owner": (lambda owner: dm.get_team_by_owner(owner), lambda: self.rng.choice(self.owner_ids)),
+            "get_player": (lambda arg: dm.get_player(*arg), player_setup),
+            "get_team_version": (lambda name: dm.get_team_version(team_name=name), self.team),
+            "search_teams": (lambda prefix: dm.search_teams(prefix), lambda: self.team()[:2]),
+            "search_players": (lambda name: dm.search_players(name, 'p'), self.team),
+            "find_players": (lambda query: dm.find_players(query), self.typo),
+            "add_player_to_team": (lambda arg: _expect_ok(dm.add_player_to_team(*arg)), add_setup),
+            "remove_player_from_team": (lambda arg: _expect_ok(dm.remove_player_from_team(*arg)), added_setup),
+            "add_players_to_team": (add_players, self.team),
+            "save_team": (lambda team: dm.save_team(team), lambda: dm.get_team_by_name(self.team())),
+            "create_team": (create_team, None),
+            "transaction": (transaction, add_setup),
+            "execute_propose_trade": (
+                lambda arg: _expect_ok(dm.execute_propose_trade(arg[0], arg[1], [arg[2]], [arg[3]])), trade_setup
+            ),
+            "execute_multi_trade": (lambda moves: _expect_ok(dm.execute_multi_trade(moves)), multi_trade_setup),
+            "get_trade_history": (lambda _: dm.get_trade_history(), None),
+            "get_trade_history_team": (lambda name: dm.get_trade_history(team_name=name), self.team),
+            "query_trades_player": (lambda pid: dm.query_trades(player_id=pid), lambda: self.rng.choice(self.traded_players)),
+            "query_trades_since": (lambda _: dm.query_trades(since=since, limit=50), None),
+            "get_trade_page": (lambda name: dm.get_trade_page(team_name=name), self.team),
+            "get_league_stats": (lambda _: dm.get_league_stats(), None),
+        }
+
+
+class _FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+
+class _FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append(kwargs)
+
+
+class _FakeInteraction:
+    """Just enough of discord.Interaction for Analytics.league_stats."""
+
+    def __init__(self):
+        self.guild_id = BENCH_GUILD_ID
+        self.response = _FakeResponse()
+        self.followup = _FakeFollowup()
+
+
+def bench_league_stats_command(repeat):
+    """Time Analytics.league_stats end to end, from defer to the embed being sent."""
+    try:
+        from cogs.analytics import Analytics
+    except ImportError as e:
+        return None, f"cogs.analytics unavailable ({e})"
+
+    async def run():
+        cog = Analytics(None)
+        samples = []
+        for _ in range(repeat):
+            interaction = _FakeInteraction()
+            start = time.perf_counter()
+            await cog.league_stats.callback(cog, interaction)
+            samples.append(time.perf_counter() - start)
+            if not interaction.followup.sent or 'embed' not in interaction.followup.sent[-1]:
+                raise RuntimeError("league_stats did not send its embed")
+        return samples
+    return asyncio.run(run()), None
+
+
+def cold_load(backend, team_name, repeat):
+    """Open the backend with empty caches and serve the first lookups."""
+    def timed(_):
+        DataManager._league_cache.clear()
+        DataManager._trade_indexes.clear()
+        dm = open_backend(backend)
+        dm.get_team_by_name(team_name)
+        dm.get_trade_history()
+    return measure(repeat, timed)
+
+
+def run_benchmarks(args):
+    results = {
+        "config": {
+            "backend": args.backend, "teams": args.teams, "players": args.players,
+            "trades": args.trades, "seed": args.seed, "repeat": args.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "setup_seconds": {},
+        "operations": {},
+        "skipped": {},
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='trade-bot-bench-') as tmp:
+        os.chdir(tmp)
+        os.environ['DATA_BACKEND'] = args.backend
+        try:
+            started = time.perf_counter()
+            league = generate_league(args.teams, args.players, args.seed)
+            traded_players = []
+            def trades():
+                for trade in generate_trades(league, args.trades, args.seed):
+                    if len(traded_players) < 1000:
+                        traded_players.extend(p['id'] for p in trade.get('players1', ()))
+                    yield trade
+            write_league(guild_data_dir(BENCH_GUILD_ID), league, trades())
+            results["setup_seconds"]["generate"] = round(time.perf_counter() - started, 3)
+
+            started = time.perf_counter()
+            dm = open_backend(args.backend)
+            dm.get_trade_history()
+            results["setup_seconds"]["open"] = round(time.perf_counter() - started, 3)
+
+            print(f"League: {args.teams} teams x {args.players} players, {args.trades} trades ({args.backend})")
+            print(f"{'operation':<26} {'p50 (ms)':>10} {'p95 (ms)':>10} {'max (ms)':>10}")
+
+            def report(name, samples):
+                summary = results["operations"][name] = summarize(samples)
+                print(f"{name:<26} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} {summary['max_ms']:>10.3f}")
+
+            report("cold_load", cold_load(args.backend, next(iter(league)), max(1, min(args.repeat, 3))))
+            dm = open_backend(args.backend)
+            workload = Workload(dm, league, traded_players, args.seed)
+            for name, (timed, setup) in workload.operations().items():
+                report(name, measure(args.repeat, timed, setup))
+
+            samples, reason = bench_league_stats_command(args.repeat)
+            if samples is None:
+                results["skipped"]["league_stats_command"] = reason
+                print(f"{'league_stats_command':<26} skipped: {reason}")
+            else:
+                report("league_stats_command", samples)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print median changes against baseline; return the names that regressed."""
+    if baseline.get("config") != results["config"]:
+        print(f"Warning: baseline config {baseline.get('config')} differs from this run")
+    regressions = []
+    print(f"\n{'operation':<26} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results["operations"].items():
+        before = baseline.get("operations", {}).get(name)
+        if before is None:
+            print(f"{name:<26} {'-':>10} {current['p50_ms']:>10.3f} {'new':>8}")
+            continue
+        change = (current['p50_ms'] - before['p50_ms']) / before['p50_ms'] if before['p50_ms'] else 0.0
+        slower = change > tolerance and current['p50_ms'] - before['p50_ms'] > NOISE_FLOOR_MS
+        if slower:
+            regressions.append(name)
+        flag = "  SLOWER" if slower else ""
+        print(f"{name:<26} {before['p50_ms']:>10.3f} {current['p50_ms']:>10.3f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--trades', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=200, help="timed calls per operation")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed median slowdown before an operation counts as a regression")
+    args = parser.parse_args()
+    if args.teams < 3:
+        parser.error("--teams must be at least 3 (multi-team trades need three teams)")
+
+    results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} operation(s) slower than baseline by more than {args.tolerance:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Compare teams.json snapshot formats: size plus save/load time.
+
+Usage: python -m utils.bench_serializers [--teams 1000] [--players 50] [--repeat 5]
+"""
+import argparse
+import time
+
+from utils.league_generator import generate_league
+from utils.serializers import SERIALIZERS, get_serializer, loads_any
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    league = generate_league(args.teams, args.players)
+    print(f"League: {args.teams} teams x {args.players} players")
+    print(f"{'format':<12} {'size (KB)':>10} {'save (ms)':>10} {'load (ms)':>10}")
+    for name in SERIALIZERS:
+        try:
+            serializer = get_serializer(name)
+        except RuntimeError as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        raw = serializer.dumps(league)
+        save = best_of(args.repeat, lambda: serializer.dumps(league))
+        load = best_of(args.repeat, lambda: loads_any(raw))
+        print(f"{name:<12} {len(raw) / 1024:>10.0f} {save * 1000:>10.1f} {load * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
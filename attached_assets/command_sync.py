@@ -0,0 +1,46 @@
+"""Skip Discord command tree syncs when nothing about the commands changed.
+
+The fingerprint is a hash of every global app command's payload (names,
+descriptions, options, autocomplete flags, ...) plus the application id,
+so it changes whenever a sync would change what Discord has registered.
+The last synced fingerprint is kept in a small file next to the league data.
+"""
+import hashlib
+import json
+import os
+
+from utils.data_manager import DATA_DIR
+
+FINGERPRINT_FILE = os.path.join(DATA_DIR, 'command_tree.sha256')
+
+
+def _command_payload(command, tree):
+    try:
+        return command.to_dict(tree)
+    except TypeError:
+        # discord.py < 2.4 takes no tree argument
+        return command.to_dict()
+
+
+def command_tree_fingerprint(tree, application_id):
+    payloads = sorted(
+        (_command_payload(command, tree) for command in tree.get_commands()),
+        key=lambda payload: (payload.get('type', 1), payload['name'])
+    )
+    raw = json.dumps({"application_id": application_id, "commands": payloads}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def load_synced_fingerprint(path=FINGERPRINT_FILE):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_synced_fingerprint(fingerprint, path=FINGERPRINT_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(fingerprint + '\n')
+    os.replace(tmp, path)
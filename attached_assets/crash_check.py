@@ -0,0 +1,117 @@
+"""Check that the JSON backend keeps every committed trade through a power cut.
+
+Runs trades against a seeded league with a small snapshot_interval while
+recording what each os.fsync made durable. After every trade it simulates
+losing power: a copy of the data directory gets each file as of its last
+fsync (a file never fsynced comes back empty), and a fresh DataManager
+opened on the copy must still hold every committed trade, with rosters
+that match the trade log (load_harness's invariants).
+
+Reads fsynced files back through /proc/self/fd, so it runs on Linux only.
+Exits with status 1 on the first lost trade.
+
+Usage: python -m utils.crash_check [--trades 40] [--snapshot-interval 5] [--seed 1]
+"""
+import argparse
+import os
+import random
+import stat
+import sys
+import tempfile
+
+from utils.data_manager import DataManager
+from utils.league_generator import generate_league, write_league
+from utils.load_harness import check_invariants
+
+
+class DurableFiles:
+    """Remember each file's contents as of its last os.fsync."""
+
+    def __init__(self):
+        self.contents = {}  # inode -> bytes
+        self._real_fsync = os.fsync
+
+    def _fsync(self, fd):
+        self._real_fsync(fd)
+        info = os.fstat(fd)
+        if stat.S_ISREG(info.st_mode):
+            with open(f'/proc/self/fd/{fd}', 'rb') as f:
+                self.contents[info.st_ino] = f.read()
+
+    def __enter__(self):
+        os.fsync = self._fsync
+        return self
+
+    def __exit__(self, *exc_info):
+        os.fsync = self._real_fsync
+
+    def mark_durable(self, directory):
+        """Treat the directory's current files as already on disk."""
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    self.contents[os.stat(path).st_ino] = f.read()
+
+    def power_cut(self, directory, target):
+        """Copy directory to target as it would be after losing power now."""
+        os.makedirs(target)
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(os.path.join(target, name), 'wb') as f:
+                    f.write(self.contents.get(os.stat(path).st_ino, b''))
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix='trade-bot-crash-') as tmp:
+        data_dir = os.path.join(tmp, 'league')
+        league = generate_league(args.teams, args.players, args.seed)
+        history_start = write_league(data_dir, league)
+        with DurableFiles() as durable:
+            durable.mark_durable(data_dir)
+            dm = DataManager(data_dir)
+            dm.snapshot_interval = args.snapshot_interval
+            committed = 0
+            for n in range(args.trades):
+                team1, team2 = rng.sample(list(league), 2)
+                success, message = dm.execute_propose_trade(
+                    team1, team2,
+                    [rng.choice(dm.get_team_by_name(team1)['players'])['id']],
+                    [rng.choice(dm.get_team_by_name(team2)['players'])['id']]
+                )
+                if not success:
+                    print(f"Trade {n} failed: {message}")
+                    return False
+                committed += 1
+
+                crashed = os.path.join(tmp, f'crash-{n}')
+                durable.power_cut(data_dir, crashed)
+                reopened = DataManager(crashed)
+                violations, trades_kept = check_invariants(reopened, league, history_start)
+                if trades_kept != committed:
+                    violations.append(f"{committed} trades committed, {trades_kept} in the log after the crash")
+                if violations:
+                    print(f"Power cut after trade {n}:")
+                    for violation in violations[:20]:
+                        print(f"VIOLATION {violation}")
+                    return False
+    print(f"{args.trades} trades, each followed by a simulated power cut: no committed trade lost")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trades', type=int, default=40)
+    parser.add_argument('--snapshot-interval', type=int, default=5, help="WAL entries between snapshots")
+    parser.add_argument('--teams', type=int, default=6)
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if not run(args):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
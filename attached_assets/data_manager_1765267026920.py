@@ -1,151 +1,1119 @@
+import asyncio
+import copy
+import functools
 import json
+import logging
 import os
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from utils.instrumentation import METRICS
+from utils.league_stats import LeagueStats
+from utils.ngram_index import NgramIndex
+from utils.prefix_index import PrefixIndex
+from utils.serializers import dumps_line, get_serializer, loads_any, loads_line
+from utils.trade_index import TradeIndex
+from utils.transaction import Transaction
 from utils.validators import validate_roster_size
 
-class DataManager:
+try:
+    import fcntl
+except ImportError:  # Windows has no flock(); shared storage is unavailable there
+    fcntl = None
+
+logger = logging.getLogger('trade_bot.data')
+
+# Each guild's league lives in DATA_DIR/guilds/<guild id>/
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+# Files of a league from before storage was split per guild, in DATA_DIR itself
+LEGACY_LEAGUE_FILES = (
+    'teams.json', 'teams.wal', 'trade_history.jsonl', 'trade_history.json',
+    'league.db', 'league.db-wal', 'league.db-shm'
+)
+
+
+class LeagueIndex:
+    """Lookup tables over a loaded league, kept in sync by DataManager.
+
+    Team name -> record is the league dict itself; this adds
+    owner_id -> team name and player_id -> {team name: roster position}.
+    Player ids are not unique across teams, so a player id can map to
+    several teams. Roster totals for /league-stats ride along in `stats`,
+    prefix indexes over team names and player ids/names back the
+    autocomplete lookups, and a trigram index backs fuzzy player search.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.owners = {}
+        self.players = {}
+        self.rosters = {}  # team name -> ids currently indexed for it
+        self.stats = LeagueStats()
+        self.team_search = PrefixIndex()  # lower-cased name -> name
+        self.player_search = PrefixIndex()  # "team\0" + lower-cased id or name -> (id, name)
+        self.all_player_search = PrefixIndex()  # lower-cased id or name -> (id, name, team)
+        self._search_entries = {}  # team name -> {player id: (name, [(PrefixIndex, key, value)])}
+        self.fuzzy_players = NgramIndex()  # (team, id) -> player name, matched on name and id
+        # Writers for different teams can still share a player id entry, so
+        # index updates take this short lock; lookups don't need it
+        self._lock = threading.RLock()
+        # The initial build batches its prefix entries and sorts each index once
+        self._pending = {}
+        for team in data.values():
+            self.add_team(team)
+        for search, entries in self._pending.items():
+            search.add_many(entries)
+        self._pending = None
+
+    def add_team(self, team):
+        with self._lock:
+            self.owners.setdefault(team['owner_id'], team['name'])
+            self._add_search(self.team_search, team['name'].lower(), team['name'])
+            self.reindex_players(team['name'])
+
+    def remove_team(self, team_name):
+        self.stats.remove_team(team_name)
+        with self._lock:
+            self.team_search.remove(team_name.lower(), team_name)
+            self._unindex_search(team_name)
+            for player_id in self.rosters.pop(team_name, ()):
+                self._unindex_player(player_id, team_name)
+            for owner_id, name in list(self.owners.items()):
+                if name == team_name:
+                    del self.owners[owner_id]
+                    # Fall back to the next team this owner has, like a full scan would
+                    other = next((t['name'] for t in list(self.data.values())
+                                  if t['owner_id'] == owner_id and t['name'] != team_name), None)
+                    if other:
+                        self.owners[owner_id] = other
+
+    def reindex_players(self, team_name):
+        """Bring one team's entries up to date after its roster changed.
+
+        Positions are rewritten for the whole roster, since a removal shifts
+        them; search entries change only for players who joined or left.
+        """
+        with self._lock:
+            team = self.data.get(team_name)
+            if not team:
+                self._unindex_search(team_name)
+                for player_id in self.rosters.pop(team_name, ()):
+                    self._unindex_player(player_id, team_name)
+                self.stats.remove_team(team_name)
+                return
+            current = {}
+            for position, player in enumerate(team['players']):
+                current.setdefault(str(player['id']), (player, position))
+            indexed = self._search_entries.get(team_name, {})
+            for player_id, (name, _) in list(indexed.items()):
+                if player_id not in current or current[player_id][0]['name'] != name:
+                    self._unindex_search_player(team_name, player_id)
+            for player_id in self.rosters.get(team_name, set()) - current.keys():
+                self._unindex_player(player_id, team_name)
+            self.rosters[team_name] = set(current)
+            for player_id, (player, position) in current.items():
+                self.players.setdefault(player_id, {})[team_name] = position
+                if player_id not in indexed:
+                    self._index_search(team_name, player)
+            self.stats.set_team(team)
+
+    def _add_search(self, search, key, value):
+        if self._pending is not None:
+            self._pending.setdefault(search, []).append((key, value))
+        else:
+            search.add(key, value)
+
+    def _index_search(self, team_name, player):
+        player_id = str(player['id'])
+        self.fuzzy_players.add((team_name, player_id), player['name'], player['name'], player_id)
+        entries = []
+        for token in dict.fromkeys((player_id.lower(), str(player['name']).lower())):
+            for search, key, value in (
+                (self.player_search, f"{team_name}\0{token}", (player_id, player['name'])),
+                (self.all_player_search, token, (player_id, player['name'], team_name)),
+            ):
+                self._add_search(search, key, value)
+                entries.append((search, key, value))
+        self._search_entries.setdefault(team_name, {})[player_id] = (player['name'], entries)
+
+    def _unindex_search_player(self, team_name, player_id):
+        _, entries = self._search_entries[team_name].pop(player_id)
+        for search, key, value in entries:
+            search.remove(key, value)
+        self.fuzzy_players.remove((team_name, player_id))
+
+    def _unindex_search(self, team_name):
+        for player_id in list(self._search_entries.get(team_name, ())):
+            self._unindex_search_player(team_name, player_id)
+        self._search_entries.pop(team_name, None)
+
+    def _unindex_player(self, player_id, team_name):
+        teams = self.players.get(player_id, {})
+        teams.pop(team_name, None)
+        if not teams:
+            self.players.pop(player_id, None)
+
+    def team_for_owner(self, owner_id):
+        team_name = self.owners.get(owner_id)
+        return self.data.get(team_name) if team_name is not None else None
+
+    def position(self, team_name, player_id):
+        """Return the roster position of player_id in team_name, or None."""
+        return self.players.get(str(player_id), {}).get(team_name)
+
+    def teams_for_player(self, player_id):
+        return list(self.players.get(str(player_id), {}))
+
+    def search_teams(self, prefix, limit=25):
+        return self.team_search.search(prefix.lower(), limit)
+
+    def search_players(self, team_name, prefix, limit=25):
+        """(id, name, team) for players whose id or name starts with prefix,
+        on team_name or, if that is None, on any team."""
+        prefix = prefix.lower()
+        if team_name is None:
+            return self.all_player_search.search(prefix, limit)
+        return [
+            (player_id, name, team_name)
+            for player_id, name in self.player_search.search(f"{team_name}\0{prefix}", limit)
+        ]
+
+
+class TeamLockManager:
+    """Per-team locks for one league.
+
+    hold() takes the locks for a set of teams in sorted name order, so two
+    callers locking overlapping teams can't deadlock and callers locking
+    disjoint teams never wait on each other.
+    """
+
     def __init__(self):
-        self.data_file = 'data/teams.json'
-        self.history_file = 'data/trade_history.json'
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, team_name):
+        with self._guard:
+            lock = self._locks.get(team_name)
+            if lock is None:
+                lock = self._locks[team_name] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def hold(self, *team_names):
+        acquired = []
+        try:
+            for team_name in sorted(set(team_names)):
+                lock = self._lock_for(team_name)
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+class LeagueFileLock:
+    """Exclusive lock on a league's lock file, shared between processes.
+
+    flock() locks belong to an open file, so every acquisition opens the
+    file itself: threads in this process wait on each other just as other
+    processes do. A thread that already holds the lock may take it again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @contextmanager
+    def hold(self):
+        if getattr(self._local, 'depth', 0):
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+        finally:
+            # Closing the file releases the lock
+            os.close(fd)
+
+
+class DataManager:
+    # Parsed league shared by every DataManager in the process, keyed by the
+    # absolute path of the teams file. Each entry holds the on-disk signature,
+    # the league dict, its LeagueIndex and how many WAL entries sit on top of
+    # the last snapshot.
+    _league_cache = {}
+    # Per-league (TeamLockManager, WAL lock, LeagueFileLock), keyed like _league_cache
+    _league_locks = {}
+    _league_locks_guard = threading.Lock()
+    # TradeIndex per trade log, keyed by its absolute path
+    _trade_indexes = {}
+
+    # Bytes read per step when scanning the trade log backwards
+    history_block_size = 64 * 1024
+    # WAL entries allowed to pile up before teams.json is rewritten
+    snapshot_interval = 100
+    # Set when several bot processes (shard ranges) write the same data
+    # directory. Writers then also hold the league's file lock and re-check
+    # the files before changing anything, so no process acts on a cached
+    # league another process has since changed.
+    shared_storage = os.getenv('SHARED_STORAGE', '').lower() in ('1', 'true', 'yes')
+
+    def __init__(self, data_dir='data'):
+        if self.shared_storage and fcntl is None:
+            raise RuntimeError("SHARED_STORAGE needs fcntl.flock, which this platform lacks")
+        os.makedirs(data_dir, exist_ok=True)
+        self.data_file = os.path.join(data_dir, 'teams.json')
+        self.wal_file = os.path.join(data_dir, 'teams.wal')
+        self.lock_file = os.path.join(data_dir, 'teams.lock')
+        self.history_file = os.path.join(data_dir, 'trade_history.jsonl')
+        self.legacy_history_file = os.path.join(data_dir, 'trade_history.json')
+        # Format for teams.json snapshots; loading detects whatever is on disk
+        self.serializer = get_serializer(os.getenv('DATA_FORMAT', 'json'))
+        with self._league_locks_guard:
+            key = os.path.abspath(self.data_file)
+            if key not in self._league_locks:
+                self._league_locks[key] = (TeamLockManager(), threading.Lock(), LeagueFileLock(self.lock_file))
+            # _wal_lock orders WAL appends, snapshots and cache reloads
+            self._locks, self._wal_lock, self._file_lock = self._league_locks[key]
+            history_key = os.path.abspath(self.history_file)
+            if history_key not in self._trade_indexes:
+                self._trade_indexes[history_key] = TradeIndex(self.history_file)
+            self.trade_index = self._trade_indexes[history_key]
+        with self._process_lock():
+            self._migrate_history()
+
+    @staticmethod
+    def _file_signature(path):
+        """Return (mtime_ns, size) for path, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _league_signature(self):
+        return (self._file_signature(self.data_file), self._file_signature(self.wal_file))
+
+    def _process_lock(self):
+        """Hold the league's file lock when storage is shared with other processes.
+
+        Lock order: team locks, then this, then _wal_lock.
+        """
+        return self._file_lock.hold() if self.shared_storage else nullcontext()
+
+    @contextmanager
+    def _writing(self, *team_names):
+        """Lock team_names and yield the league's (data, index) for changing them.
+
+        With shared storage the league is loaded after the file lock is
+        taken, so a change another process committed is read first.
+        """
+        with self._locks.hold(*team_names):
+            with self._process_lock():
+                yield self._load_league()
+
+    @staticmethod
+    def _fsync_dir(path):
+        """Make a rename in path's directory durable (no-op where unsupported)."""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _atomic_write(self, path, write):
+        """Write a file via temp file + fsync + rename so readers never see it half-written.
+
+        write(f) receives the temp file opened in binary mode.
+        """
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            METRICS.add_bytes('write', path, f.tell())
+        os.replace(tmp_file, path)
+        self._fsync_dir(path)
+
+    def _load_league(self):
+        """Return the cached (data, index), reloading only if the files changed on disk.
+
+        A reload reads the last snapshot and replays the WAL on top of it, so
+        its cost depends on the WAL tail rather than the size of the history.
+        The signature check also catches writes by other processes.
+        """
+        key = os.path.abspath(self.data_file)
+        cached = self._league_cache.get(key)
+        if cached is not None and cached['signature'] == self._league_signature():
+            return cached['data'], cached['index']
+
+        # Another process may be mid-append; a reload must not cut its line off as torn
+        with self._process_lock(), self._wal_lock:
+            # A commit from this process may have been mid-append; check again
+            cached = self._league_cache.get(key)
+            signature = self._league_signature()
+            if cached is not None and cached['signature'] == signature:
+                return cached['data'], cached['index']
+            if cached is not None and self.shared_storage and self._apply_wal_tail(cached, signature):
+                return cached['data'], cached['index']
+            return self._reload_league(key)
+
+    def _apply_wal_tail(self, cached, signature):
+        """Catch the cached league up with WAL entries other processes appended.
+
+        Only possible while teams.json is the snapshot the cache was built
+        from and the WAL has just grown; returns False when a full reload
+        is needed instead. Callers hold the file lock, so no writer is
+        mid-append and no other thread here is changing the league.
+        """
+        (old_snapshot, old_wal), (snapshot, wal) = cached['signature'], signature
+        if snapshot != old_snapshot or old_wal is None or wal is None or wal[1] <= old_wal[1]:
+            return False
+        with open(self.wal_file, 'rb') as f:
+            f.seek(old_wal[1])
+            tail = f.read(wal[1] - old_wal[1])
+        METRICS.add_bytes('read', self.wal_file, len(tail))
+        if not tail.endswith(b'\n'):
+            return False
+        try:
+            entries = [loads_line(line) for line in tail.splitlines()]
+        except ValueError:
+            return False
+        data, index = cached['data'], cached['index']
+        for entry in entries:
+            for team in entry['teams'].values():
+                self._replace_team(data, index, team)
+        self._recover_trades([trade for entry in entries for trade in entry.get('trades', ())])
+        cached['wal_entries'] += len(entries)
+        cached['signature'] = signature
+        return True
+
+    def _reload_league(self, key):
+        data = {}
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'rb') as f:
+                raw = f.read()
+            METRICS.add_bytes('read', self.data_file, len(raw))
+            data = loads_any(raw)
+        wal_entries = self._replay_wal(data)
+        index = LeagueIndex(data)
+        self._league_cache[key] = {
+            'signature': self._league_signature(),
+            'data': data,
+            'index': index,
+            'wal_entries': wal_entries
+        }
+        return data, index
 
     def _load_data(self):
-        if not os.path.exists(self.data_file):
-            return {}
-        with open(self.data_file, 'r') as f:
-            return json.load(f)
+        return self._load_league()[0]
 
-    def _save_data(self, data):
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=4)
+    def _load_index(self):
+        return self._load_league()[1]
+
+    def _replay_wal(self, data):
+        """Apply WAL entries to a freshly loaded snapshot. Returns the entry count.
+
+        Entries carry after-images of the teams they touched, so replaying an
+        entry that the snapshot already contains is harmless. A torn final
+        line from a crash mid-append is cut off.
+        """
+        if not os.path.exists(self.wal_file):
+            return 0
+        entries = []
+        valid_bytes = 0
+        with open(self.wal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entries.append(loads_line(line))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+        METRICS.add_bytes('read', self.wal_file, valid_bytes)
+        if valid_bytes != os.path.getsize(self.wal_file):
+            with open(self.wal_file, 'r+b') as f:
+                f.truncate(valid_bytes)
+                os.fsync(f.fileno())
+
+        for entry in entries:
+            data.update(entry['teams'])
+        # Older entries carry a single "trade" rather than a "trades" list
+        self._recover_trades([
+            trade for entry in entries
+            for trade in entry.get('trades', [entry['trade']] if 'trade' in entry else [])
+        ])
+        return len(entries)
+
+    def _recover_trades(self, wal_trades):
+        """Append any logged trades that never made it into the trade history."""
+        self._repair_history_tail()
+        if not wal_trades:
+            return
+        recent = []
+        for trade in self._iter_history_reversed():
+            recent.append(trade)
+            if len(recent) >= len(wal_trades):
+                break
+        recent.reverse()
+        # History ends with some prefix of the WAL's trades; find how long it is
+        written = 0
+        for count in range(min(len(recent), len(wal_trades)), 0, -1):
+            if recent[-count:] == wal_trades[:count]:
+                written = count
+                break
+        for trade in wal_trades[written:]:
+            self._append_trade(trade)
+
+    def _repair_history_tail(self):
+        """Drop a partial last line left in the trade log by a crash."""
+        if not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            position = size
+            while position > 0:
+                step = min(self.history_block_size, position)
+                f.seek(position - step)
+                block = f.read(step)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position != size:
+                f.truncate(position)
+                os.fsync(f.fileno())
+
+    def _commit(self, data, index, teams, trades=()):
+        """Durably record new versions of some teams (and any trades).
+
+        The after-images are written to the WAL as one fsynced line, so
+        roster changes and their trade records survive or vanish together.
+        Only then are the team dicts swapped into the cached league: teams
+        are replaced, never changed in place, so the league as of any
+        point in the WAL can be copied under _wal_lock. teams must be new
+        dicts nobody else holds yet; callers hold their team locks.
+        """
+        key = os.path.abspath(self.data_file)
+        for team in teams:
+            team['version'] = data.get(team['name'], {}).get('version', 0) + 1
+        entry = {"teams": {team['name']: team for team in teams}}
+        if trades:
+            entry["trades"] = list(trades)
+        line = dumps_line(entry)
+        with self._wal_lock:
+            try:
+                with open(self.wal_file, 'ab') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                METRICS.add_bytes('write', self.wal_file, len(line))
+            except Exception:
+                # The WAL may end in a torn line now; reload (and cut it off) on next access
+                self._league_cache.pop(key, None)
+                raise
+
+            for team in teams:
+                self._replace_team(data, index, team)
+            for trade_record in trades:
+                self._append_trade(trade_record)
+
+            cached = self._league_cache.get(key)
+            if cached is not None and cached['data'] is data:
+                cached['wal_entries'] += 1
+                cached['signature'] = self._league_signature()
+
+    def _snapshot_if_due(self):
+        """Fold the WAL into teams.json once snapshot_interval entries have piled up.
+
+        Called after the caller's team locks are released, and takes none:
+        _commit only swaps whole team dicts in after logging them, so a
+        shallow copy of the league taken under _wal_lock matches the WAL
+        up to that point. The copy is serialized with no lock held.
+        """
+        key = os.path.abspath(self.data_file)
+        cached = self._league_cache.get(key)
+        if cached is None or cached['wal_entries'] < self.snapshot_interval:
+            return
+        with self._process_lock():
+            # Another process may have logged changes since; those belong in the snapshot too
+            data = self._load_league()[0]
+            with self._wal_lock:
+                cached = self._league_cache.get(key)
+                if (cached is None or cached['data'] is not data or cached.get('snapshotting')
+                        or cached['wal_entries'] < self.snapshot_interval):
+                    return
+                cached['snapshotting'] = True
+                snapshot = dict(data)
+                snapshot_signature, wal_signature = self._league_signature()
+        try:
+            raw = self.serializer.dumps(snapshot)
+            with self._process_lock():
+                self._load_league()
+                with self._wal_lock:
+                    # Unless another process wrote a snapshot of its own meanwhile
+                    if self._file_signature(self.data_file) == snapshot_signature:
+                        self._save_data(raw, wal_signature[1] if wal_signature else 0)
+        finally:
+            cached['snapshotting'] = False
+
+    def _save_data(self, raw, wal_offset):
+        """Write a serialized snapshot and drop the WAL entries it covers.
+
+        Entries past wal_offset were logged after the snapshot was copied,
+        so they stay in the WAL. Callers hold the file lock and _wal_lock.
+        """
+        self._atomic_write(self.data_file, lambda f: f.write(raw))
+        # Trades are only appended to the log, not fsynced; the WAL is their
+        # durable copy until the log is on disk too
+        if os.path.exists(self.history_file):
+            with open(self.history_file, 'ab') as f:
+                os.fsync(f.fileno())
+        tail = b''
+        if os.path.exists(self.wal_file):
+            with open(self.wal_file, 'rb') as f:
+                f.seek(wal_offset)
+                tail = f.read()
+        if tail:
+            self._atomic_write(self.wal_file, lambda f: f.write(tail))
+        else:
+            with open(self.wal_file, 'w') as f:
+                os.fsync(f.fileno())
+        cached = self._league_cache.get(os.path.abspath(self.data_file))
+        if cached is not None:
+            cached['wal_entries'] = tail.count(b'\n')
+            cached['signature'] = self._league_signature()
+
+    def _migrate_history(self):
+        """Convert a legacy trade_history.json into the line-delimited log once."""
+        if os.path.exists(self.history_file) or not os.path.exists(self.legacy_history_file):
+            return
+        with open(self.legacy_history_file, 'r') as f:
+            trades = json.load(f).get("trades", [])
+
+        def write(f):
+            for trade in trades:
+                f.write(dumps_line(trade))
+        self._atomic_write(self.history_file, write)
 
     def _load_history(self):
         if not os.path.exists(self.history_file):
             return {"trades": []}
-        with open(self.history_file, 'r') as f:
-            return json.load(f)
+        with open(self.history_file, 'rb') as f:
+            trades = [loads_line(line) for line in f if line.strip()]
+            METRICS.add_bytes('read', self.history_file, f.tell())
+        return {"trades": trades}
+
+    def _append_trade(self, trade_record):
+        """Record one trade with a single append to the log."""
+        line = dumps_line(trade_record)
+        with open(self.history_file, 'ab') as f:
+            f.write(line)
+        METRICS.add_bytes('write', self.history_file, len(line))
 
-    def _save_history(self, history):
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=4)
+    def _iter_history_reversed(self):
+        """Yield trades newest first, reading the log backwards in blocks."""
+        if not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b''
+            while position > 0:
+                step = min(self.history_block_size, position)
+                position -= step
+                f.seek(position)
+                METRICS.add_bytes('read', self.history_file, step)
+                lines = (f.read(step) + remainder).split(b'\n')
+                # The first piece may be the tail of a line that starts in an earlier block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield loads_line(line)
+            if remainder.strip():
+                yield loads_line(remainder)
 
     def create_team(self, team_data):
-        data = self._load_data()
-        if team_data['name'] in data:
-            return False
-        data[team_data['name']] = team_data
-        self._save_data(data)
+        with self._writing(team_data['name']) as (data, index):
+            if team_data['name'] in data:
+                return False
+            self._commit(data, index, [copy.deepcopy(team_data)])
+        self._snapshot_if_due()
         return True
 
     def get_team_by_name(self, team_name):
         data = self._load_data()
-        return data.get(team_name)
+        # Hand out copies so callers can't mutate the cached league
+        return copy.deepcopy(data.get(team_name))
 
     def get_team_by_owner(self, owner_id):
-        data = self._load_data()
-        for team in data.values():
-            if team['owner_id'] == owner_id:
-                return team
-        return None
+        return copy.deepcopy(self._load_index().team_for_owner(owner_id))
+
+    def search_teams(self, prefix, limit=25):
+        """Team names starting with prefix (case-insensitive), for autocomplete."""
+        return self._load_index().search_teams(prefix, limit)
+
+    def search_players(self, team_name, prefix, limit=25):
+        """Players on team_name (any team if None) whose id or name starts
+        with prefix, as {"id", "name", "team"} dicts, for autocomplete."""
+        return [
+            {"id": player_id, "name": name, "team": team}
+            for player_id, name, team in self._load_index().search_players(team_name, prefix, limit)
+        ]
+
+    def find_players(self, query, limit=10):
+        """Fuzzy player search across the league by name or id.
+
+        Returns up to limit {"id", "name", "team", "score"} dicts, best
+        match first; score is trigram similarity between 0 and 1.
+        """
+        return [
+            {"id": player_id, "name": name, "team": team_name, "score": score}
+            for score, (team_name, player_id), name in self._load_index().fuzzy_players.search(query, limit)
+        ]
+
+    def get_team_version(self, team_name=None, owner_id=None):
+        """Return (team name, version) by name or owner, or None.
+
+        The version goes up by one with every committed change to the team,
+        so callers can cache anything derived from a team under this key
+        without copying the roster.
+        """
+        data, index = self._load_league()
+        team = data.get(team_name) if team_name is not None else index.team_for_owner(owner_id)
+        return (team['name'], team.get('version', 0)) if team else None
+
+    def get_player(self, team_name, player_id):
+        """Return a copy of the player with player_id on team_name, or None."""
+        data, index = self._load_league()
+        position = index.position(team_name, player_id)
+        team = data.get(team_name)
+        if team is None:
+            return None
+        players = team['players']
+        player_id = str(player_id)
+        # A new roster is published just before the index catches up with it,
+        # so only trust a position that still holds this player
+        if position is None or position >= len(players) or str(players[position]['id']) != player_id:
+            position = next((i for i, p in enumerate(players) if str(p['id']) == player_id), None)
+            if position is None:
+                return None
+        return dict(players[position])
 
     def add_player_to_team(self, team_name, player):
-        data = self._load_data()
-        if team_name not in data:
-            return False
+        """Append a player to a team's roster.
+
+        Fails if the team doesn't exist, is full, or already has a player
+        with this id; checked under the team's lock so concurrent adds
+        can't overfill a roster.
+        """
         # Ensure player ID is stored as string
         player['id'] = str(player['id'])
-        data[team_name]['players'].append(player)
-        self._save_data(data)
+        with self._writing(team_name) as (data, index):
+            team = data.get(team_name)
+            if not team or not validate_roster_size(team):
+                return False
+            if index.position(team_name, player['id']) is not None:
+                return False
+            # A new team dict rather than an append, like every other change
+            self._commit(data, index, [dict(team, players=team['players'] + [dict(player)])])
+        self._snapshot_if_due()
         return True
 
+    def add_players_to_team(self, team_name, players):
+        """Append many players to a roster with one validation pass and one write.
+
+        All or nothing: if any id is blank, repeated, already on the team,
+        or the players don't fit in the roster, nothing is added.
+        Returns (success, message).
+        """
+        with self.transaction(team_name) as tx:
+            return tx.add_players(team_name, players)
+
+    def remove_player_from_team(self, team_name, player_id):
+        """Remove a player from a team. Returns the removed player or None."""
+        with self._writing(team_name) as (data, index):
+            position = index.position(team_name, player_id)
+            if position is None:
+                return None
+            players = list(data[team_name]['players'])
+            player = players.pop(position)
+            self._commit(data, index, [dict(data[team_name], players=players)])
+        self._snapshot_if_due()
+        return player
+
     def save_team(self, team):
         """Save updated team data."""
-        data = self._load_data()
-        data[team['name']] = team
-        self._save_data(data)
+        with self._writing(team['name']) as (data, index):
+            # _commit numbers the version from the stored team, whatever copy the caller saved
+            self._commit(data, index, [copy.deepcopy(team)])
+        self._snapshot_if_due()
         return True
 
     def execute_propose_trade(self, team1_name, team2_name, players1_ids, players2_ids):
-        """Execute a trade involving multiple players between two teams."""
-        data = self._load_data()
-        
-        # Validate team existence
-        if team1_name not in data or team2_name not in data:
-            return False, "One or both teams not found"
-
-        team1 = data[team1_name]
-        team2 = data[team2_name]
-
-        # Validate that lists are not empty and within reasonable limits
-        if not players1_ids or not players2_ids:
-            return False, "Both teams must offer at least one player"
-            
-        max_players_per_trade = 5  # Limit number of players per side in a trade
-        if len(players1_ids) > max_players_per_trade or len(players2_ids) > max_players_per_trade:
-            return False, f"Maximum {max_players_per_trade} players allowed per team in a trade"
-
-        # Convert all IDs to strings and remove duplicates
-        players1_ids = list(set(str(pid) for pid in players1_ids))
-        players2_ids = list(set(str(pid) for pid in players2_ids))
-
-        # Check for duplicate players between teams
-        if set(players1_ids) & set(players2_ids):
-            return False, "Cannot trade the same player ID between teams"
-
-        # Find all players in team1 to be traded
-        players1 = []
-        for pid in players1_ids:
-            player = next((p for p in team1['players'] if str(p['id']) == pid), None)
-            if not player:
-                return False, f"Player with ID {pid} not found in {team1_name}"
-            players1.append(player)
-
-        # Find all players in team2 to be traded
-        players2 = []
-        for pid in players2_ids:
-            player = next((p for p in team2['players'] if str(p['id']) == pid), None)
-            if not player:
-                return False, f"Player with ID {pid} not found in {team2_name}"
-            players2.append(player)
-
-        # Check if teams would exceed max_size after trade
-        team1_final_size = len(team1['players']) - len(players1) + len(players2)
-        team2_final_size = len(team2['players']) - len(players2) + len(players1)
-
-        if team1_final_size > team1['max_size']:
-            return False, f"{team1_name} would exceed maximum roster size (would have {team1_final_size}/{team1['max_size']} players)"
-        if team2_final_size > team2['max_size']:
-            return False, f"{team2_name} would exceed maximum roster size (would have {team2_final_size}/{team2['max_size']} players)"
-
-        # Remove players from their original teams
-        for player in players1:
-            team1['players'].remove(player)
-        for player in players2:
-            team2['players'].remove(player)
-
-        # Add players to their new teams
-        team1['players'].extend(players2)
-        team2['players'].extend(players1)
-
-        # Record trade in history
-        history = self._load_history()
-        trade_record = {
-            "timestamp": datetime.now().isoformat(),
-            "team1": team1_name,
-            "team2": team2_name,
-            "players1": [{"id": p['id'], "name": p['name']} for p in players1],
-            "players2": [{"id": p['id'], "name": p['name']} for p in players2]
-        }
-        history["trades"].append(trade_record)
+        """Execute a trade involving multiple players between two teams.
+
+        Both teams are locked for the whole validate-and-apply step, so
+        trades touching either team serialize while trades between other
+        teams proceed. The rules live in Transaction.trade.
+        """
+        with self.transaction(team1_name, team2_name) as tx:
+            return tx.trade(team1_name, team2_name, players1_ids, players2_ids)
+
+    def execute_multi_trade(self, moves):
+        """Execute an N-team trade atomically; see Transaction.multi_trade.
+
+        moves is a list of (player_id, from_team, to_team).
+        """
+        team_names = {name for _, from_team, to_team in moves for name in (from_team, to_team)}
+        with self.transaction(*team_names) as tx:
+            return tx.multi_trade(moves)
+
+    @contextmanager
+    def transaction(self, *team_names):
+        """Batch any number of changes into one commit.
+
+            with data_manager.transaction('Team A', 'Team B') as tx:
+                tx.remove_player('Team A', 'p1')
+                tx.add_player('Team B', {"name": "Player One", "id": "p1"})
+
+        Locks the named teams (every existing team if none are named) for
+        the whole block; touching any other team raises ValueError, and a
+        team being created must be named up front. On a clean exit the
+        changed teams and recorded trades go to the WAL as a single entry;
+        an exception leaves the league untouched. Not reentrant.
+        """
+        locked = team_names or tuple(self._load_data())
+        with self._writing(*locked) as (data, index):
+            tx = Transaction(self, locked)
+            yield tx
+            self._commit_transaction(tx, data, index)
+        self._snapshot_if_due()
+
+    def _tx_load_team(self, team_name):
+        team = self._load_data().get(team_name)
+        # Cached teams are replaced rather than changed and player dicts are
+        # never edited, so a transaction only needs its own roster list
+        return dict(team, players=list(team['players'])) if team else None
 
-        self._save_data(data)
-        self._save_history(history)
-        return True, "Trade executed successfully"
+    def _tx_position(self, team_name, player_id):
+        return self._load_index().position(team_name, player_id)
+
+    def _commit_transaction(self, tx, data, index):
+        if not tx.changed and not tx.trades:
+            return
+        self._commit(data, index, [tx.teams[name] for name in tx.changed], tx.trades)
+
+    @staticmethod
+    def _replace_team(data, index, team):
+        old = data.get(team['name'])
+        # One assignment per team so unlocked readers never see a half-applied roster
+        data[team['name']] = team
+        if old is None:
+            index.add_team(team)
+        elif old['owner_id'] != team['owner_id']:
+            index.remove_team(team['name'])
+            index.add_team(team)
+        else:
+            index.reindex_players(team['name'])
+
+    def get_league_stats(self, top=3, recent_days=7):
+        """Return the /league-stats numbers from running counters.
+
+        Keys: total_teams, total_players, total_trades, recent_volume
+        (trades over the last `recent_days` calendar days) and top_teams
+        ({name, players, max_size} for the `top` largest rosters).
+        """
+        stats = self._load_index().stats
+        self.trade_index.refresh()
+        trade_stats = self.trade_index.stats
+        return {
+            "total_teams": len(stats.teams),
+            "total_players": stats.total_players,
+            "total_trades": trade_stats.total_trades,
+            "recent_volume": trade_stats.recent_volume(recent_days),
+            "top_teams": stats.largest_rosters(top)
+        }
 
     def get_trade_history(self, team_name=None, limit=10):
-        history = self._load_history()
-        trades = history["trades"]
-        
-        if team_name:
-            trades = [trade for trade in trades if team_name in [trade["team1"], trade["team2"]]]
-        
-        return trades[-limit:]
+        """Return the most recent `limit` trades, oldest first."""
+        return self.query_trades(team_name=team_name, limit=limit)
+
+    def query_trades(self, team_name=None, other_team=None, player_id=None,
+                     since=None, until=None, limit=10, offset=0):
+        """Search trade history through the trade index.
+
+        Filters combine: team_name and other_team restrict to trades
+        between those teams, player_id to trades that moved that player,
+        since/until to an ISO date or timestamp range (until inclusive).
+        Returns up to `limit` trades after skipping the `offset` newest
+        matches, oldest first.
+        """
+        return self.trade_index.query(
+            team_name=team_name, other_team=other_team, player_id=player_id,
+            since=since, until=until, limit=limit, offset=offset
+        )
+
+    def get_trade_page(self, team_name=None, other_team=None, player_id=None,
+                       since=None, until=None, limit=10, before=None, after=None):
+        """Return one page of trade history for cursor-based paging.
+
+        Takes the same filters as query_trades. With no cursor this is the
+        newest page; pass the returned "older"/"newer" cursor back as
+        `before`/`after` to move. Returns {"trades": [...] oldest first,
+        "older": cursor or None, "newer": cursor or None}.
+        """
+        return self.trade_index.page(
+            team_name=team_name, other_team=other_team, player_id=player_id,
+            since=since, until=until, limit=limit, before=before, after=after
+        )
+
+
+def guild_data_dir(guild_id, root=None):
+    """Directory of one guild's league. Commands outside a guild (DMs) share 'direct'."""
+    return os.path.join(root or DATA_DIR, 'guilds', 'direct' if guild_id is None else str(int(guild_id)))
+
+
+def create_data_manager(guild_id=None, root=None):
+    """Return the storage backend for guild_id's league, as selected by DATA_BACKEND.
+
+    DATA_BACKEND=json (default) keeps the league in teams.json in the
+    guild's directory; DATA_BACKEND=sqlite uses league.db there.
+    """
+    backend = os.getenv('DATA_BACKEND', 'json').lower()
+    data_dir = guild_data_dir(guild_id, root)
+    if backend == 'sqlite':
+        from utils.sqlite_store import SQLiteDataManager
+        return SQLiteDataManager(os.path.join(data_dir, 'league.db'), data_dir=data_dir)
+    if backend != 'json':
+        raise ValueError(f"Unknown DATA_BACKEND: {backend}")
+    return DataManager(data_dir)
+
+
+def _legacy_league_paths(root):
+    """(source, file name) for every pre-partitioning league file that exists."""
+    paths = [(os.path.join(root, name), name) for name in LEGACY_LEAGUE_FILES]
+    # The old SQLite database could live anywhere SQLITE_PATH pointed
+    sqlite_path = os.getenv('SQLITE_PATH')
+    if sqlite_path:
+        paths += [(sqlite_path + suffix, 'league.db' + suffix) for suffix in ('', '-wal', '-shm')]
+    return [(source, name) for source, name in dict(paths).items() if os.path.exists(source)]
+
+
+def has_legacy_league(root=None):
+    return bool(_legacy_league_paths(root or DATA_DIR))
+
+
+def migrate_legacy_league(guild_id, root=None):
+    """Move the single global league from before per-guild storage into guild_id's directory.
+
+    Files are renamed, not copied, so the league is never in both places.
+    Refuses (FileExistsError) if the guild already has a league of its
+    own. Returns the names of the files moved.
+    """
+    root = root or DATA_DIR
+    legacy = _legacy_league_paths(root)
+    if not legacy:
+        return []
+    target = guild_data_dir(guild_id, root)
+    clashes = [name for _, name in legacy if os.path.exists(os.path.join(target, name))]
+    if clashes:
+        raise FileExistsError(f"Guild {guild_id} already has {', '.join(clashes)}; not migrating the global league")
+    os.makedirs(target, exist_ok=True)
+    for source, name in legacy:
+        os.replace(source, os.path.join(target, name))
+    DataManager._fsync_dir(os.path.join(target, LEGACY_LEAGUE_FILES[0]))
+    return [name for _, name in legacy]
+
+
+class AsyncDataManager:
+    """Awaitable front end for a DataManager backend.
+
+    Storage calls run on a dedicated thread pool, so blocking file and
+    database I/O never runs on the event loop. Backends lock per team, so
+    calls touching different teams can run side by side.
+    """
+
+    _executor = None
+    max_workers = 4
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=cls.max_workers, thread_name_prefix='data-manager'
+            )
+        return cls._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on the storage thread and await its result.
+
+        The call is timed on the worker thread, so storage metrics measure
+        the backend's own work rather than time spent queued for the pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            functools.partial(METRICS.timed_call, 'storage', func.__name__, func, *args, **kwargs)
+        )
+
+    async def create_team(self, team_data):
+        return await self.run(self.backend.create_team, team_data)
+
+    async def transaction(self, func, *team_names):
+        """Run func(tx) inside the backend's transaction(*team_names) on the pool.
+
+        func runs on a worker thread and must not await; its return value
+        is passed back.
+        """
+        def transaction():
+            with self.backend.transaction(*team_names) as tx:
+                return func(tx)
+        return await self.run(transaction)
+
+    async def get_team_by_name(self, team_name):
+        return await self.run(self.backend.get_team_by_name, team_name)
+
+    async def search_teams(self, prefix, limit=25):
+        return await self.run(self.backend.search_teams, prefix, limit)
+
+    async def search_players(self, team_name, prefix, limit=25):
+        return await self.run(self.backend.search_players, team_name, prefix, limit)
+
+    async def find_players(self, query, limit=10):
+        return await self.run(self.backend.find_players, query, limit)
+
+    async def get_team_version(self, team_name=None, owner_id=None):
+        return await self.run(self.backend.get_team_version, team_name=team_name, owner_id=owner_id)
+
+    async def get_team_by_owner(self, owner_id):
+        return await self.run(self.backend.get_team_by_owner, owner_id)
+
+    async def get_player(self, team_name, player_id):
+        return await self.run(self.backend.get_player, team_name, player_id)
+
+    async def add_player_to_team(self, team_name, player):
+        return await self.run(self.backend.add_player_to_team, team_name, player)
+
+    async def add_players_to_team(self, team_name, players):
+        return await self.run(self.backend.add_players_to_team, team_name, players)
+
+    async def remove_player_from_team(self, team_name, player_id):
+        return await self.run(self.backend.remove_player_from_team, team_name, player_id)
+
+    async def save_team(self, team):
+        return await self.run(self.backend.save_team, team)
+
+    async def execute_propose_trade(self, team1_name, team2_name, players1_ids, players2_ids):
+        return await self.run(
+            self.backend.execute_propose_trade, team1_name, team2_name, players1_ids, players2_ids
+        )
+
+    async def execute_multi_trade(self, moves):
+        return await self.run(self.backend.execute_multi_trade, moves)
+
+    async def get_trade_history(self, team_name=None, limit=10):
+        return await self.run(self.backend.get_trade_history, team_name, limit)
+
+    async def query_trades(self, team_name=None, other_team=None, player_id=None,
+                           since=None, until=None, limit=10, offset=0):
+        return await self.run(
+            self.backend.query_trades, team_name=team_name, other_team=other_team,
+            player_id=player_id, since=since, until=until, limit=limit, offset=offset
+        )
+
+    async def get_trade_page(self, team_name=None, other_team=None, player_id=None,
+                             since=None, until=None, limit=10, before=None, after=None):
+        return await self.run(
+            self.backend.get_trade_page, team_name=team_name, other_team=other_team,
+            player_id=player_id, since=since, until=until, limit=limit,
+            before=before, after=after
+        )
+
+    async def get_league_stats(self, top=3, recent_days=7):
+        return await self.run(self.backend.get_league_stats, top, recent_days)
+
+
+class GuildDataManagers:
+    """One AsyncDataManager per guild, each over that guild's own files.
+
+    Leagues never share a file, lock or cache entry, so a command only
+    loads and rewrites its own guild's league. The global league from
+    before the split is moved into the guild named by LEGACY_GUILD_ID (or
+    the one passed to adopt_legacy_league) the first time that guild's
+    storage is opened.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or DATA_DIR
+        legacy_guild = os.getenv('LEGACY_GUILD_ID')
+        self.legacy_guild_id = int(legacy_guild) if legacy_guild else None
+        self._managers = {}
+        self._lock = threading.Lock()
+
+    def for_guild(self, guild_id):
+        manager = self._managers.get(guild_id)
+        if manager is None:
+            with self._lock:
+                manager = self._managers.get(guild_id)
+                if manager is None:
+                    if guild_id is not None and guild_id == self.legacy_guild_id:
+                        self._migrate_legacy(guild_id)
+                    manager = self._managers[guild_id] = AsyncDataManager(create_data_manager(guild_id, self.root))
+        return manager
+
+    def adopt_legacy_league(self, guild_id):
+        """Give the global league to guild_id unless LEGACY_GUILD_ID already names a guild.
+
+        Safe to call before or after the guild's storage was first opened.
+        """
+        with self._lock:
+            if self.legacy_guild_id is not None or not has_legacy_league(self.root):
+                return
+            self.legacy_guild_id = guild_id
+            if guild_id in self._managers:
+                logger.warning(
+                    "Guild %s storage was opened before the global league was assigned to it; "
+                    "restart the bot with LEGACY_GUILD_ID=%s to migrate it", guild_id, guild_id
+                )
+                return
+            self._migrate_legacy(guild_id)
+
+    def _migrate_legacy(self, guild_id):
+        try:
+            moved = migrate_legacy_league(guild_id, self.root)
+        except FileExistsError as e:
+            logger.error("%s", e)
+            return
+        if moved:
+            logger.info("Moved the global league into guild %s: %s", guild_id, ', '.join(moved))
+
+
+_guild_managers = None
+
+
+def create_async_data_manager():
+    """Return the process-wide GuildDataManagers; use .for_guild(guild_id) per command."""
+    global _guild_managers
+    if _guild_managers is None:
+        _guild_managers = GuildDataManagers()
+    return _guild_managers
@@ -4,7 +4,7 @@ from discord import app_commands
 import logging
 import asyncio
 
-logger = logging.getLogger('discord')
+logger = logging.getLogger('trade_bot.help')
 
 class Help(commands.Cog):
     def __init__(self, bot):
@@ -16,7 +16,7 @@ class Help(commands.Cog):
     )
     @app_commands.checks.cooldown(1, 30.0, key=lambda i: (i.guild_id, i.user.id))  # Rate limit: 1 use per 30 seconds per user per guild
     async def help(self, interaction: discord.Interaction):
-        logger.debug(f"Help command invoked by user {interaction.user.id} in guild {interaction.guild_id}")
+        logger.debug("Help command invoked by user %s in guild %s", interaction.user.id, interaction.guild_id)
         
         # Defer response immediately to prevent timeout
         try:
@@ -34,13 +34,13 @@ class Help(commands.Cog):
                         ephemeral=True
                     )
                 except discord.HTTPException as e:
-                    logger.error(f"Failed to send guild check message: {str(e)}")
+                    logger.error("Failed to send guild check message: %s", e)
                 return
 
             # Get bot member object safely
             bot_member = interaction.guild.get_member(self.bot.user.id)
             if not bot_member:
-                logger.error(f"Could not get bot member object in guild {interaction.guild_id}")
+                logger.error("Could not get bot member object in guild %s", interaction.guild_id)
                 await interaction.followup.send(
                     "An error occurred while checking permissions.",
                     ephemeral=True
@@ -50,7 +50,7 @@ class Help(commands.Cog):
             # Check permissions safely
             channel_perms = interaction.channel.permissions_for(bot_member)
             if not (channel_perms.send_messages and channel_perms.embed_links):
-                logger.warning(f"Missing required permissions in channel {interaction.channel.id}")
+                logger.warning("Missing required permissions in channel %s", interaction.channel.id)
                 await interaction.followup.send(
                     "I need both 'Send Messages' and 'Embed Links' permissions to show the help menu.",
                     ephemeral=True
@@ -75,6 +75,9 @@ class Help(commands.Cog):
                         **/remove-player** `team_name` `player_id` - Remove a player from your team
                         **/view-team** `[team_name]` - View team information and roster
                         **/list-players** `[team_name]` - List all players in a team
+                        **/find-player** `query` `[limit]` - Find players on any team by approximate name or ID
+                        **/import-roster** `team_name` `roster_file` - Add players from a CSV (name,id columns) or JSON file in one go
+                        **/export-roster** `[team_name]` `[file_format]` - Download a roster as CSV or JSON
                         """,
                         inline=False
                     )
@@ -83,9 +86,21 @@ class Help(commands.Cog):
                     embed.add_field(
                         name="Trading System",
                         value="""
-                        **/propose-trade** `target_team` `offer_player_ids` `request_player_ids` - Trade multiple players (up to 5 per team)
+                        **/propose-trade** `target_team` `offer_player_ids` `request_player_ids` - Propose a trade of up to 5 players per team; the other owner accepts or rejects it with the buttons
                         Example: /propose-trade TeamA "pid1,pid2" "pid3,pid4" - Trades 2 players from each team
-                        **/trade-history** `[team_name]` `[limit]` - View detailed trade history with all players involved
+                        **/propose-multi-trade** `moves` - Propose a trade between three or more teams (up to 20 moves); it runs once every team sending players accepts
+                        Example: /propose-multi-trade "TeamA:pid1>TeamB; TeamB:pid2>TeamC; TeamC:pid3>TeamA"
+                        **/my-trade-offers** - List the trade proposals your team has sent and received
+                        **/trade-history** `[team_name]` `[limit]` `[with_team]` `[player_id]` `[since]` `[until]` - View trade history, filtered by team, trade partner, player or date range (YYYY-MM-DD); page with the Older/Newer buttons
+                        """,
+                        inline=False
+                    )
+
+                    # Admin Commands
+                    embed.add_field(
+                        name="Admin",
+                        value="""
+                        **/bot-metrics** - Show command and storage latency percentiles, call and error counts (server administrators only)
                         """,
                         inline=False
                     )
@@ -97,7 +112,7 @@ class Help(commands.Cog):
                         await interaction.followup.send(embed=embed)
                         logger.debug("Help command response sent successfully")
                     except discord.HTTPException as e:
-                        logger.error(f"Failed to send help embed: {str(e)}")
+                        logger.error("Failed to send help embed: %s", e)
                         await interaction.followup.send(
                             "An error occurred while displaying the help message. Please try again.",
                             ephemeral=True
@@ -112,7 +127,7 @@ class Help(commands.Cog):
                 return
             
             except Exception as e:
-                logger.error(f"Unexpected error in help command: {str(e)}")
+                logger.error("Unexpected error in help command: %s", e)
                 try:
                     if not interaction.response.is_done():
                         await interaction.response.send_message(
@@ -125,10 +140,10 @@ class Help(commands.Cog):
                             ephemeral=True
                         )
                 except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                    logger.error(f"Failed to send error message: {str(send_error)}")
+                    logger.error("Failed to send error message: %s", send_error)
 
         except Exception as e:
-            logger.error(f"Global error in help command: {str(e)}")
+            logger.error("Global error in help command: %s", e)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -141,7 +156,7 @@ class Help(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
 
     @help.error
     async def help_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
@@ -151,7 +166,7 @@ class Help(commands.Cog):
                 ephemeral=True
             )
         else:
-            logger.error(f"Unhandled error in help command: {str(error)}")
+            logger.error("Unhandled error in help command: %s", error)
             await interaction.response.send_message(
                 "An error occurred while processing your request.",
                 ephemeral=True
@@ -163,5 +178,5 @@ async def setup(bot):
         await bot.add_cog(Help(bot))
         logger.info("Help cog setup complete")
     except Exception as e:
-        logger.error(f"Error setting up Help cog: {str(e)}")
+        logger.error("Error setting up Help cog: %s", e)
         raise
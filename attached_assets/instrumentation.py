@@ -0,0 +1,219 @@
+"""In-process latency, call, error and I/O counters for commands and storage.
+
+Two kinds of timed operations are tracked: app commands (timed by the bot's
+command tree from interaction_check to completion) and storage calls (timed
+on the data manager's worker thread by AsyncDataManager.run). Each keeps a
+fixed-bucket latency histogram, so recording is a bisect and a few integer
+increments under one lock, and percentiles are estimated from the buckets.
+
+Set METRICS_ENABLED=0 to turn recording off entirely.
+"""
+import contextvars
+import logging
+import os
+import time
+from bisect import bisect_left
+from threading import Lock
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf')
+)
+
+# kind -> (Prometheus metric prefix, label name)
+KINDS = {
+    'command': ('trade_bot_command', 'command'),
+    'storage': ('trade_bot_storage', 'method'),
+}
+
+# Per-interaction timing state, set by command_started() in the command's task
+_command_state = contextvars.ContextVar('command_state', default=None)
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count', 'low', 'high')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+        self.low = float('inf')
+        self.high = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds < self.low:
+            self.low = seconds
+        if seconds > self.high:
+            self.high = seconds
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100), interpolating inside its bucket.
+
+        Estimates are clamped to the fastest and slowest observed values.
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = max(LATENCY_BUCKETS[i - 1] if i else 0.0, self.low)
+                upper = min(LATENCY_BUCKETS[i], self.high)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.high
+
+
+class Metrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.time()
+        self._lock = Lock()
+        self.latency = {}  # (kind, name) -> Histogram
+        self.errors = {}  # (kind, name) -> count
+        self.io_bytes = {}  # (direction, file) -> count
+
+    def observe(self, kind, name, seconds, error=False):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.latency.get((kind, name))
+            if histogram is None:
+                histogram = self.latency[(kind, name)] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                self.errors[(kind, name)] = self.errors.get((kind, name), 0) + 1
+
+    def add_bytes(self, direction, path, count):
+        if not self.enabled or not count:
+            return
+        key = (direction, os.path.basename(path))
+        with self._lock:
+            self.io_bytes[key] = self.io_bytes.get(key, 0) + count
+
+    def timed_call(self, kind, name, func, *args, **kwargs):
+        """Call func(*args, **kwargs), recording its latency and whether it raised."""
+        if not self.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            self.observe(kind, name, time.perf_counter() - started, error=True)
+            raise
+        self.observe(kind, name, time.perf_counter() - started)
+        return result
+
+    def snapshot(self, kind=None):
+        """Rows of {kind, name, calls, errors, mean, p50, p95, p99} (seconds), busiest first."""
+        with self._lock:
+            rows = [
+                {
+                    "kind": row_kind,
+                    "name": name,
+                    "calls": histogram.count,
+                    "errors": self.errors.get((row_kind, name), 0),
+                    "mean": histogram.total / histogram.count,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "p99": histogram.percentile(99),
+                }
+                for (row_kind, name), histogram in self.latency.items()
+                if kind is None or row_kind == kind
+            ]
+        rows.sort(key=lambda row: row["calls"], reverse=True)
+        return rows
+
+    def bytes_snapshot(self):
+        with self._lock:
+            return dict(self.io_bytes)
+
+    def prometheus_text(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            latency = {key: (list(h.counts), h.total, h.count) for key, h in self.latency.items()}
+            errors = dict(self.errors)
+            io_bytes = dict(self.io_bytes)
+
+        lines = []
+        for kind, (prefix, label) in KINDS.items():
+            keys = sorted(key for key in latency if key[0] == kind)
+            if not keys:
+                continue
+            lines.append(f"# HELP {prefix}_latency_seconds Time spent per {label}.")
+            lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+            for key in keys:
+                counts, total, count = latency[key]
+                name = _label_value(key[1])
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_latency_seconds_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_latency_seconds_sum{{{label}="{name}"}} {total!r}')
+                lines.append(f'{prefix}_latency_seconds_count{{{label}="{name}"}} {count}')
+            lines.append(f"# HELP {prefix}_errors_total Calls that failed, per {label}.")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for key in keys:
+                lines.append(f'{prefix}_errors_total{{{label}="{_label_value(key[1])}"}} {errors.get(key, 0)}')
+
+        if io_bytes:
+            lines.append("# HELP trade_bot_storage_bytes_total Bytes read from and written to data files.")
+            lines.append("# TYPE trade_bot_storage_bytes_total counter")
+            for (direction, path), count in sorted(io_bytes.items()):
+                lines.append(
+                    f'trade_bot_storage_bytes_total{{direction="{direction}",file="{_label_value(path)}"}} {count}'
+                )
+        lines.append("# HELP trade_bot_start_time_seconds When metrics collection started.")
+        lines.append("# TYPE trade_bot_start_time_seconds gauge")
+        lines.append(f"trade_bot_start_time_seconds {self.started!r}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Atomically replace path with the current metrics, for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICS = Metrics(enabled=os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no'))
+
+
+def command_started():
+    """Start timing the command running in the current task."""
+    if METRICS.enabled:
+        _command_state.set({"started": time.perf_counter(), "failed": False})
+
+
+def command_finished(name, error=False):
+    """Record the current task's command once, as failed if it errored or logged an error."""
+    state = _command_state.get()
+    if state is None or state.get("done"):
+        return
+    state["done"] = True
+    METRICS.observe('command', name, time.perf_counter() - state["started"], error or state["failed"])
+
+
+class CommandErrorHandler(logging.Handler):
+    """Mark the running command as failed when it logs at ERROR.
+
+    Command handlers catch their own exceptions and reply with an error
+    message, so the error log line is the only trace a failure leaves.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+
+    def emit(self, record):
+        state = _command_state.get()
+        if state is not None:
+            state["failed"] = True
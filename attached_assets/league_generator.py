@@ -0,0 +1,134 @@
+"""Seeded synthetic leagues for benchmarks and load tests.
+
+The same seed and sizes always produce the same teams, rosters and trade
+history, so runs on different machines or commits are comparable.
+
+Usage: python -m utils.league_generator DATA_DIR [--teams 1000] [--players 50] [--trades 500000] [--seed 1]
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+from utils.serializers import dumps_line, get_serializer
+
+CITIES = [
+    "Atlanta", "Boston", "Chicago", "Dallas", "Denver", "Detroit", "Houston", "Miami",
+    "Phoenix", "Portland", "Seattle", "Toronto", "Vancouver", "Austin", "Memphis", "Orlando",
+    "Brooklyn", "Oakland", "Tampa", "Nashville", "Cleveland", "Buffalo", "Calgary", "Montreal",
+]
+MASCOTS = [
+    "Falcons", "Giants", "Hawks", "Lions", "Bears", "Sharks", "Wolves", "Comets",
+    "Rangers", "Pirates", "Knights", "Storm", "Thunder", "Rockets", "Vipers", "Owls",
+]
+FIRST_NAMES = [
+    "James", "Maria", "Wei", "Aisha", "Lucas", "Sofia", "Kenji", "Amara", "Diego", "Ingrid",
+    "Omar", "Priya", "Noah", "Elena", "Mateo", "Hana", "Kwame", "Chloe", "Ravi", "Freya",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Chen", "Okafor", "Muller", "Rossi", "Tanaka", "Silva", "Kowalski", "Nguyen",
+    "Haddad", "Patel", "Johansson", "Dubois", "Kim", "Novak", "Mensah", "Walsh", "Ortiz", "Singh",
+]
+
+
+def generate_league(teams=1000, players=50, seed=1, spare_slots=5):
+    """Return {team name: team} with `players` players each and room for `spare_slots` more."""
+    rng = random.Random(seed)
+    league = {}
+    for t in range(teams):
+        name = f"{rng.choice(CITIES)} {rng.choice(MASCOTS)}"
+        if name in league:
+            name = f"{name} {t}"
+        league[name] = {
+            "name": name,
+            "owner_id": 100000000000000000 + t,
+            "players": [
+                {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "id": f"p{t:05d}{p:03d}"}
+                for p in range(players)
+            ],
+            "max_size": players + spare_slots
+        }
+    return league
+
+
+def generate_trades(league, count=500000, seed=1, days=365, multi_fraction=0.05, end=None):
+    """Yield `count` trade records between teams of league, oldest first.
+
+    Records use the same shapes the data manager writes: two-team trades
+    with players1/players2, and (for multi_fraction of them) three-team
+    trades with teams/moves. They describe past activity, so the players
+    named need not match the current rosters.
+    """
+    rng = random.Random(seed)
+    names = list(league)
+    if len(names) < 2:
+        return
+    end = end or datetime.now()
+    start = end - timedelta(days=days)
+    step = (end - start) / max(count, 1)
+
+    def pick(team_name, k):
+        return [{"id": p['id'], "name": p['name']} for p in rng.sample(league[team_name]['players'], k)]
+
+    for i in range(count):
+        timestamp = (start + step * i).isoformat()
+        if len(names) >= 3 and rng.random() < multi_fraction:
+            teams = rng.sample(names, 3)
+            moves = []
+            for j, from_team in enumerate(teams):
+                to_team = teams[(j + 1) % 3]
+                moves.extend({**player, "from": from_team, "to": to_team} for player in pick(from_team, 1))
+            yield {"timestamp": timestamp, "team1": teams[0], "team2": teams[1], "teams": teams, "moves": moves}
+        else:
+            team1, team2 = rng.sample(names, 2)
+            size = min(rng.randint(1, 3), len(league[team1]['players']), len(league[team2]['players']))
+            if not size:
+                continue
+            yield {
+                "timestamp": timestamp,
+                "team1": team1,
+                "team2": team2,
+                "players1": pick(team1, size),
+                "players2": pick(team2, size)
+            }
+
+
+def write_league(data_dir, league, trades=(), data_format='json'):
+    """Write league as data_dir/teams.json and trades as data_dir/trade_history.jsonl.
+
+    Returns the number of trades written.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'teams.json'), 'wb') as f:
+        f.write(get_serializer(data_format).dumps(league))
+    written = 0
+    with open(os.path.join(data_dir, 'trade_history.jsonl'), 'wb') as f:
+        batch = []
+        for trade in trades:
+            batch.append(dumps_line(trade))
+            if len(batch) >= 10000:
+                f.write(b''.join(batch))
+                written += len(batch)
+                batch = []
+        f.write(b''.join(batch))
+        written += len(batch)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_dir')
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--trades', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--format', default='json', help="teams.json format (see DATA_FORMAT)")
+    args = parser.parse_args()
+
+    league = generate_league(args.teams, args.players, args.seed)
+    written = write_league(args.data_dir, league, generate_trades(league, args.trades, args.seed), args.format)
+    print(f"Wrote {len(league)} teams x {args.players} players and {written} trades to {args.data_dir}")
+
+
+if __name__ == '__main__':
+    main()
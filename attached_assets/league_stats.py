@@ -0,0 +1,81 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class LeagueStats:
+    """Running roster totals for /league-stats, updated on every roster change.
+
+    Teams are bucketed by roster size, so the largest rosters come from
+    walking the (few) distinct sizes instead of sorting every team.
+    """
+
+    def __init__(self):
+        self.teams = {}  # team name -> (roster size, max_size)
+        self.by_size = {}  # roster size -> {team name: None}, in insertion order
+        self.total_players = 0
+        self._lock = threading.Lock()
+
+    def set_team(self, team):
+        with self._lock:
+            self._drop(team['name'])
+            size = len(team['players'])
+            self.teams[team['name']] = (size, team['max_size'])
+            self.by_size.setdefault(size, {})[team['name']] = None
+            self.total_players += size
+
+    def remove_team(self, team_name):
+        with self._lock:
+            self._drop(team_name)
+
+    def _drop(self, team_name):
+        old = self.teams.pop(team_name, None)
+        if old is None:
+            return
+        self.total_players -= old[0]
+        bucket = self.by_size[old[0]]
+        del bucket[team_name]
+        if not bucket:
+            del self.by_size[old[0]]
+
+    def largest_rosters(self, count=3):
+        """Return up to `count` {name, players, max_size} dicts, biggest first."""
+        result = []
+        with self._lock:
+            for size in sorted(self.by_size, reverse=True):
+                for team_name in self.by_size[size]:
+                    result.append({
+                        "name": team_name,
+                        "players": size,
+                        "max_size": self.teams[team_name][1]
+                    })
+                    if len(result) >= count:
+                        return result
+        return result
+
+
+class TradeStats:
+    """Trade counters bucketed by day.
+
+    Fed by TradeIndex as it reads new lines from the trade log, so the
+    counters stay current without rescanning history.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total_trades = 0
+        self.trades_by_day = {}  # 'YYYY-MM-DD' -> trades executed that day
+
+    def record_trade(self, trade):
+        day = trade['timestamp'][:10]
+        self.trades_by_day[day] = self.trades_by_day.get(day, 0) + 1
+        self.total_trades += 1
+
+    def recent_volume(self, days=7):
+        """Trades over the last `days` calendar days, today included."""
+        today = datetime.now().date()
+        return sum(
+            self.trades_by_day.get((today - timedelta(days=i)).isoformat(), 0)
+            for i in range(days)
+        )
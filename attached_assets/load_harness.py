@@ -0,0 +1,552 @@
+"""Drive the real cog command callbacks with simulated users, offline.
+
+Loads TeamManagement, Trading and (when importable) Analytics against a
+seeded league in a temporary data directory. Then it runs --users owners
+concurrently, each invoking a random mix of commands through stub
+Interaction objects. It reports per-command latency, event-loop stalls,
+and how many commands crashed or were answered with an error. Afterwards
+it checks the league for lost updates:
+
+- every player is on exactly one team
+- no roster is over its max_size
+- replaying the trades written during the run, starting from the initial
+  rosters, puts every original player where the rosters say they are
+  (and every move starts from the team the player was on at the time)
+- two simultaneous clicks on Accept run a proposed trade only once, and
+  owners accepting a multi-team trade at the same time all count
+
+Exits with status 1 if an invariant is broken or a command crashed.
+
+Usage: python -m utils.load_harness [--users 200] [--ops 20] [--teams N] [--players 30]
+           [--history 10000] [--backend json|sqlite] [--seed 1] [--output results.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from utils.bench_data_manager import summarize
+from utils.data_manager import create_data_manager, guild_data_dir
+from utils.league_generator import generate_league, generate_trades, write_league
+
+# Loop lag above this counts as a stall
+STALL_SECONDS = 0.1
+LOOP_PROBE_SECONDS = 0.01
+LOAD_PLAYER_PREFIX = 'load-'
+# Every simulated user plays in this guild's league
+GUILD_ID = 1
+# Plain-text ephemeral replies that report an empty result rather than a refusal
+EMPTY_RESULTS = ("Your team has no open trade proposals.",)
+
+# Relative frequency of each simulated action
+WEIGHTS = {
+    "view-team": 20,
+    "list-players": 10,
+    "find-player": 10,
+    "trade-history": 10,
+    "my-trade-offers": 5,
+    "add-player": 12,
+    "remove-player": 8,
+    "propose-trade": 10,
+    "accept-trade": 8,
+    "propose-multi-trade": 3,
+    "league-stats": 4,
+}
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.guild_permissions = FakePermissions()
+
+
+class FakePermissions:
+    administrator = True
+    send_messages = True
+    embed_links = True
+
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, channel):
+        self.id = next(self._ids)
+        self.channel = channel
+
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self)
+
+    def permissions_for(self, member):
+        return FakePermissions()
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeUser(1)
+        self.channel = FakeChannel(1)
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == self.channel.id else None
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    def _respond(self, kind, kwargs):
+        if self._done:
+            import discord
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        self._interaction.sent.append((kind, kwargs))
+
+    async def defer(self, **kwargs):
+        self._respond('defer', kwargs)
+
+    async def send_message(self, content=None, **kwargs):
+        self._respond('send_message', {"content": content, **kwargs})
+
+    async def edit_message(self, **kwargs):
+        self._respond('edit_message', kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self._interaction.sent.append(('followup', {"content": content, **kwargs}))
+        return FakeMessage(self._interaction.channel)
+
+
+class FakeNamespace:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        return None
+
+
+class FakeInteraction:
+    """The parts of discord.Interaction the cogs use, recording every reply in .sent."""
+
+    def __init__(self, bot, user_id, guild_id=GUILD_ID, **namespace):
+        self.client = bot
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.guild = None
+        self.channel = bot.channel
+        self.channel_id = bot.channel.id
+        self.namespace = FakeNamespace(**namespace)
+        self.created_at = datetime.now(timezone.utc)
+        self.extras = {}
+        self.command = None
+        self.sent = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, **kwargs):
+        self.sent.append(('edit_original', kwargs))
+        return FakeMessage(self.channel)
+
+    async def original_response(self):
+        return FakeMessage(self.channel)
+
+    @property
+    def rejected(self):
+        """True if the command refused: the cogs send errors as ephemeral plain text.
+
+        Ephemeral embeds (e.g. /my-trade-offers) and EMPTY_RESULTS are answers.
+        """
+        return any(
+            kwargs.get('ephemeral') and kwargs.get('content') and not kwargs.get('embed')
+            and kwargs['content'] not in EMPTY_RESULTS
+            for _, kwargs in self.sent
+        )
+
+
+def load_cogs(bot):
+    """Instantiate the cogs the way their setup() would; Analytics is optional."""
+    from cogs.team_management import TeamManagement
+    from cogs.trading import Trading
+    cogs = {"teams": TeamManagement(bot), "trading": Trading(bot)}
+    try:
+        from cogs.analytics import Analytics
+        cogs["analytics"] = Analytics(bot)
+    except ImportError:
+        pass
+    return cogs
+
+
+class SimulatedUser:
+    """One team owner issuing a random mix of commands."""
+
+    def __init__(self, harness, team_name, owner_id, seed):
+        self.harness = harness
+        self.team_name = team_name
+        self.owner_id = owner_id
+        self.rng = random.Random(seed)
+        self.added = []  # ids this user added and has not removed yet
+        self.serial = itertools.count()
+
+    async def run(self, ops):
+        actions = [name for name in WEIGHTS if name != "league-stats" or "analytics" in self.harness.cogs]
+        weights = [WEIGHTS[name] for name in actions]
+        for _ in range(ops):
+            action = self.rng.choices(actions, weights)[0]
+            await self.harness.invoke(action, self.owner_id, getattr(self, 'do_' + action.replace('-', '_')))
+            await asyncio.sleep(self.rng.random() * self.harness.think_time)
+
+    def other_team(self):
+        while True:
+            name = self.rng.choice(self.harness.team_names)
+            if name != self.team_name:
+                return name
+
+    async def roster(self, team_name):
+        team = await self.harness.data_manager.get_team_by_name(team_name)
+        return [p['id'] for p in team['players'] if not p['id'].startswith(LOAD_PLAYER_PREFIX)] if team else []
+
+    async def do_view_team(self, cogs, interaction):
+        team_name = self.other_team() if self.rng.random() < 0.5 else None
+        await cogs["teams"].view_team.callback(cogs["teams"], interaction, team_name=team_name)
+
+    async def do_list_players(self, cogs, interaction):
+        await cogs["teams"].list_players.callback(cogs["teams"], interaction, team_name=self.other_team())
+
+    async def do_find_player(self, cogs, interaction):
+        query = self.rng.choice(self.harness.player_names)[:-1]
+        await cogs["teams"].find_player.callback(cogs["teams"], interaction, query=query)
+
+    async def do_trade_history(self, cogs, interaction):
+        await cogs["trading"].trade_history.callback(cogs["trading"], interaction, team_name=self.other_team())
+
+    async def do_my_trade_offers(self, cogs, interaction):
+        await cogs["trading"].my_trade_offers.callback(cogs["trading"], interaction)
+
+    async def do_add_player(self, cogs, interaction):
+        player_id = f"{LOAD_PLAYER_PREFIX}{self.owner_id}-{next(self.serial)}"
+        await cogs["teams"].add_player.callback(
+            cogs["teams"], interaction, team_name=self.team_name, player_name="Load Test", player_id=player_id
+        )
+        if not interaction.rejected:
+            self.added.append(player_id)
+
+    async def do_remove_player(self, cogs, interaction):
+        if not self.added:
+            return await self.do_view_team(cogs, interaction)
+        player_id = self.added.pop(self.rng.randrange(len(self.added)))
+        await cogs["teams"].remove_player.callback(
+            cogs["teams"], interaction, team_name=self.team_name, player_id=player_id
+        )
+
+    async def do_propose_trade(self, cogs, interaction):
+        target = self.other_team()
+        mine, theirs = await self.roster(self.team_name), await self.roster(target)
+        if not mine or not theirs:
+            return await self.do_view_team(cogs, interaction)
+        size = self.rng.randint(1, min(3, len(mine), len(theirs)))
+        await cogs["trading"].propose_trade.callback(
+            cogs["trading"], interaction, target_team=target,
+            offer_player_ids=",".join(self.rng.sample(mine, size)),
+            request_player_ids=",".join(self.rng.sample(theirs, size))
+        )
+
+    async def do_accept_trade(self, cogs, interaction):
+        trading = cogs["trading"]
+        offers = [p for p in trading.proposals.for_team(GUILD_ID, self.team_name) if self.team_name in p['awaiting']]
+        if not offers:
+            return await self.do_my_trade_offers(cogs, interaction)
+        await trading.accept_proposal(interaction, self.rng.choice(offers)['id'])
+
+    async def do_propose_multi_trade(self, cogs, interaction):
+        teams = [self.team_name] + self.rng.sample([n for n in self.harness.team_names if n != self.team_name], 2)
+        moves = []
+        for i, team_name in enumerate(teams):
+            roster = await self.roster(team_name)
+            if not roster:
+                return await self.do_view_team(cogs, interaction)
+            moves.append(f"{team_name}:{self.rng.choice(roster)}>{teams[(i + 1) % len(teams)]}")
+        await cogs["trading"].propose_multi_trade.callback(cogs["trading"], interaction, moves="; ".join(moves))
+
+    async def do_league_stats(self, cogs, interaction):
+        await cogs["analytics"].league_stats.callback(cogs["analytics"], interaction)
+
+
+class Harness:
+    def __init__(self, league, think_time=0.0):
+        self.bot = FakeBot()
+        self.cogs = load_cogs(self.bot)
+        self.data_manager = self.cogs["trading"].leagues.for_guild(GUILD_ID)
+        self.team_names = list(league)
+        self.player_names = [p['name'] for team in league.values() for p in team['players'][:3]]
+        self.think_time = think_time
+        self.latencies = {}
+        self.rejected = {}
+        self.crashes = []
+        self.race_violations = []
+
+    async def invoke(self, action, user_id, handler):
+        interaction = FakeInteraction(self.bot, user_id)
+        start = time.perf_counter()
+        try:
+            await handler(self.cogs, interaction)
+        except Exception as e:
+            self.crashes.append(f"{action}: {type(e).__name__}: {e}")
+        self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+        if interaction.rejected:
+            self.rejected[action] = self.rejected.get(action, 0) + 1
+
+    async def run(self, league, users, ops, seed):
+        trading = self.cogs["trading"]
+        await trading.cog_load()
+        lags = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(watch_loop(lags, stop))
+        simulated = [
+            SimulatedUser(self, name, league[name]['owner_id'], seed * 100003 + i)
+            for i, name in enumerate(self.team_names[:users])
+        ]
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(user.run(ops) for user in simulated))
+            self.race_violations = await self.double_accept(league) + await self.concurrent_multi_accept(league)
+        finally:
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await monitor
+            await trading.cog_unload()
+        return elapsed, lags
+
+    async def double_accept(self, league):
+        """Click Accept twice at once on one /propose-trade offer; returns violations.
+
+        Exactly one click may run the trade; the other must be told the
+        proposal was already handled.
+        """
+        from cogs.trading import ALREADY_HANDLED
+        trading = self.cogs["trading"]
+        proposer, target = self.team_names[0], self.team_names[1]
+        offer = (await self.data_manager.get_team_by_name(proposer))['players'][0]['id']
+        request = (await self.data_manager.get_team_by_name(target))['players'][0]['id']
+        await trading.propose_trade.callback(
+            trading, FakeInteraction(self.bot, league[proposer]['owner_id']),
+            target_team=target, offer_player_ids=offer, request_player_ids=request
+        )
+        proposal = max(
+            (p for p in trading.proposals.for_team(GUILD_ID, target)
+             if p['proposer_team'] == proposer and p['offer_ids'] == [offer]),
+            key=lambda p: p['id'], default=None
+        )
+        if proposal is None:
+            return [f"double accept: /propose-trade {proposer} -> {target} opened no proposal"]
+
+        trades_before = len(await self.data_manager.query_trades(player_id=offer, limit=sys.maxsize))
+        clicks = [FakeInteraction(self.bot, league[target]['owner_id']) for _ in range(2)]
+        await asyncio.gather(*(trading.accept_proposal(click, proposal['id']) for click in clicks))
+        trades_run = len(await self.data_manager.query_trades(player_id=offer, limit=sys.maxsize)) - trades_before
+        handled = sum(
+            kwargs.get('content') == ALREADY_HANDLED for click in clicks for _, kwargs in click.sent
+        )
+        violations = []
+        if trades_run != 1:
+            violations.append(f"double accept of proposal {proposal['id']} ran {trades_run} trades")
+        if handled != 1:
+            violations.append(f"double accept of proposal {proposal['id']}: {handled} click(s) told it was already handled")
+        return violations
+
+    async def concurrent_multi_accept(self, league):
+        """Have both other owners of a three-team offer accept at once, one of
+        them double-clicking; returns violations.
+
+        Both acceptances must count and the trade must run exactly once,
+        without the duplicate click reporting a failed second attempt.
+        """
+        trading = self.cogs["trading"]
+        teams = self.team_names[2:5]
+        moves = []
+        for i, team_name in enumerate(teams):
+            player_id = (await self.data_manager.get_team_by_name(team_name))['players'][0]['id']
+            moves.append((player_id, team_name, teams[(i + 1) % len(teams)]))
+        await trading.propose_multi_trade.callback(
+            trading, FakeInteraction(self.bot, league[teams[0]]['owner_id']),
+            moves="; ".join(f"{from_team}:{player_id}>{to_team}" for player_id, from_team, to_team in moves)
+        )
+        proposal = max(
+            (p for p in trading.proposals.for_team(GUILD_ID, teams[0]) if p.get('moves') == moves),
+            key=lambda p: p['id'], default=None
+        )
+        if proposal is None:
+            return [f"multi accept: /propose-multi-trade between {', '.join(teams)} opened no proposal"]
+
+        player_id = moves[0][0]
+        trades_before = len(await self.data_manager.query_trades(player_id=player_id, limit=sys.maxsize))
+        owners = [league[teams[1]]['owner_id'], league[teams[2]]['owner_id'], league[teams[2]]['owner_id']]
+        clicks = [FakeInteraction(self.bot, owner_id) for owner_id in owners]
+        await asyncio.gather(*(trading.accept_proposal(click, proposal['id']) for click in clicks))
+        trades_run = len(await self.data_manager.query_trades(player_id=player_id, limit=sys.maxsize)) - trades_before
+        violations = []
+        if trades_run != 1:
+            violations.append(f"concurrent accepts of multi-team proposal {proposal['id']} ran {trades_run} trades")
+        failed = [
+            kwargs['embed'].description for click in clicks for _, kwargs in click.sent
+            if kwargs.get('embed') is not None and kwargs['embed'].title == "Trade Proposal Closed"
+        ]
+        if failed:
+            violations.append(f"a duplicate accept of multi-team proposal {proposal['id']} ran it again: {failed[0]}")
+        if trading.proposals.get(proposal['id']) is not None:
+            violations.append(
+                f"multi-team proposal {proposal['id']} still waiting for {', '.join(proposal['awaiting'])} "
+                f"after every owner accepted"
+            )
+        return violations
+
+
+async def watch_loop(lags, stop):
+    """Record how late each short sleep wakes up; lateness is time the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(LOOP_PROBE_SECONDS)
+        lags.append(max(0.0, loop.time() - start - LOOP_PROBE_SECONDS))
+
+
+def _trade_moves(trade):
+    """(player_id, from_team, to_team) for every player a trade record moved."""
+    if 'moves' in trade:
+        return [(move['id'], move['from'], move['to']) for move in trade['moves']]
+    return (
+        [(p['id'], trade['team1'], trade['team2']) for p in trade.get('players1', [])]
+        + [(p['id'], trade['team2'], trade['team1']) for p in trade.get('players2', [])]
+    )
+
+
+def check_invariants(dm, league, history_start):
+    """Return a list of violations between the final league and the trade log."""
+    violations = []
+    where = {}
+    for name, initial in league.items():
+        team = dm.get_team_by_name(name)
+        if team is None:
+            violations.append(f"team {name} disappeared")
+            continue
+        if len(team['players']) > team['max_size']:
+            violations.append(f"{name} has {len(team['players'])}/{team['max_size']} players")
+        for player in team['players']:
+            if player['id'] in where:
+                violations.append(f"player {player['id']} is on both {where[player['id']]} and {name}")
+            where[player['id']] = name
+
+    expected = {p['id']: name for name, team in league.items() for p in team['players']}
+    new_trades = dm.query_trades(limit=sys.maxsize)[history_start:]
+    for n, trade in enumerate(new_trades):
+        for player_id, from_team, to_team in _trade_moves(trade):
+            if player_id not in expected:
+                continue  # added during the run; may since have been removed
+            if expected[player_id] != from_team:
+                violations.append(
+                    f"trade {n} at {trade['timestamp']} moved {player_id} from {from_team}, "
+                    f"but it was on {expected[player_id]}"
+                )
+            expected[player_id] = to_team
+    for player_id, team_name in expected.items():
+        actual = where.get(player_id)
+        if actual != team_name:
+            violations.append(f"player {player_id} should be on {team_name} after the logged trades, found on {actual}")
+    return violations, len(new_trades)
+
+
+def run(args):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='trade-bot-load-') as tmp:
+        os.chdir(tmp)
+        os.environ['DATA_BACKEND'] = args.backend
+        try:
+            teams = max(args.teams or args.users, 3)
+            league = generate_league(teams, args.players, args.seed, spare_slots=10)
+            write_league(guild_data_dir(GUILD_ID), league, generate_trades(league, args.history, args.seed))
+
+            harness = Harness(league, args.think_time)
+            elapsed, lags = asyncio.run(harness.run(league, args.users, args.ops, args.seed))
+            violations, trades_run = check_invariants(create_data_manager(GUILD_ID), league, args.history)
+            violations += harness.race_violations
+        finally:
+            os.chdir(cwd)
+
+    results = {
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "commands": {
+            action: {**summarize(samples), "rejected": harness.rejected.get(action, 0)}
+            for action, samples in sorted(harness.latencies.items())
+        },
+        "loop_lag": {**summarize(lags or [0.0]), "stalls": sum(lag >= STALL_SECONDS for lag in lags)},
+        "trades_committed": trades_run,
+        "crashes": harness.crashes,
+        "violations": violations,
+    }
+
+    total = sum(len(samples) for samples in harness.latencies.values())
+    print(f"{args.users} users x {args.ops} commands ({total} total) in {elapsed:.1f}s on {args.backend}")
+    print(f"{'command':<22} {'runs':>6} {'rejected':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'max (ms)':>10}")
+    for action, row in results["commands"].items():
+        print(f"{action:<22} {row['runs']:>6} {row['rejected']:>9} "
+              f"{row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f} {row['max_ms']:>10.1f}")
+    lag = results["loop_lag"]
+    print(f"Event loop lag: p50 {lag['p50_ms']:.1f} ms, p95 {lag['p95_ms']:.1f} ms, max {lag['max_ms']:.1f} ms, "
+          f"{lag['stalls']} stall(s) over {STALL_SECONDS * 1000:.0f} ms")
+    print(f"Trades committed during the run: {trades_run}")
+    for crash in harness.crashes[:20]:
+        print(f"CRASH {crash}")
+    for violation in violations[:50]:
+        print(f"VIOLATION {violation}")
+    if not violations:
+        print("Invariants hold: no duplicate players, rosters within max_size, trade log matches rosters")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help="concurrent simulated team owners")
+    parser.add_argument('--ops', type=int, default=20, help="commands per user")
+    parser.add_argument('--teams', type=int, help="teams in the league (default: one per user)")
+    parser.add_argument('--players', type=int, default=30)
+    parser.add_argument('--history', type=int, default=10000, help="trades already in the log")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--think-time', type=float, default=0.0, help="max seconds a user waits between commands")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+    if args.teams is not None and args.teams < args.users:
+        parser.error("--teams must be at least --users (each user owns a team)")
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if results["violations"] or results["crashes"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
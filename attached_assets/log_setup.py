@@ -0,0 +1,162 @@
+"""Logging that keeps formatting and handler I/O off the event loop.
+
+Every logger hands its records to a QueueHandler; a QueueListener thread
+formats them and writes them to stderr (and LOG_FILE if set). Records are
+queued with their %-style args untouched, so messages are only built in
+the listener, and only for records that pass the level checks.
+
+Configuration comes from the environment:
+    LOG_LEVEL   level for everything not listed in LOG_LEVELS (default INFO)
+    LOG_LEVELS  per-subsystem levels, e.g. "trade_bot.trading=DEBUG,discord.gateway=WARNING"
+    LOG_FORMAT  "text" (default) or "json"
+    LOG_FILE    also write to this file, rotated at 10 MB
+
+Structured fields ride on records as attributes: pass them with
+extra={...}, or bind them for the rest of the current task with
+bind_log_context() (the bot binds command, guild and user per interaction).
+Text output appends them as key=value pairs; JSON output adds them as keys.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_CONTEXT = contextvars.ContextVar('log_context', default={})
+
+# Attributes every LogRecord has; anything else on a record is a structured field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-8s %(name)s %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def bind_log_context(**fields):
+    """Attach fields to every record logged from the current task from now on."""
+    LOG_CONTEXT.set({**LOG_CONTEXT.get(), **fields})
+
+
+def record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class ContextFilter(logging.Filter):
+    """Copy the bound log context onto records; explicit extra= values win."""
+
+    def filter(self, record):
+        for key, value in LOG_CONTEXT.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() renders the message (and any traceback) in the
+    logging thread. The queue is in-process, so the record can travel as is;
+    callers must not mutate objects passed as args after logging them.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        value = ','.join(map(str, value))
+    text = str(value)
+    if not text or any(c.isspace() or c in '"=' for c in text):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if not fields:
+            return line
+        pairs = ' '.join(f"{key}={_format_value(value)}" for key, value in fields.items())
+        head, newline, rest = line.partition('\n')
+        return f"{head} {pairs}{newline}{rest}"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(spec):
+    """Parse "name=LEVEL,name=LEVEL" into {name: level}, ignoring blank entries."""
+    levels = {}
+    for entry in (spec or '').split(','):
+        if not entry.strip():
+            continue
+        name, sep, level = entry.partition('=')
+        if not sep:
+            raise ValueError(f"Bad LOG_LEVELS entry {entry!r}, expected name=LEVEL")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+        if not isinstance(levels[name.strip()], int):
+            raise ValueError(f"Unknown log level {level.strip()!r} for {name.strip()}")
+    return levels
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread (safe to call twice)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(level=None, levels=None, fmt=None, log_file=None):
+    """Route all logging through a queue; returns the started QueueListener."""
+    global _listener
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    levels = parse_levels(os.getenv('LOG_LEVELS')) if levels is None else levels
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+    log_file = log_file or os.getenv('LOG_FILE')
+
+    formatter = JsonFormatter() if fmt == 'json' else StructuredFormatter(TEXT_FORMAT, DATE_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name, name_level in levels.items():
+        logging.getLogger(name).setLevel(name_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+atexit.register(stop_logging)
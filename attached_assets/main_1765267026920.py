@@ -1,88 +1,182 @@
-import discord
-from discord.ext import commands
-import json
+import time
+_startup_started = time.perf_counter()
+
+import asyncio
 import os
 import logging
+import sys
 from dotenv import load_dotenv
+from utils.instrumentation import CommandErrorHandler, command_finished, command_started
+from utils.log_setup import bind_log_context, setup_logging
+from utils.sharding import format_shard_ids, load_shard_config
+
+load_dotenv()
+# SHARD_COUNT / SHARD_IDS pick the shards this process runs; a process that
+# runs only some of them shares the data directory with the others
+SHARD_COUNT, SHARD_IDS = load_shard_config()
+if SHARD_IDS is not None:
+    os.environ.setdefault('SHARED_STORAGE', '1')
+# Queue-backed logging; levels come from LOG_LEVEL / LOG_LEVELS
+setup_logging()
+logging.getLogger().addHandler(CommandErrorHandler())
+logger = logging.getLogger('trade_bot')
+
+import discord
+from discord import app_commands
+from discord.ext import commands
 from cogs.team_management import TeamManagement
 from cogs.trading import Trading
 from cogs.help import Help
+from utils.command_sync import command_tree_fingerprint, load_synced_fingerprint, save_synced_fingerprint
+from utils.data_manager import DATA_DIR, create_async_data_manager, has_legacy_league
 
-load_dotenv()
-# Set up logging with more detailed format
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s %(levelname)-8s %(name)s %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logger = logging.getLogger('discord')
+# Seconds spent importing discord.py, the cogs and their utils
+_import_seconds = time.perf_counter() - _startup_started
 
 
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
-logging.basicConfig(level=logging.DEBUG)
 
-class SportsBot(commands.Bot):
+class LoggingCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Runs in the task that invokes the command, so every log line the
+        # command writes carries these fields
+        bind_log_context(
+            command=interaction.command.qualified_name if interaction.command else None,
+            guild=interaction.guild_id,
+            user=interaction.user.id
+        )
+        if interaction.type == discord.InteractionType.application_command:
+            command_started()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if interaction.command:
+            command_finished(interaction.command.qualified_name, error=True)
+        await super().on_error(interaction, error)
+
+class SportsBot(commands.AutoShardedBot):
     def __init__(self):
-        super().__init__(command_prefix='/', intents=intents)
-        self.initial_extensions = ['cogs.team_management', 'cogs.trading', 'cogs.help']
-        
+        super().__init__(
+            command_prefix='/', intents=intents, tree_cls=LoggingCommandTree,
+            shard_count=SHARD_COUNT, shard_ids=SHARD_IDS
+        )
+        self.initial_extensions = ['cogs.team_management', 'cogs.trading', 'cogs.help', 'cogs.admin']
+        # FORCE_COMMAND_SYNC=1 syncs even when the command fingerprint is unchanged
+        self.force_command_sync = os.getenv('FORCE_COMMAND_SYNC', '').lower() in ('1', 'true', 'yes')
+        self.startup_timings = {"imports": _import_seconds}
 
     async def setup_hook(self):
         logger.debug("Starting to load extensions...")
+        extensions_started = time.perf_counter()
         for ext in self.initial_extensions:
             try:
-                logger.debug(f"Attempting to load extension: {ext}")
+                logger.debug("Attempting to load extension: %s", ext)
+                ext_started = time.perf_counter()
                 await self.load_extension(ext)
-                logger.info(f"Successfully loaded extension: {ext}")
+                self.startup_timings[f"load {ext}"] = time.perf_counter() - ext_started
+                logger.info("Successfully loaded extension: %s", ext)
             except commands.ExtensionError as e:
-                logger.error(f"Failed to load extension {ext}: {str(e)}")
+                logger.error("Failed to load extension %s: %s", ext, e)
                 raise  # Re-raise to prevent bot from starting with missing extensions
             except Exception as e:
-                logger.error(f"Unexpected error loading {ext}: {str(e)}")
+                logger.error("Unexpected error loading %s: %s", ext, e)
                 raise
+        self.startup_timings["extensions"] = time.perf_counter() - extensions_started
+
+        # Each guild's league is created under DATA_DIR/guilds on first use
+        os.makedirs(DATA_DIR, exist_ok=True)
 
-        # Create data directory if it doesn't exist
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            logger.debug("Created data directory")
-        if not os.path.exists('data/teams.json'):
-            with open('data/teams.json', 'w') as f:
-                json.dump({}, f)
-            logger.debug("Created teams.json file")
-        
-        # Sync commands with proper error handling
-        try:
-            logger.debug("Starting command tree sync...")
-            synced_commands = await self.tree.sync()
-            logger.info(f"Successfully synced {len(synced_commands)} command(s)")
-            logger.debug(f"Registered commands: {[cmd.name for cmd in synced_commands]}")
-            assert 'propose-trade' in [cmd.name for cmd in synced_commands], "propose-trade not registered"
-            assert 'list-players' in [cmd.name for cmd in synced_commands], "'list-players' command not registered"
-            logger.info(f"Successfully synced {len(synced_commands)} command(s)")
-            for cmd in synced_commands:
-                logger.debug(f"Synced command: {cmd.name}")
-        except discord.HTTPException as e:
-            logger.error(f"Failed to sync command tree (HTTP error): {str(e)}")
-            raise  # Re-raise to prevent bot from running with unsynced commands
-        except discord.ClientException as e:
-            logger.error(f"Failed to sync command tree (Client error): {str(e)}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error during command sync: {str(e)}")
-            logger.error(f"Command not registered: {e}")
-            raise
+        registered = [cmd.name for cmd in self.tree.get_commands()]
+        assert 'propose-trade' in registered, "propose-trade not registered"
+        assert 'list-players' in registered, "'list-players' command not registered"
+
+        # Sync commands only when they differ from what was last synced. Commands
+        # are global, so of several shard processes only shard 0's syncs them
+        sync_started = time.perf_counter()
+        fingerprint = command_tree_fingerprint(self.tree, self.application_id)
+        if SHARD_IDS is not None and 0 not in SHARD_IDS:
+            logger.info("Leaving command sync to the process running shard 0")
+        elif not self.force_command_sync and fingerprint == load_synced_fingerprint():
+            logger.info("Command tree unchanged (%s); skipping sync of %s command(s)", fingerprint[:12], len(registered))
+        else:
+            try:
+                logger.debug("Starting command tree sync...")
+                synced_commands = await self.tree.sync()
+                save_synced_fingerprint(fingerprint)
+                logger.info("Successfully synced %s command(s)", len(synced_commands))
+                for cmd in synced_commands:
+                    logger.debug("Synced command: %s", cmd.name)
+            except discord.HTTPException as e:
+                logger.error("Failed to sync command tree (HTTP error): %s", e)
+                raise  # Re-raise to prevent bot from running with unsynced commands
+            except discord.ClientException as e:
+                logger.error("Failed to sync command tree (Client error): %s", e)
+                raise
+            except Exception as e:
+                logger.error("Unexpected error during command sync: %s", e)
+                raise
+        self.startup_timings["sync"] = time.perf_counter() - sync_started
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        command_finished(command.qualified_name)
+        latency_ms = (discord.utils.utcnow() - interaction.created_at).total_seconds() * 1000
+        logger.info(
+            "Command completed",
+            extra={"command": command.qualified_name, "guild": interaction.guild_id,
+                   "user": interaction.user.id, "latency_ms": round(latency_ms, 1)}
+        )
 
     async def on_ready(self):
-        logger.info(f'{self.user} has connected to Discord!')
-        synced_commands = await bot.tree.sync()
-        logger.debug(f"Manually synced commands: {[cmd.name for cmd in synced_commands]}")
-        logger.info(f'Bot is active in {len(self.guilds)} guild(s)')
+        # on_ready fires again after reconnects; commands were synced in setup_hook
+        logger.info('%s has connected to Discord!', self.user)
+        logger.info(
+            'Bot is active in %s guild(s) on shard(s) %s of %s',
+            len(self.guilds), format_shard_ids(sorted(self.shards)), self.shard_count
+        )
+        # Other processes see other guilds, so only a single-process bot can tell it has one
+        if SHARD_IDS is None and len(self.guilds) == 1 and has_legacy_league():
+            # A league from before per-guild storage can only belong to the one guild
+            create_async_data_manager().adopt_legacy_league(self.guilds[0].id)
+        elif has_legacy_league() and not os.getenv('LEGACY_GUILD_ID'):
+            logger.warning(
+                "Found a league in %s from before per-guild storage; set LEGACY_GUILD_ID "
+                "to the guild it belongs to and restart to migrate it", DATA_DIR
+            )
+        if "ready" not in self.startup_timings:
+            self.startup_timings["ready"] = time.perf_counter() - _startup_started
+            logger.info("Startup timings: %s", ", ".join(
+                f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.startup_timings.items()
+            ))
+
+async def check_extensions():
+    """Load every extension in initial_extensions without connecting to Discord.
+
+    Run as `python main.py --check-extensions`; exits non-zero if any fails,
+    which is what setup_hook would do at startup.
+    """
+    failed = []
+    async with bot:
+        for ext in bot.initial_extensions:
+            try:
+                await bot.load_extension(ext)
+            except Exception as e:
+                logger.error("Failed to load extension %s: %s", ext, e)
+                failed.append(ext)
+        registered = [cmd.name for cmd in bot.tree.get_commands()]
+    logger.info("Loaded %s/%s extension(s); %s command(s) registered",
+                len(bot.initial_extensions) - len(failed), len(bot.initial_extensions), len(registered))
+    return not failed
 
 bot = SportsBot()
 
+if '--check-extensions' in sys.argv:
+    sys.exit(0 if asyncio.run(check_extensions()) else 1)
+
 # Use token from environment variable
-print(f"Loaded BOT_TOKEN: {os.getenv('TRADE_BOT_TOKEN')}")
-bot.run(os.getenv('TRADE_BOT_TOKEN'))
+if not os.getenv('TRADE_BOT_TOKEN'):
+    logger.error("TRADE_BOT_TOKEN is not set")
+# log_handler=None keeps discord.py from installing its own root handler
+bot.run(os.getenv('TRADE_BOT_TOKEN'), log_handler=None)
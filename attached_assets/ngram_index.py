@@ -0,0 +1,81 @@
+import heapq
+import re
+import threading
+from collections import Counter
+
+WORD = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Character trigrams of each word, padded like pg_trgm ("  ab", "abc", "bc ")."""
+    grams = set()
+    for word in WORD.findall(str(text).lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """Trigram inverted index for fuzzy lookups.
+
+    Each document is a key plus a label (the text shown in results) and
+    the trigram set of its texts. A query only visits the postings of its
+    own trigrams and ranks the documents it meets by Dice similarity,
+    2 * shared / (query grams + document grams), so cost follows how many
+    documents share grams with the query rather than the size of the index.
+    """
+
+    def __init__(self):
+        self.postings = {}  # trigram -> set of keys
+        self.docs = {}  # key -> (trigram set, label)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, key, label, *texts):
+        grams = set()
+        for text in texts:
+            grams |= trigrams(text)
+        with self._lock:
+            if key in self.docs:
+                self._remove(key)
+            self.docs[key] = (grams, label)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for gram in doc[0]:
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def search(self, query, limit=10, min_score=0.2):
+        """Return up to limit (score, key, label), best match first."""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.postings.get(gram, ()))
+            # A document sharing c grams scores at most 2c / (|query| + c)
+            needed = min_score * len(query_grams) / (2 - min_score)
+            scored = []
+            for key, count in shared.items():
+                if count < needed:
+                    continue
+                grams, label = self.docs[key]
+                score = 2 * count / (len(query_grams) + len(grams))
+                if score >= min_score:
+                    scored.append((score, key, label))
+        return heapq.nlargest(limit, scored, key=lambda result: result[0])
@@ -0,0 +1,47 @@
+import threading
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    """Sorted array of (key, value) pairs answering "keys starting with ...".
+
+    Lookups bisect to the first key >= the prefix and walk forward, so they
+    cost O(log n + results). add() inserts in place; add_many() appends a
+    batch and sorts once, which keeps the initial build at O(n log n).
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, value):
+        with self._lock:
+            insort(self._entries, (key, value))
+
+    def add_many(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+            self._entries.sort()
+
+    def remove(self, key, value):
+        with self._lock:
+            i = bisect_left(self._entries, (key, value))
+            if i < len(self._entries) and self._entries[i] == (key, value):
+                del self._entries[i]
+
+    def search(self, prefix, limit=25):
+        """Values whose key starts with prefix, in key order, without repeats."""
+        results = []
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(results) < limit:
+                key, value = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if value not in results:
+                    results.append(value)
+                i += 1
+        return results
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import time
+
+
+class ProposalStore:
+    """Open trade proposals, indexed for the lookups the trading cog makes.
+
+    Proposals are plain dicts (see add() and add_multi()). Besides id ->
+    proposal this keeps (guild, team) -> ids, so "my open offers" reads one
+    set, and (guild, team, player id) -> ids, so the proposals a trade just
+    invalidated are found without a scan. Team names are only unique
+    within a guild's league, so every index key starts with the guild id.
+    Expiry times sit in a min-heap that one timer task drains; entries for
+    proposals that already closed are skipped when they surface.
+
+    Lives in memory and only on the event loop thread, so no locking.
+    """
+
+    def __init__(self):
+        self.proposals = {}
+        self.by_team = {}
+        self.by_player = {}
+        self._expiry_heap = []  # (expires_at, proposal id)
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.proposals)
+
+    def add(self, proposer_team, target_team, offer_ids, request_ids, ttl, guild_id=None, **extra):
+        """Store a new two-team proposal and return it. `extra` rides along untouched.
+
+        `awaiting` lists the teams whose owners still have to accept.
+        """
+        return self._store(dict(
+            extra,
+            proposer_team=proposer_team,
+            target_team=target_team,
+            offer_ids=list(offer_ids),
+            request_ids=list(request_ids),
+            awaiting=[target_team]
+        ), guild_id, ttl)
+
+    def add_multi(self, proposer_team, moves, ttl, guild_id=None, **extra):
+        """Store a proposed N-team trade and return it.
+
+        moves is a list of (player_id, from_team, to_team). Every team
+        that sends players, other than the proposer's, has to accept.
+        """
+        moves = [(str(pid), from_team, to_team) for pid, from_team, to_team in moves]
+        teams = list(dict.fromkeys(name for _, from_team, to_team in moves for name in (from_team, to_team)))
+        senders = dict.fromkeys(from_team for _, from_team, _ in moves if from_team != proposer_team)
+        return self._store(dict(
+            extra,
+            proposer_team=proposer_team,
+            teams=teams,
+            moves=moves,
+            awaiting=list(senders)
+        ), guild_id, ttl)
+
+    def _store(self, proposal, guild_id, ttl):
+        proposal.update(
+            id=next(self._ids),
+            guild_id=guild_id,
+            created_at=time.time(),
+            expires_at=time.time() + ttl
+        )
+        self.proposals[proposal['id']] = proposal
+        for key in self._team_keys(proposal):
+            self.by_team.setdefault(key, set()).add(proposal['id'])
+        for key in self._player_keys(proposal):
+            self.by_player.setdefault(key, set()).add(proposal['id'])
+        heapq.heappush(self._expiry_heap, (proposal['expires_at'], proposal['id']))
+        return proposal
+
+    @staticmethod
+    def _team_keys(proposal):
+        teams = proposal.get('teams') or (proposal['proposer_team'], proposal['target_team'])
+        return [(proposal['guild_id'], team_name) for team_name in teams]
+
+    @staticmethod
+    def _player_keys(proposal):
+        guild_id = proposal['guild_id']
+        if 'moves' in proposal:
+            return [(guild_id, from_team, pid) for pid, from_team, _ in proposal['moves']]
+        return (
+            [(guild_id, proposal['proposer_team'], pid) for pid in proposal['offer_ids']]
+            + [(guild_id, proposal['target_team'], pid) for pid in proposal['request_ids']]
+        )
+
+    def get(self, proposal_id):
+        return self.proposals.get(proposal_id)
+
+    def remove(self, proposal_id):
+        """Close a proposal. Returns it, or None if it was already closed."""
+        proposal = self.proposals.pop(proposal_id, None)
+        if proposal is None:
+            return None
+        for key in self._team_keys(proposal):
+            ids = self.by_team.get(key)
+            if ids is not None:
+                ids.discard(proposal_id)
+                if not ids:
+                    del self.by_team[key]
+        for key in self._player_keys(proposal):
+            ids = self.by_player.get(key)
+            if ids is not None:
+                ids.discard(proposal_id)
+                if not ids:
+                    del self.by_player[key]
+        # The heap entry stays until it surfaces; rebuild once most are dead
+        if len(self._expiry_heap) > 2 * len(self.proposals) + 64:
+            self._expiry_heap = [(p['expires_at'], p['id']) for p in self.proposals.values()]
+            heapq.heapify(self._expiry_heap)
+        return proposal
+
+    def for_team(self, guild_id, team_name):
+        """Open proposals a guild's team made or received, oldest first."""
+        ids = sorted(self.by_team.get((guild_id, team_name), ()))
+        return [self.proposals[i] for i in ids]
+
+    def count_for_team(self, guild_id, team_name):
+        return len(self.by_team.get((guild_id, team_name), ()))
+
+    def invalidate_players(self, guild_id, team_name, player_ids):
+        """Close every proposal that moves one of these players out of the guild's team_name.
+
+        Call after the players left the team; returns the closed proposals.
+        """
+        ids = set()
+        for player_id in player_ids:
+            ids |= self.by_player.get((guild_id, team_name, str(player_id)), set())
+        return [p for p in (self.remove(i) for i in sorted(ids)) if p is not None]
+
+    def seconds_until_next_expiry(self, now=None):
+        """Seconds until the earliest open proposal expires, or None if there are none."""
+        now = time.time() if now is None else now
+        while self._expiry_heap:
+            expires_at, proposal_id = self._expiry_heap[0]
+            proposal = self.proposals.get(proposal_id)
+            if proposal is None or proposal['expires_at'] != expires_at:
+                heapq.heappop(self._expiry_heap)
+                continue
+            return max(0.0, expires_at - now)
+        return None
+
+    def pop_expired(self, now=None):
+        """Close and return every proposal whose time is up."""
+        now = time.time() if now is None else now
+        expired = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, proposal_id = heapq.heappop(self._expiry_heap)
+            proposal = self.remove(proposal_id)
+            if proposal is not None:
+                expired.append(proposal)
+        return expired
@@ -0,0 +1,34 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU cache of rendered embeds, keyed by (team name, team version, view).
+
+    Values are Embed.to_dict() payloads. A team's version changes with every
+    commit, so an entry can never be stale; old versions simply age out.
+    Used from the event loop only.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        payload = self._entries.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, key, payload):
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
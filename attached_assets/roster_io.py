@@ -0,0 +1,119 @@
+"""Read and write team rosters as CSV or JSON for /import-roster and /export-roster.
+
+CSV files need a header row with `name` and `id` columns (any order, extra
+columns ignored). JSON files hold either a list of {"name", "id"} objects
+or a team object with a "players" list, which is what /export-roster writes.
+"""
+import codecs
+import csv
+import io
+import json
+
+FORMATS = ('csv', 'json')
+
+
+class RosterFormatError(ValueError):
+    """The file can't be read as a roster at all."""
+
+
+def roster_format(filename):
+    """Pick 'csv' or 'json' from an attachment's file name, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else None
+
+
+def iter_roster(raw, fmt):
+    """Yield (row number, {"name", "id"}) for each player in an uploaded file.
+
+    CSV is decoded and parsed a row at a time. Rows missing a field are
+    yielded with that field as '' so the caller can report them.
+    """
+    if fmt == 'csv':
+        text = codecs.iterdecode(io.BytesIO(raw), 'utf-8-sig')
+        reader = csv.reader(text)
+        try:
+            header = [column.strip().lower() for column in next(reader)]
+        except StopIteration:
+            return
+        except UnicodeDecodeError:
+            raise RosterFormatError("File is not valid UTF-8")
+        if 'name' not in header or 'id' not in header:
+            raise RosterFormatError("CSV header must include 'name' and 'id' columns")
+        name_col, id_col = header.index('name'), header.index('id')
+        try:
+            for row_number, row in enumerate(reader, 2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                yield row_number, {
+                    "name": row[name_col].strip() if name_col < len(row) else '',
+                    "id": row[id_col].strip() if id_col < len(row) else ''
+                }
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise RosterFormatError(f"Could not read CSV: {e}")
+        return
+
+    try:
+        document = json.loads(raw)
+    except ValueError as e:
+        raise RosterFormatError(f"Could not read JSON: {e}")
+    if isinstance(document, dict):
+        document = document.get('players')
+    if not isinstance(document, list):
+        raise RosterFormatError("JSON must be a list of players or a team with a 'players' list")
+    for row_number, entry in enumerate(document, 1):
+        if not isinstance(entry, dict):
+            entry = {}
+        yield row_number, {
+            "name": str(entry.get('name') or '').strip(),
+            "id": str(entry.get('id') if entry.get('id') is not None else '').strip()
+        }
+
+
+def parse_roster(raw, fmt, existing_ids, capacity, max_errors=10):
+    """Validate an uploaded roster in a single pass.
+
+    Checks required fields, ids repeated within the file or already on the
+    team, and that the rows fit in `capacity` open roster spots. Returns
+    (players, errors); the import should only go ahead if errors is empty.
+    """
+    players, errors, seen = [], [], set()
+    for row_number, player in iter_roster(raw, fmt):
+        if not player['name'] or not player['id']:
+            errors.append(f"Row {row_number}: missing name or id")
+        elif player['id'] in seen:
+            errors.append(f"Row {row_number}: duplicate id {player['id']}")
+        elif player['id'] in existing_ids:
+            errors.append(f"Row {row_number}: id {player['id']} is already on the team")
+        else:
+            seen.add(player['id'])
+            players.append(player)
+            if len(players) > capacity:
+                errors.append(f"Roster has room for only {capacity} more players")
+                break
+        if len(errors) >= max_errors:
+            break
+    return players, errors
+
+
+def iter_roster_export(team, fmt):
+    """Yield an exported roster as encoded chunks, one player at a time."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(('name', 'id'))
+        for player in team['players']:
+            writer.writerow((player['name'], player['id']))
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+        return
+
+    yield (
+        f'{{"name": {json.dumps(team["name"])}, '
+        f'"max_size": {team["max_size"]}, "players": ['
+    ).encode('utf-8')
+    for i, player in enumerate(team['players']):
+        prefix = ',\n  ' if i else '\n  '
+        yield (prefix + json.dumps({"name": player['name'], "id": player['id']})).encode('utf-8')
+    yield b'\n]}\n'
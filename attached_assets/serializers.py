@@ -0,0 +1,109 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class JsonSerializer:
+    """Stdlib json. indent=None writes the compact form."""
+
+    def __init__(self, indent=None):
+        self.name = 'json-pretty' if indent else 'json'
+        self.indent = indent
+
+    def dumps(self, obj):
+        if self.indent:
+            return json.dumps(obj, indent=self.indent).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class OrjsonSerializer:
+    """orjson: same compact JSON on disk as JsonSerializer, several times faster."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("DATA_FORMAT=orjson requires the orjson package")
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, raw):
+        return orjson.loads(raw)
+
+
+class MsgpackSerializer:
+    """Binary msgpack; smallest files, not human readable."""
+
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("DATA_FORMAT=msgpack requires the msgpack package")
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, raw):
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+SERIALIZERS = {
+    'json': JsonSerializer,
+    'json-pretty': lambda: JsonSerializer(indent=4),
+    'orjson': OrjsonSerializer,
+    'msgpack': MsgpackSerializer,
+}
+
+
+def get_serializer(name='json'):
+    """Return the serializer for a DATA_FORMAT value.
+
+    'fast' picks orjson when it is installed and compact json otherwise.
+    """
+    name = (name or 'json').lower()
+    if name == 'fast':
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown DATA_FORMAT: {name}")
+    return SERIALIZERS[name]()
+
+
+def loads_any(raw):
+    """Decode a snapshot written by any serializer above.
+
+    JSON documents start with '{' or '[' (after optional whitespace);
+    anything else is treated as msgpack.
+    """
+    stripped = raw.lstrip()
+    if not stripped:
+        return {}
+    if stripped[:1] in (b'{', b'['):
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if msgpack is None:
+        raise RuntimeError("Data file is in msgpack format but msgpack is not installed")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+def dumps_line(obj):
+    """Encode one record for a line-delimited log (always compact JSON)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def loads_line(line):
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
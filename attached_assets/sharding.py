@@ -0,0 +1,146 @@
+"""Run the bot's shards across several processes over shared storage.
+
+Each process runs main.py as an AutoShardedBot for one range of shards,
+with SHARD_COUNT, SHARD_IDS and SHARED_STORAGE=1 set for it. A guild
+always lives on one shard, so its commands, open proposals and cached
+embeds stay in one process; the data directory is shared, and
+DataManager's file lock keeps writers in different processes apart.
+
+Usage: python -m utils.sharding [--processes N] [--shards N] [--main main.py]
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from utils.log_setup import setup_logging
+
+logger = logging.getLogger('trade_bot.sharding')
+
+# Seconds to wait before restarting a process that crashed
+RESTART_DELAY = 5.0
+
+
+def parse_shard_ids(value):
+    """Parse a SHARD_IDS setting like '0-3' or '0,2,4-5' into sorted shard ids."""
+    shard_ids = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        if sep:
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    if not shard_ids:
+        raise ValueError(f"No shard ids in {value!r}")
+    return sorted(shard_ids)
+
+
+def format_shard_ids(shard_ids):
+    """Inverse of parse_shard_ids for a contiguous range: [0, 1, 2] -> '0-2'."""
+    if shard_ids == list(range(shard_ids[0], shard_ids[-1] + 1)) and len(shard_ids) > 1:
+        return f"{shard_ids[0]}-{shard_ids[-1]}"
+    return ','.join(str(shard_id) for shard_id in shard_ids)
+
+
+def shard_ranges(shard_count, processes):
+    """Split shards 0..shard_count-1 into `processes` contiguous, near-equal ranges."""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def load_shard_config():
+    """(shard_count, shard_ids) for this process from SHARD_COUNT / SHARD_IDS.
+
+    Both None means one process runs every shard Discord recommends.
+    """
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_ids = os.getenv('SHARD_IDS')
+    shard_count = int(shard_count) if shard_count else None
+    if not shard_ids:
+        return shard_count, None
+    if shard_count is None:
+        raise ValueError("SHARD_IDS needs SHARD_COUNT")
+    shard_ids = parse_shard_ids(shard_ids)
+    if shard_ids[-1] >= shard_count:
+        raise ValueError(f"SHARD_IDS {format_shard_ids(shard_ids)} outside SHARD_COUNT {shard_count}")
+    return shard_count, shard_ids
+
+
+class ShardLauncher:
+    """Start one bot process per shard range and restart any that crash."""
+
+    def __init__(self, main_script, shard_count, processes):
+        self.main_script = main_script
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, processes)
+        self.children = {}  # index into ranges -> Popen
+        self.stopping = False
+
+    def _start(self, i):
+        shard_ids = format_shard_ids(self.ranges[i])
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=shard_ids,
+            SHARED_STORAGE='1'
+        )
+        self.children[i] = subprocess.Popen([sys.executable, self.main_script], env=env)
+        logger.info("Started shards %s of %s (pid %s)", shard_ids, self.shard_count, self.children[i].pid)
+
+    def stop(self, *_):
+        self.stopping = True
+        for child in self.children.values():
+            if child.poll() is None:
+                child.terminate()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for i in range(len(self.ranges)):
+            self._start(i)
+        while self.children:
+            time.sleep(1.0)
+            for i, child in list(self.children.items()):
+                code = child.poll()
+                if code is None:
+                    continue
+                del self.children[i]
+                shard_ids = format_shard_ids(self.ranges[i])
+                if self.stopping or code == 0:
+                    logger.info("Shards %s exited with status %s", shard_ids, code)
+                    continue
+                logger.error("Shards %s exited with status %s; restarting in %ss", shard_ids, code, RESTART_DELAY)
+                time.sleep(RESTART_DELAY)
+                if not self.stopping:
+                    self._start(i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="bot processes to run (default: one per CPU)")
+    parser.add_argument('--shards', type=int, default=None,
+                        help="total shards (default: SHARD_COUNT, else one per process)")
+    parser.add_argument('--main', default='main.py', help="bot entry point to run in each process")
+    args = parser.parse_args()
+
+    setup_logging()
+    shard_count = args.shards or int(os.getenv('SHARD_COUNT') or args.processes)
+    ShardLauncher(args.main, shard_count, args.processes).run()
+
+
+if __name__ == '__main__':
+    main()
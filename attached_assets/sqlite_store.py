@@ -0,0 +1,727 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from utils.ngram_index import NgramIndex
+from utils.serializers import loads_any
+from utils.trade_index import trade_player_ids, trade_teams
+from utils.transaction import Transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    name TEXT PRIMARY KEY,
+    owner_id INTEGER NOT NULL,
+    max_size INTEGER NOT NULL,
+    -- Bumped on every change to the team; see DataManager.get_team_version
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS players (
+    team_name TEXT NOT NULL REFERENCES teams(name) ON DELETE CASCADE,
+    player_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    team1 TEXT NOT NULL,
+    team2 TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trade_players (
+    trade_id INTEGER NOT NULL REFERENCES trades(id) ON DELETE CASCADE,
+    player_id TEXT NOT NULL
+);
+-- Teams of N-team trades; two-team trades only use team1/team2
+CREATE TABLE IF NOT EXISTS trade_teams (
+    trade_id INTEGER NOT NULL REFERENCES trades(id) ON DELETE CASCADE,
+    team_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_teams_owner ON teams(owner_id);
+CREATE INDEX IF NOT EXISTS idx_players_id ON players(player_id);
+CREATE INDEX IF NOT EXISTS idx_players_team ON players(team_name, position);
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_team1 ON trades(team1, id);
+CREATE INDEX IF NOT EXISTS idx_trades_team2 ON trades(team2, id);
+CREATE INDEX IF NOT EXISTS idx_trade_players_player ON trade_players(player_id, trade_id);
+CREATE INDEX IF NOT EXISTS idx_trade_teams_team ON trade_teams(team_name, trade_id);
+
+-- Running totals for get_league_stats. The triggers below keep them in the
+-- same transaction as whatever changed teams, players or trades.
+CREATE TABLE IF NOT EXISTS league_counters (
+    name TEXT PRIMARY KEY,  -- 'teams', 'players' or 'trades'
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trade_days (
+    day TEXT PRIMARY KEY,  -- YYYY-MM-DD prefix of the trade timestamp
+    trades INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roster_sizes (
+    team_name TEXT PRIMARY KEY,
+    players INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_roster_sizes_players ON roster_sizes(players);
+CREATE TRIGGER IF NOT EXISTS stats_team_insert AFTER INSERT ON teams BEGIN
+    INSERT INTO roster_sizes (team_name, players) VALUES (new.name, 0);
+    UPDATE league_counters SET value = value + 1 WHERE name = 'teams';
+END;
+CREATE TRIGGER IF NOT EXISTS stats_team_delete AFTER DELETE ON teams BEGIN
+    DELETE FROM roster_sizes WHERE team_name = old.name;
+    UPDATE league_counters SET value = value - 1 WHERE name = 'teams';
+END;
+CREATE TRIGGER IF NOT EXISTS stats_player_insert AFTER INSERT ON players BEGIN
+    UPDATE roster_sizes SET players = players + 1 WHERE team_name = new.team_name;
+    UPDATE league_counters SET value = value + 1 WHERE name = 'players';
+END;
+CREATE TRIGGER IF NOT EXISTS stats_player_delete AFTER DELETE ON players BEGIN
+    UPDATE roster_sizes SET players = players - 1 WHERE team_name = old.team_name;
+    UPDATE league_counters SET value = value - 1 WHERE name = 'players';
+END;
+CREATE TRIGGER IF NOT EXISTS stats_player_move AFTER UPDATE OF team_name ON players
+WHEN old.team_name != new.team_name BEGIN
+    UPDATE roster_sizes SET players = players - 1 WHERE team_name = old.team_name;
+    UPDATE roster_sizes SET players = players + 1 WHERE team_name = new.team_name;
+END;
+CREATE TRIGGER IF NOT EXISTS stats_trade_insert AFTER INSERT ON trades BEGIN
+    INSERT INTO trade_days (day, trades) VALUES (substr(new.timestamp, 1, 10), 1)
+        ON CONFLICT(day) DO UPDATE SET trades = trades + 1;
+    UPDATE league_counters SET value = value + 1 WHERE name = 'trades';
+END;
+CREATE TRIGGER IF NOT EXISTS stats_trade_delete AFTER DELETE ON trades BEGIN
+    UPDATE trade_days SET trades = trades - 1 WHERE day = substr(old.timestamp, 1, 10);
+    UPDATE league_counters SET value = value - 1 WHERE name = 'trades';
+END;
+"""
+
+
+class SQLiteDataManager:
+    """DataManager backed by a SQLite database in WAL mode.
+
+    Exposes the same methods as DataManager so the cogs don't care which
+    backend they get; see create_data_manager() in utils.data_manager.
+    """
+
+    def __init__(self, db_file=None, data_dir='data'):
+        self.db_file = db_file or os.path.join(data_dir, 'league.db')
+        # JSON files imported into a new database
+        self.data_file = os.path.join(data_dir, 'teams.json')
+        self.history_file = os.path.join(data_dir, 'trade_history.jsonl')
+        self.legacy_history_file = os.path.join(data_dir, 'trade_history.json')
+
+        db_dir = os.path.dirname(self.db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        is_new = not os.path.exists(self.db_file)
+        self._local = threading.local()
+        self._fuzzy_lock = threading.Lock()
+        self._reset_fuzzy()
+        self.conn.executescript(SCHEMA)
+        self._migrate_schema()
+        if is_new:
+            self.import_from_json()
+        else:
+            self._backfill_trade_players()
+        # Building the trigram index reads every player; do it now, off the
+        # caller's thread, rather than on the first /find-player
+        threading.Thread(target=self._refresh_fuzzy, name='sqlite-fuzzy-index', daemon=True).start()
+
+    @property
+    def conn(self):
+        """This thread's connection. SQLite serializes writers itself; WAL
+        mode lets readers on other threads carry on meanwhile."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_file, isolation_level=None, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _begin(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _team_from_rows(self, team_row):
+        players = self.conn.execute(
+            "SELECT player_id, name FROM players WHERE team_name = ? ORDER BY position",
+            (team_row['name'],)
+        ).fetchall()
+        return {
+            "name": team_row['name'],
+            "owner_id": team_row['owner_id'],
+            "players": [{"name": p['name'], "id": p['player_id']} for p in players],
+            "max_size": team_row['max_size'],
+            "version": team_row['version']
+        }
+
+    def _insert_players(self, team_name, players, start=0):
+        self.conn.executemany(
+            "INSERT INTO players (team_name, player_id, name, position) VALUES (?, ?, ?, ?)",
+            [(team_name, str(p['id']), p['name'], start + i) for i, p in enumerate(players)]
+        )
+
+    def _insert_trade(self, trade_record):
+        cursor = self.conn.execute(
+            "INSERT INTO trades (timestamp, team1, team2, record) VALUES (?, ?, ?, ?)",
+            (trade_record['timestamp'], trade_record['team1'], trade_record['team2'],
+             json.dumps(trade_record, separators=(',', ':')))
+        )
+        self.conn.executemany(
+            "INSERT INTO trade_players (trade_id, player_id) VALUES (?, ?)",
+            [(cursor.lastrowid, pid) for pid in dict.fromkeys(trade_player_ids(trade_record))]
+        )
+        if trade_record.get('teams'):
+            self.conn.executemany(
+                "INSERT INTO trade_teams (trade_id, team_name) VALUES (?, ?)",
+                [(cursor.lastrowid, name) for name in trade_teams(trade_record)]
+            )
+
+    def _migrate_schema(self):
+        """Add columns introduced after a database was created."""
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(teams)")}
+        if 'version' not in columns:
+            self.conn.execute("ALTER TABLE teams ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        if not self.conn.execute("SELECT 1 FROM league_counters LIMIT 1").fetchone():
+            self._rebuild_stats()
+
+    def _rebuild_stats(self):
+        """Fill the stats tables from scratch; the triggers keep them current after."""
+        self._begin()
+        try:
+            # Another process may have filled them while this one waited for the lock
+            if not self.conn.execute("SELECT 1 FROM league_counters LIMIT 1").fetchone():
+                self.conn.execute("DELETE FROM roster_sizes")
+                self.conn.execute("DELETE FROM trade_days")
+                for table in ('teams', 'players', 'trades'):
+                    self.conn.execute(
+                        f"INSERT INTO league_counters (name, value) SELECT ?, COUNT(*) FROM {table}", (table,)
+                    )
+                self.conn.execute(
+                    "INSERT INTO roster_sizes (team_name, players) "
+                    "SELECT t.name, COUNT(p.player_id) FROM teams t "
+                    "LEFT JOIN players p ON p.team_name = t.name GROUP BY t.name"
+                )
+                self.conn.execute(
+                    "INSERT INTO trade_days (day, trades) "
+                    "SELECT substr(timestamp, 1, 10), COUNT(*) FROM trades GROUP BY 1"
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _bump_versions(self, *team_names):
+        self.conn.executemany(
+            "UPDATE teams SET version = version + 1 WHERE name = ?",
+            [(name,) for name in dict.fromkeys(team_names)]
+        )
+
+    def _backfill_trade_players(self):
+        """Fill trade_players for databases created before it existed."""
+        if self.conn.execute("SELECT 1 FROM trade_players LIMIT 1").fetchone():
+            return
+        rows = self.conn.execute("SELECT id, record FROM trades").fetchall()
+        if not rows:
+            return
+        self._begin()
+        try:
+            for row in rows:
+                self.conn.executemany(
+                    "INSERT INTO trade_players (trade_id, player_id) VALUES (?, ?)",
+                    [(row['id'], pid) for pid in dict.fromkeys(trade_player_ids(json.loads(row['record'])))]
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def import_from_json(self, data_file=None, history_file=None):
+        """One-shot import of teams.json and the trade history into the database.
+
+        Reads the JSONL log if present, otherwise the legacy trade_history.json.
+        Existing rows are replaced. Returns (teams imported, trades imported).
+        """
+        data_file = data_file or self.data_file
+        if history_file is None:
+            history_file = self.history_file if os.path.exists(self.history_file) else self.legacy_history_file
+
+        data = {}
+        if os.path.exists(data_file):
+            with open(data_file, 'rb') as f:
+                data = loads_any(f.read())
+        trades = []
+        if os.path.exists(history_file):
+            with open(history_file, 'r') as f:
+                if history_file.endswith('.jsonl'):
+                    trades = [json.loads(line) for line in f if line.strip()]
+                else:
+                    trades = json.load(f).get("trades", [])
+
+        self._begin()
+        try:
+            self.conn.execute("DELETE FROM players")
+            self.conn.execute("DELETE FROM teams")
+            self.conn.execute("DELETE FROM trade_players")
+            self.conn.execute("DELETE FROM trades")
+            for team in data.values():
+                self.conn.execute(
+                    "INSERT INTO teams (name, owner_id, max_size, version) VALUES (?, ?, ?, ?)",
+                    (team['name'], team['owner_id'], team['max_size'], team.get('version', 0))
+                )
+                self._insert_players(team['name'], team['players'])
+            for trade in trades:
+                self._insert_trade(trade)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        # Imported versions may repeat ones the fuzzy index has already seen
+        self._reset_fuzzy()
+        return len(data), len(trades)
+
+    def _load_data(self):
+        teams = self.conn.execute("SELECT * FROM teams ORDER BY rowid").fetchall()
+        return {t['name']: self._team_from_rows(t) for t in teams}
+
+    def _load_history(self):
+        rows = self.conn.execute("SELECT record FROM trades ORDER BY id").fetchall()
+        return {"trades": [json.loads(r['record']) for r in rows]}
+
+    def create_team(self, team_data):
+        self._begin()
+        try:
+            exists = self.conn.execute(
+                "SELECT 1 FROM teams WHERE name = ?", (team_data['name'],)
+            ).fetchone()
+            if exists:
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.execute(
+                "INSERT INTO teams (name, owner_id, max_size) VALUES (?, ?, ?)",
+                (team_data['name'], team_data['owner_id'], team_data['max_size'])
+            )
+            self._insert_players(team_data['name'], team_data.get('players', []))
+            self._bump_versions(team_data['name'])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def get_team_by_name(self, team_name):
+        row = self.conn.execute("SELECT * FROM teams WHERE name = ?", (team_name,)).fetchone()
+        return self._team_from_rows(row) if row else None
+
+    @staticmethod
+    def _like_prefix(prefix):
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return escaped + '%'
+
+    def search_teams(self, prefix, limit=25):
+        """Team names starting with prefix (case-insensitive); see DataManager.search_teams."""
+        rows = self.conn.execute(
+            "SELECT name FROM teams WHERE name LIKE ? ESCAPE '\\' ORDER BY lower(name), name LIMIT ?",
+            (self._like_prefix(prefix), limit)
+        ).fetchall()
+        return [row['name'] for row in rows]
+
+    def search_players(self, team_name, prefix, limit=25):
+        """Players whose id or name starts with prefix; see DataManager.search_players."""
+        pattern = self._like_prefix(prefix)
+        query = (
+            "SELECT player_id, name, team_name FROM players "
+            "WHERE (player_id LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')"
+        )
+        params = [pattern, pattern]
+        if team_name is not None:
+            query += " AND team_name = ?"
+            params.append(team_name)
+        query += " ORDER BY lower(player_id), team_name LIMIT ?"
+        rows = self.conn.execute(query, params + [limit]).fetchall()
+        return [{"id": r['player_id'], "name": r['name'], "team": r['team_name']} for r in rows]
+
+    def _reset_fuzzy(self):
+        with self._fuzzy_lock:
+            self._fuzzy = NgramIndex()
+            self._fuzzy_versions = {}  # team name -> version currently in _fuzzy
+            self._fuzzy_keys = {}  # team name -> keys added for its players
+
+    def _refresh_fuzzy(self):
+        """Bring the trigram index up to date, re-reading only teams whose version moved.
+
+        Versions live in the database, so changes made by other connections
+        or processes are picked up too. The first call, made in the
+        background when the database is opened, reads every player.
+        """
+        with self._fuzzy_lock:
+            versions = {row['name']: row['version'] for row in self.conn.execute("SELECT name, version FROM teams")}
+            stale = [name for name in self._fuzzy_versions if versions.get(name) != self._fuzzy_versions[name]]
+            changed = [name for name, version in versions.items() if self._fuzzy_versions.get(name) != version]
+            for name in stale:
+                for key in self._fuzzy_keys.pop(name, ()):
+                    self._fuzzy.remove(key)
+                del self._fuzzy_versions[name]
+            for start in range(0, len(changed), 500):
+                batch = changed[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT team_name, player_id, name FROM players WHERE team_name IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for row in rows:
+                    key = (row['team_name'], row['player_id'])
+                    if key not in self._fuzzy.docs:
+                        self._fuzzy.add(key, row['name'], row['name'], row['player_id'])
+                        self._fuzzy_keys.setdefault(row['team_name'], []).append(key)
+            for name in changed:
+                self._fuzzy_versions[name] = versions[name]
+        return self._fuzzy
+
+    def find_players(self, query, limit=10):
+        """Fuzzy player search by name or id; see DataManager.find_players."""
+        return [
+            {"id": player_id, "name": name, "team": team_name, "score": score}
+            for score, (team_name, player_id), name in self._refresh_fuzzy().search(query, limit)
+        ]
+
+    def get_team_version(self, team_name=None, owner_id=None):
+        """Return (team name, version) by name or owner without loading the roster."""
+        if team_name is not None:
+            row = self.conn.execute("SELECT name, version FROM teams WHERE name = ?", (team_name,)).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT name, version FROM teams WHERE owner_id = ? ORDER BY rowid LIMIT 1", (owner_id,)
+            ).fetchone()
+        return (row['name'], row['version']) if row else None
+
+    def get_team_by_owner(self, owner_id):
+        row = self.conn.execute(
+            "SELECT * FROM teams WHERE owner_id = ? ORDER BY rowid LIMIT 1", (owner_id,)
+        ).fetchone()
+        return self._team_from_rows(row) if row else None
+
+    def get_player(self, team_name, player_id):
+        """Return the player with player_id on team_name, or None."""
+        row = self.conn.execute(
+            "SELECT player_id, name FROM players WHERE team_name = ? AND player_id = ? "
+            "ORDER BY position LIMIT 1",
+            (team_name, str(player_id))
+        ).fetchone()
+        return {"name": row['name'], "id": row['player_id']} if row else None
+
+    def add_player_to_team(self, team_name, player):
+        """Append a player; fails if the team is missing, full or already has this id."""
+        # Ensure player ID is stored as string
+        player['id'] = str(player['id'])
+        self._begin()
+        try:
+            team = self.conn.execute("SELECT max_size FROM teams WHERE name = ?", (team_name,)).fetchone()
+            size = self.conn.execute(
+                "SELECT COUNT(*) FROM players WHERE team_name = ?", (team_name,)
+            ).fetchone()[0]
+            if not team or size >= team['max_size'] or self._find_trade_rows(team_name, [player['id']])[0]:
+                self.conn.execute("ROLLBACK")
+                return False
+            self._insert_players(team_name, [player], start=self._next_position(team_name))
+            self._bump_versions(team_name)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def add_players_to_team(self, team_name, players):
+        """Append many players in one transaction; see DataManager.add_players_to_team."""
+        with self.transaction(team_name) as tx:
+            return tx.add_players(team_name, players)
+
+    def execute_multi_trade(self, moves):
+        """Execute an N-team trade atomically; see Transaction.multi_trade."""
+        with self.transaction() as tx:
+            return tx.multi_trade(moves)
+
+    @contextmanager
+    def transaction(self, *team_names):
+        """Batch changes into one SQLite transaction; see DataManager.transaction.
+
+        BEGIN IMMEDIATE takes the database write lock for the whole block,
+        so naming teams only limits which ones the block may touch.
+        """
+        self._begin()
+        try:
+            tx = Transaction(self, team_names or None)
+            yield tx
+            for name in tx.changed:
+                team = tx.teams[name]
+                self.conn.execute(
+                    "INSERT INTO teams (name, owner_id, max_size) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET owner_id = excluded.owner_id, max_size = excluded.max_size",
+                    (team['name'], team['owner_id'], team['max_size'])
+                )
+                self.conn.execute("DELETE FROM players WHERE team_name = ?", (name,))
+                self._insert_players(name, team['players'])
+            self._bump_versions(*tx.changed)
+            for trade_record in tx.trades:
+                self._insert_trade(trade_record)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _tx_load_team(self, team_name):
+        return self.get_team_by_name(team_name)
+
+    def remove_player_from_team(self, team_name, player_id):
+        """Remove a player from a team. Returns the removed player or None."""
+        self._begin()
+        try:
+            row = self.conn.execute(
+                "SELECT rowid, player_id, name FROM players WHERE team_name = ? AND player_id = ? "
+                "ORDER BY position LIMIT 1",
+                (team_name, str(player_id))
+            ).fetchone()
+            if not row:
+                self.conn.execute("ROLLBACK")
+                return None
+            self.conn.execute("DELETE FROM players WHERE rowid = ?", (row['rowid'],))
+            self._bump_versions(team_name)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {"name": row['name'], "id": row['player_id']}
+
+    def save_team(self, team):
+        """Save updated team data."""
+        self._begin()
+        try:
+            self.conn.execute(
+                "INSERT INTO teams (name, owner_id, max_size) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner_id = excluded.owner_id, max_size = excluded.max_size",
+                (team['name'], team['owner_id'], team['max_size'])
+            )
+            self.conn.execute("DELETE FROM players WHERE team_name = ?", (team['name'],))
+            self._insert_players(team['name'], team['players'])
+            self._bump_versions(team['name'])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _next_position(self, team_name):
+        row = self.conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) AS next FROM players WHERE team_name = ?",
+            (team_name,)
+        ).fetchone()
+        return row['next']
+
+    def _find_trade_rows(self, team_name, player_ids):
+        rows = []
+        for pid in player_ids:
+            row = self.conn.execute(
+                "SELECT rowid, player_id, name FROM players WHERE team_name = ? AND player_id = ? "
+                "ORDER BY position LIMIT 1",
+                (team_name, pid)
+            ).fetchone()
+            if not row:
+                return None, pid
+            rows.append(row)
+        return rows, None
+
+    def execute_propose_trade(self, team1_name, team2_name, players1_ids, players2_ids):
+        """Execute a trade involving multiple players between two teams.
+
+        Runs as one transaction that only touches the traded player rows
+        and the new trade row.
+        """
+        # Validate that lists are not empty and within reasonable limits
+        if not players1_ids or not players2_ids:
+            return False, "Both teams must offer at least one player"
+
+        max_players_per_trade = 5  # Limit number of players per side in a trade
+        if len(players1_ids) > max_players_per_trade or len(players2_ids) > max_players_per_trade:
+            return False, f"Maximum {max_players_per_trade} players allowed per team in a trade"
+
+        # Convert all IDs to strings and remove duplicates
+        players1_ids = list(dict.fromkeys(str(pid) for pid in players1_ids))
+        players2_ids = list(dict.fromkeys(str(pid) for pid in players2_ids))
+
+        # Check for duplicate players between teams
+        if set(players1_ids) & set(players2_ids):
+            return False, "Cannot trade the same player ID between teams"
+
+        self._begin()
+        try:
+            team1 = self.conn.execute("SELECT * FROM teams WHERE name = ?", (team1_name,)).fetchone()
+            team2 = self.conn.execute("SELECT * FROM teams WHERE name = ?", (team2_name,)).fetchone()
+            if not team1 or not team2:
+                self.conn.execute("ROLLBACK")
+                return False, "One or both teams not found"
+
+            players1, missing = self._find_trade_rows(team1_name, players1_ids)
+            if players1 is None:
+                self.conn.execute("ROLLBACK")
+                return False, f"Player with ID {missing} not found in {team1_name}"
+            players2, missing = self._find_trade_rows(team2_name, players2_ids)
+            if players2 is None:
+                self.conn.execute("ROLLBACK")
+                return False, f"Player with ID {missing} not found in {team2_name}"
+
+            # Check if teams would exceed max_size after trade
+            size1 = self.conn.execute("SELECT COUNT(*) FROM players WHERE team_name = ?", (team1_name,)).fetchone()[0]
+            size2 = self.conn.execute("SELECT COUNT(*) FROM players WHERE team_name = ?", (team2_name,)).fetchone()[0]
+            team1_final_size = size1 - len(players1) + len(players2)
+            team2_final_size = size2 - len(players2) + len(players1)
+
+            if team1_final_size > team1['max_size']:
+                self.conn.execute("ROLLBACK")
+                return False, f"{team1_name} would exceed maximum roster size (would have {team1_final_size}/{team1['max_size']} players)"
+            if team2_final_size > team2['max_size']:
+                self.conn.execute("ROLLBACK")
+                return False, f"{team2_name} would exceed maximum roster size (would have {team2_final_size}/{team2['max_size']} players)"
+
+            # Move players to the end of their new rosters
+            next1 = self._next_position(team1_name)
+            next2 = self._next_position(team2_name)
+            self.conn.executemany(
+                "UPDATE players SET team_name = ?, position = ? WHERE rowid = ?",
+                [(team1_name, next1 + i, row['rowid']) for i, row in enumerate(players2)]
+                + [(team2_name, next2 + i, row['rowid']) for i, row in enumerate(players1)]
+            )
+
+            trade_record = {
+                "timestamp": datetime.now().isoformat(),
+                "team1": team1_name,
+                "team2": team2_name,
+                "players1": [{"id": p['player_id'], "name": p['name']} for p in players1],
+                "players2": [{"id": p['player_id'], "name": p['name']} for p in players2]
+            }
+            self._bump_versions(team1_name, team2_name)
+            self._insert_trade(trade_record)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True, "Trade executed successfully"
+
+    def get_league_stats(self, top=3, recent_days=7):
+        """Return the /league-stats numbers; see DataManager.get_league_stats.
+
+        Reads the running totals kept by the stats triggers, in one read
+        transaction so the numbers agree with each other.
+        """
+        since = (datetime.now().date() - timedelta(days=recent_days - 1)).isoformat()
+        self.conn.execute("BEGIN")
+        try:
+            counters = {row['name']: row['value'] for row in self.conn.execute("SELECT name, value FROM league_counters")}
+            recent_volume = self.conn.execute(
+                "SELECT COALESCE(SUM(trades), 0) FROM trade_days WHERE day >= ?", (since,)
+            ).fetchone()[0]
+            top_rows = self.conn.execute(
+                "SELECT r.team_name AS name, r.players, t.max_size "
+                "FROM roster_sizes r JOIN teams t ON t.name = r.team_name "
+                "ORDER BY r.players DESC LIMIT ?",
+                (top,)
+            ).fetchall()
+        finally:
+            self.conn.execute("COMMIT")
+        return {
+            "total_teams": counters.get('teams', 0),
+            "total_players": counters.get('players', 0),
+            "total_trades": counters.get('trades', 0),
+            "recent_volume": recent_volume,
+            "top_teams": [
+                {"name": r['name'], "players": r['players'], "max_size": r['max_size']}
+                for r in top_rows
+            ]
+        }
+
+    def get_trade_history(self, team_name=None, limit=10):
+        """Return the most recent `limit` trades, oldest first."""
+        return self.query_trades(team_name=team_name, limit=limit)
+
+    def _trade_filters(self, team_name, other_team, player_id, since, until):
+        clauses, params = [], []
+        if other_team == team_name:
+            other_team = None
+        # A pair filter means both teams took part in the trade
+        for name in (team_name, other_team):
+            if not name:
+                continue
+            clauses.append(
+                "(team1 = ? OR team2 = ? OR id IN (SELECT trade_id FROM trade_teams WHERE team_name = ?))"
+            )
+            params += [name] * 3
+        if player_id:
+            clauses.append("id IN (SELECT trade_id FROM trade_players WHERE player_id = ?)")
+            params.append(str(player_id))
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            # `until` is inclusive, so a bare date covers that whole day
+            clauses.append("timestamp <= ?")
+            params.append(until + '\x7f')
+        return clauses, params
+
+    @staticmethod
+    def _where(clauses):
+        return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    def query_trades(self, team_name=None, other_team=None, player_id=None,
+                     since=None, until=None, limit=10, offset=0):
+        """Search trade history; see DataManager.query_trades."""
+        clauses, params = self._trade_filters(team_name, other_team, player_id, since, until)
+        rows = self.conn.execute(
+            f"SELECT id, record FROM trades {self._where(clauses)} ORDER BY id DESC LIMIT ? OFFSET ?",
+            params + [max(0, limit), max(0, offset)]
+        ).fetchall()
+        return [json.loads(r['record']) for r in reversed(rows)]
+
+    def get_trade_page(self, team_name=None, other_team=None, player_id=None,
+                       since=None, until=None, limit=10, before=None, after=None):
+        """Return one page of trade history; see DataManager.get_trade_page.
+
+        Cursors are trade row ids.
+        """
+        clauses, params = self._trade_filters(team_name, other_team, player_id, since, until)
+        if after is not None:
+            rows = self.conn.execute(
+                f"SELECT id, record FROM trades {self._where(clauses + ['id > ?'])} ORDER BY id ASC LIMIT ?",
+                params + [after, max(0, limit)]
+            ).fetchall()
+        else:
+            page_clauses, page_params = clauses, params
+            if before is not None:
+                page_clauses, page_params = clauses + ['id < ?'], params + [before]
+            rows = self.conn.execute(
+                f"SELECT id, record FROM trades {self._where(page_clauses)} ORDER BY id DESC LIMIT ?",
+                page_params + [max(0, limit)]
+            ).fetchall()
+        rows = sorted(rows, key=lambda r: r['id'])
+        older = newer = None
+        if rows:
+            first, last = rows[0]['id'], rows[-1]['id']
+            if self.conn.execute(
+                f"SELECT 1 FROM trades {self._where(clauses + ['id < ?'])} LIMIT 1", params + [first]
+            ).fetchone():
+                older = first
+            if self.conn.execute(
+                f"SELECT 1 FROM trades {self._where(clauses + ['id > ?'])} LIMIT 1", params + [last]
+            ).fetchone():
+                newer = last
+        return {"trades": [json.loads(r['record']) for r in rows], "older": older, "newer": newer}
+
+
+if __name__ == '__main__':
+    # python -m utils.sqlite_store GUILD_ID: import that guild's JSON league
+    import sys
+    from utils.data_manager import guild_data_dir
+    data_dir = guild_data_dir(int(sys.argv[1]))
+    manager = SQLiteDataManager(data_dir=data_dir)
+    teams, trades = manager.import_from_json()
+    print(f"Imported {teams} team(s) and {trades} trade(s) into {manager.db_file}")
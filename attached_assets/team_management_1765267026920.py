@@ -1,18 +1,121 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.data_manager import DataManager
+from utils.autocomplete import player_choices, team_choices
+from utils.data_manager import create_async_data_manager
 from utils.validators import validate_team_name, validate_roster_size
-from typing import Optional
+from utils.render_cache import RenderCache
+from utils.roster_io import RosterFormatError, iter_roster_export, parse_roster, roster_format
+from typing import Literal, Optional
 import logging
 import asyncio
+import io
 
-logger = logging.getLogger('discord')
+logger = logging.getLogger('trade_bot.teams')
+
+MAX_ROSTER_UPLOAD = 2 * 1024 * 1024  # bytes
+MAX_MESSAGE_LENGTH = 2000  # Discord's limit for message content
 
 class TeamManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = DataManager()
+        self.leagues = create_async_data_manager()
+        self.render_cache = RenderCache()
+
+    async def _cached_embed(self, guild_id, ref, view, render):
+        """Return the embed for a guild's (team name, version) ref, rendering it only on a cache miss."""
+        if not ref:
+            return None
+        payload = self.render_cache.get((guild_id, *ref, view))
+        if payload is not None:
+            return discord.Embed.from_dict(payload)
+        team = await self.leagues.for_guild(guild_id).get_team_by_name(ref[0])
+        if not team:
+            return None
+        embed = render(team)
+        # Key by the version actually rendered, in case the team changed in between
+        self.render_cache.put((guild_id, team['name'], team.get('version', 0), view), embed.to_dict())
+        return embed
+
+    def _team_embed(self, team):
+        """Render /view-team for a team."""
+        embed = discord.Embed(
+            title=f"Team: {team['name']} 📋",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Owner",
+            value=f"<@{team['owner_id']}>",
+            inline=False
+        )
+        embed.add_field(
+            name="Roster Size",
+            value=f"{len(team['players'])}/{team['max_size']} players",
+            inline=True
+        )
+
+        if team['players']:
+            # Create a clean player list format
+            players_list = []
+            for i, player in enumerate(team['players'], 1):
+                players_list.append(f"{i}. {player['name']} (ID: {player['id']})")
+
+            # Split players into chunks if needed
+            chunk_size = 10  # Number of players per field
+            for i in range(0, len(players_list), chunk_size):
+                chunk = players_list[i:i + chunk_size]
+                embed.add_field(
+                    name=f"Players {i+1}-{min(i+chunk_size, len(players_list))}",
+                    value="\n".join(chunk),
+                    inline=False
+                )
+        else:
+            embed.add_field(
+                name="Players",
+                value="No players on the roster",
+                inline=False
+            )
+        return embed
+
+    def _players_embed(self, team):
+        """Render /list-players for a team."""
+        embed = discord.Embed(
+            title=f"Players in {team['name']} 📋",
+            description=f"Current roster size: {len(team['players'])}/{team['max_size']} players",
+            color=discord.Color.green()
+        )
+
+        if team['players']:
+            # Create a formatted player list with numbers
+            players_chunks = []
+            chunk_size = 15  # Players per field
+
+            for i in range(0, len(team['players']), chunk_size):
+                chunk = team['players'][i:i + chunk_size]
+                player_text = "\n".join([
+                    f"{i+j+1}. {player['name']} (ID: {player['id']})"
+                    for j, player in enumerate(chunk)
+                ])
+                players_chunks.append(player_text)
+
+            # Add chunks as separate fields to prevent hitting character limits
+            for i, chunk in enumerate(players_chunks):
+                start_num = i * chunk_size + 1
+                end_num = min((i + 1) * chunk_size, len(team['players']))
+                embed.add_field(
+                    name=f"Players {start_num}-{end_num}",
+                    value=chunk,
+                    inline=False
+                )
+        else:
+            embed.add_field(
+                name="Status",
+                value="This team has no players yet.",
+                inline=False
+            )
+
+        embed.set_footer(text="Use /add-player to add new players to the team")
+        return embed
 
     @app_commands.command(name="create-team", description="Create a new team")
     @app_commands.describe(
@@ -26,6 +129,7 @@ class TeamManagement(commands.Cog):
         max_size: int = 23
     ):
         try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
             # Defer response immediately to prevent timeout
             try:
                 await interaction.response.defer()
@@ -34,7 +138,7 @@ class TeamManagement(commands.Cog):
                 return
 
             try:
-                async with asyncio.timeout(5.0):  # 5 second timeout for team creation
+                async with asyncio.timeout(5.0) as deadline:  # 5 second timeout for team creation
                     if not validate_team_name(team_name):
                         await interaction.followup.send("Invalid team name. Must be 2-32 characters.", ephemeral=True)
                         return
@@ -50,7 +154,9 @@ class TeamManagement(commands.Cog):
                         "max_size": max_size
                     }
 
-                    success = self.data_manager.create_team(team_data)
+                    # A write can't be called back once it reaches the storage thread, so wait for its real outcome
+                    deadline.reschedule(None)
+                    success = await data_manager.create_team(team_data)
                     if success:
                         embed = discord.Embed(
                             title="Team Created Successfully ✅",
@@ -72,7 +178,7 @@ class TeamManagement(commands.Cog):
                 return
 
         except Exception as e:
-            logger.error(f"Error in create-team command: {str(e)}")
+            logger.error("Error in create-team command: %s", e)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -85,7 +191,7 @@ class TeamManagement(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
 
     @app_commands.command(name="add-player", description="Add a player to a team")
     @app_commands.describe(
@@ -101,6 +207,7 @@ class TeamManagement(commands.Cog):
         player_id: str
     ):
         try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
             # Defer response immediately to prevent timeout
             try:
                 await interaction.response.defer()
@@ -109,36 +216,41 @@ class TeamManagement(commands.Cog):
                 return
 
             try:
-                async with asyncio.timeout(5.0):  # 5 second timeout for player addition
-                    team = self.data_manager.get_team_by_name(team_name)
-                    if not team:
-                        await interaction.followup.send("Team not found!", ephemeral=True)
-                        return
-
-                    # Verify team ownership
-                    if team['owner_id'] != interaction.user.id:
-                        await interaction.followup.send("You can only add players to your own team!", ephemeral=True)
-                        return
-
-                    if not validate_roster_size(team):
-                        await interaction.followup.send(
-                            f"Maximum roster size reached ({team['max_size']} players).",
-                            ephemeral=True
-                        )
-                        return
-
-                    # Check if player_id is already in use
-                    if any(p['id'] == player_id for p in team['players']):
-                        await interaction.followup.send("A player with this ID already exists.", ephemeral=True)
-                        return
-
-                    player = {
-                        "name": player_name,
-                        "id": player_id
-                    }
-
-                    success = self.data_manager.add_player_to_team(team["name"], player)
-                    if success:
+                async with asyncio.timeout(5.0) as deadline:  # 5 second timeout for player addition
+                    user_id = interaction.user.id
+
+                    # Checks and the add run in one transaction so the roster
+                    # can't change between them
+                    def add_in_transaction(tx):
+                        team = tx.get_team(team_name)
+                        if not team:
+                            return None, "Team not found!"
+
+                        # Verify team ownership
+                        if team['owner_id'] != user_id:
+                            return None, "You can only add players to your own team!"
+
+                        if not validate_roster_size(team):
+                            return None, f"Maximum roster size reached ({team['max_size']} players)."
+
+                        # Check if player_id is already in use
+                        if tx.get_player(team_name, player_id):
+                            return None, "A player with this ID already exists."
+
+                        player = {
+                            "name": player_name,
+                            "id": player_id
+                        }
+                        if not tx.add_player(team_name, player):
+                            return None, "Failed to add player."
+                        return team, None
+
+                    # Wait for the write's real outcome rather than timing out on it
+                    deadline.reschedule(None)
+                    team, error = await data_manager.transaction(add_in_transaction, team_name)
+                    if error:
+                        await interaction.followup.send(error, ephemeral=True)
+                    else:
                         embed = discord.Embed(
                             title="Player Added Successfully ✅",
                             description=f"Added {player_name} to {team_name}!",
@@ -147,8 +259,6 @@ class TeamManagement(commands.Cog):
                         embed.add_field(name="Player ID", value=player_id)
                         embed.add_field(name="Team Size", value=f"{len(team['players']) + 1}/{team['max_size']}")
                         await interaction.followup.send(embed=embed)
-                    else:
-                        await interaction.followup.send("Failed to add player.", ephemeral=True)
 
             except asyncio.TimeoutError:
                 logger.error("Timeout while adding player")
@@ -159,7 +269,7 @@ class TeamManagement(commands.Cog):
                 return
 
         except Exception as e:
-            logger.error(f"Error in add-player command: {str(e)}")
+            logger.error("Error in add-player command: %s", e)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -172,7 +282,7 @@ class TeamManagement(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
 
     @app_commands.command(name="view-team", description="View team information")
     @app_commands.describe(team_name="Enter team name (optional)")
@@ -182,6 +292,7 @@ class TeamManagement(commands.Cog):
         team_name: Optional[str] = None
     ):
         try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
             # Defer response immediately to prevent timeout
             try:
                 await interaction.response.defer()
@@ -192,51 +303,15 @@ class TeamManagement(commands.Cog):
             try:
                 async with asyncio.timeout(5.0):  # 5 second timeout for team view
                     if team_name:
-                        team = self.data_manager.get_team_by_name(team_name)
+                        ref = await data_manager.get_team_version(team_name=team_name)
                     else:
-                        team = self.data_manager.get_team_by_owner(interaction.user.id)
+                        ref = await data_manager.get_team_version(owner_id=interaction.user.id)
 
-                    if not team:
+                    embed = await self._cached_embed(interaction.guild_id, ref, 'view-team', self._team_embed)
+                    if not embed:
                         await interaction.followup.send("Team not found!", ephemeral=True)
                         return
 
-                    embed = discord.Embed(
-                        title=f"Team: {team['name']} 📋",
-                        color=discord.Color.blue()
-                    )
-                    embed.add_field(
-                        name="Owner",
-                        value=f"<@{team['owner_id']}>",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="Roster Size",
-                        value=f"{len(team['players'])}/{team['max_size']} players",
-                        inline=True
-                    )
-
-                    if team['players']:
-                        # Create a clean player list format
-                        players_list = []
-                        for i, player in enumerate(team['players'], 1):
-                            players_list.append(f"{i}. {player['name']} (ID: {player['id']})")
-                        
-                        # Split players into chunks if needed
-                        chunk_size = 10  # Number of players per field
-                        for i in range(0, len(players_list), chunk_size):
-                            chunk = players_list[i:i + chunk_size]
-                            embed.add_field(
-                                name=f"Players {i+1}-{min(i+chunk_size, len(players_list))}",
-                                value="\n".join(chunk),
-                                inline=False
-                            )
-                    else:
-                        embed.add_field(
-                            name="Players",
-                            value="No players on the roster",
-                            inline=False
-                        )
-
                     await interaction.followup.send(embed=embed)
 
             except asyncio.TimeoutError:
@@ -248,7 +323,7 @@ class TeamManagement(commands.Cog):
                 return
 
         except Exception as e:
-            logger.error(f"Error in view-team command: {str(e)}")
+            logger.error("Error in view-team command: %s", e)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -261,7 +336,7 @@ class TeamManagement(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
 
     @app_commands.command(
         name="remove-player",
@@ -288,6 +363,7 @@ class TeamManagement(commands.Cog):
             The unique ID of the player to remove
         """
         try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
             # Defer response immediately to prevent timeout
             try:
                 await interaction.response.defer()
@@ -296,41 +372,36 @@ class TeamManagement(commands.Cog):
                 return
 
             try:
-                async with asyncio.timeout(5.0):  # 5 second timeout for player removal
-                    logger.info(f"Remove player request - User: {interaction.user.id}, Team: {team_name}, Player ID: {player_id}")
+                async with asyncio.timeout(5.0) as deadline:  # 5 second timeout for player removal
+                    logger.info("Remove player request - User: %s, Team: %s, Player ID: %s", interaction.user.id, team_name, player_id)
                     
-                    # Get team and verify ownership
-                    team = self.data_manager.get_team_by_name(team_name)
-                    if not team:
-                        logger.warning(f"Team not found: {team_name}")
-                        await interaction.followup.send(
-                            "❌ Team not found! Please check the team name and try again.",
-                            ephemeral=True
-                        )
-                        return
-
-                    if team['owner_id'] != interaction.user.id:
-                        logger.warning(f"Unauthorized remove attempt - User: {interaction.user.id}, Team: {team_name}")
-                        await interaction.followup.send(
-                            "❌ You must be the team owner to remove players!",
-                            ephemeral=True
-                        )
-                        return
-
-                    # Find player in team
-                    player = next((p for p in team['players'] if str(p['id']) == player_id), None)
-                    if not player:
-                        logger.warning(f"Player not found - Team: {team_name}, Player ID: {player_id}")
-                        await interaction.followup.send(
-                            f"❌ Player with ID '{player_id}' not found in your team!",
-                            ephemeral=True
-                        )
+                    user_id = interaction.user.id
+
+                    # Ownership check and removal share one transaction
+                    def remove_in_transaction(tx):
+                        team = tx.get_team(team_name)
+                        if not team:
+                            logger.warning("Team not found: %s", team_name)
+                            return None, None, "❌ Team not found! Please check the team name and try again."
+
+                        if team['owner_id'] != user_id:
+                            logger.warning("Unauthorized remove attempt - User: %s, Team: %s", user_id, team_name)
+                            return None, None, "❌ You must be the team owner to remove players!"
+
+                        # Remove player from team
+                        player = tx.remove_player(team_name, player_id)
+                        if not player:
+                            logger.warning("Player not found - Team: %s, Player ID: %s", team_name, player_id)
+                            return None, None, f"❌ Player with ID '{player_id}' not found in your team!"
+                        return tx.get_team(team_name), player, None
+
+                    # Wait for the write's real outcome rather than timing out on it
+                    deadline.reschedule(None)
+                    team, player, error = await data_manager.transaction(remove_in_transaction, team_name)
+                    if error:
+                        await interaction.followup.send(error, ephemeral=True)
                         return
-
-                    # Remove player from team
-                    team['players'].remove(player)
-                    self.data_manager.save_team(team)
-                    logger.info(f"Player removed successfully - Team: {team_name}, Player: {player['name']} (ID: {player_id})")
+                    logger.info("Player removed successfully - Team: %s, Player: %s (ID: %s)", team_name, player['name'], player_id)
 
                     # Create success embed
                     embed = discord.Embed(
@@ -359,7 +430,7 @@ class TeamManagement(commands.Cog):
                 return
 
         except Exception as e:
-            logger.error(f"Error in remove_player: {str(e)}", exc_info=True)
+            logger.error("Error in remove_player: %s", e, exc_info=True)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -372,7 +443,7 @@ class TeamManagement(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
 
 
     @app_commands.command(name="list-players", description="List all players in a team")
@@ -383,6 +454,7 @@ class TeamManagement(commands.Cog):
         team_name: Optional[str] = None
     ):
         try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
             # Defer response immediately to prevent timeout
             try:
                 await interaction.response.defer()
@@ -392,65 +464,265 @@ class TeamManagement(commands.Cog):
 
             try:
                 async with asyncio.timeout(5.0):  # 5 second timeout for listing players
-                    team = None
-
                     if team_name:
-                        team = self.data_manager.get_team_by_name(team_name)
+                        ref = await data_manager.get_team_version(team_name=team_name)
                     else:
-                        team = self.data_manager.get_team_by_owner(interaction.user.id)
+                        ref = await data_manager.get_team_version(owner_id=interaction.user.id)
+
+                    embed = await self._cached_embed(interaction.guild_id, ref, 'list-players', self._players_embed)
+                    if not embed:
+                        await interaction.followup.send("Team not found!", ephemeral=True)
+                        return
 
+                    await interaction.followup.send(embed=embed)
+
+            except asyncio.TimeoutError:
+                logger.error("Timeout while listing players")
+                await interaction.followup.send(
+                    "The player listing process timed out. Please try again.",
+                    ephemeral=True
+                )
+                return
+
+        except Exception as e:
+            logger.error("Error in list-players command: %s", e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+            except (discord.InteractionResponded, discord.HTTPException) as send_error:
+                logger.error("Failed to send error message: %s", send_error)
+
+
+    @app_commands.command(name="find-player", description="Search every team for a player by name or ID")
+    @app_commands.describe(
+        query="Part of the player's name or ID; spelling doesn't have to be exact",
+        limit="Number of matches to show (default: 10, max: 25)"
+    )
+    async def find_player(
+        self,
+        interaction: discord.Interaction,
+        query: str,
+        limit: int = 10
+    ):
+        try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
+            # Defer response immediately to prevent timeout
+            try:
+                await interaction.response.defer()
+            except discord.InteractionResponded:
+                logger.warning("Interaction already responded to during defer in find-player")
+                return
+
+            try:
+                async with asyncio.timeout(5.0):  # 5 second timeout for player search
+                    matches = await data_manager.find_players(query, min(max(1, limit), 25))
+                    if not matches:
+                        await interaction.followup.send(f"No players found matching '{query}'.", ephemeral=True)
+                        return
+
+                    embed = discord.Embed(
+                        title="Player Search 🔎",
+                        description="\n".join(
+                            f"{i}. **{m['name']}** (ID: {m['id']}) - {m['team']} · {m['score']:.0%} match"
+                            for i, m in enumerate(matches, 1)
+                        ),
+                        color=discord.Color.blue()
+                    )
+                    embed.set_footer(text=f"Best matches for '{query}'")
+                    await interaction.followup.send(embed=embed)
+
+            except asyncio.TimeoutError:
+                logger.error("Timeout while searching players")
+                await interaction.followup.send(
+                    "The player search timed out. Please try again.",
+                    ephemeral=True
+                )
+                return
+
+        except Exception as e:
+            logger.error("Error in find-player command: %s", e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+            except (discord.InteractionResponded, discord.HTTPException) as send_error:
+                logger.error("Failed to send error message: %s", send_error)
+
+    @app_commands.command(name="import-roster", description="Add players to your team from a CSV or JSON file")
+    @app_commands.describe(
+        team_name="The name of the team you own",
+        roster_file="CSV with name,id columns or JSON list of {name, id} players"
+    )
+    async def import_roster(
+        self,
+        interaction: discord.Interaction,
+        team_name: str,
+        roster_file: discord.Attachment
+    ):
+        try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
+            # Defer response immediately to prevent timeout
+            try:
+                await interaction.response.defer()
+            except discord.InteractionResponded:
+                logger.warning("Interaction already responded to during defer in import-roster")
+                return
+
+            fmt = roster_format(roster_file.filename)
+            if not fmt:
+                await interaction.followup.send("Roster file must be a .csv or .json file.", ephemeral=True)
+                return
+            if roster_file.size > MAX_ROSTER_UPLOAD:
+                await interaction.followup.send(
+                    f"Roster file is too large (max {MAX_ROSTER_UPLOAD // 1024 // 1024} MB).",
+                    ephemeral=True
+                )
+                return
+
+            try:
+                async with asyncio.timeout(15.0) as deadline:  # Large rosters take longer to download and check
+                    team = await data_manager.get_team_by_name(team_name)
                     if not team:
                         await interaction.followup.send("Team not found!", ephemeral=True)
                         return
 
+                    # Verify team ownership
+                    if team['owner_id'] != interaction.user.id:
+                        await interaction.followup.send("You can only import players to your own team!", ephemeral=True)
+                        return
+
+                    raw = await roster_file.read()
+                    try:
+                        # Up to 2 MB of CSV/JSON; parse it off the event loop
+                        players, errors = await asyncio.to_thread(
+                            parse_roster,
+                            raw, fmt,
+                            existing_ids={player['id'] for player in team['players']},
+                            capacity=team['max_size'] - len(team['players'])
+                        )
+                    except RosterFormatError as e:
+                        await interaction.followup.send(f"Could not import roster: {e}", ephemeral=True)
+                        return
+
+                    if errors:
+                        # Ids have no length limit, so the report can outgrow a message
+                        report = "Nothing was imported. Fix these rows and try again:\n" + "\n".join(errors)
+                        if len(report) > MAX_MESSAGE_LENGTH:
+                            report = report[:MAX_MESSAGE_LENGTH - 1] + "…"
+                        await interaction.followup.send(report, ephemeral=True)
+                        return
+                    if not players:
+                        await interaction.followup.send("The roster file has no players.", ephemeral=True)
+                        return
+
+                    # Wait for the write's real outcome rather than timing out on it
+                    deadline.reschedule(None)
+                    success, message = await data_manager.add_players_to_team(team['name'], players)
+                    if not success:
+                        await interaction.followup.send(f"Import failed: {message}", ephemeral=True)
+                        return
+
                     embed = discord.Embed(
-                        title=f"Players in {team['name']} 📋",
-                        description=f"Current roster size: {len(team['players'])}/{team['max_size']} players",
+                        title="Roster Imported ✅",
+                        description=message,
                         color=discord.Color.green()
                     )
+                    embed.add_field(
+                        name="Team Size",
+                        value=f"{len(team['players']) + len(players)}/{team['max_size']}"
+                    )
+                    await interaction.followup.send(embed=embed)
+                    logger.info("Imported %s players into %s", len(players), team['name'])
+
+            except asyncio.TimeoutError:
+                logger.error("Timeout while importing roster")
+                await interaction.followup.send(
+                    "The roster import timed out. Please try again.",
+                    ephemeral=True
+                )
+                return
+
+        except Exception as e:
+            logger.error("Error in import-roster command: %s", e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An unexpected error occurred. Please try again later.",
+                        ephemeral=True
+                    )
+            except (discord.InteractionResponded, discord.HTTPException) as send_error:
+                logger.error("Failed to send error message: %s", send_error)
 
-                    if team['players']:
-                        # Create a formatted player list with numbers
-                        players_chunks = []
-                        chunk_size = 15  # Players per field
-                        
-                        for i in range(0, len(team['players']), chunk_size):
-                            chunk = team['players'][i:i + chunk_size]
-                            player_text = "\n".join([
-                                f"{i+j+1}. {player['name']} (ID: {player['id']})"
-                                for j, player in enumerate(chunk)
-                            ])
-                            players_chunks.append(player_text)
-
-                        # Add chunks as separate fields to prevent hitting character limits
-                        for i, chunk in enumerate(players_chunks):
-                            start_num = i * chunk_size + 1
-                            end_num = min((i + 1) * chunk_size, len(team['players']))
-                            embed.add_field(
-                                name=f"Players {start_num}-{end_num}",
-                                value=chunk,
-                                inline=False
-                            )
+    @app_commands.command(name="export-roster", description="Download a team's roster as a CSV or JSON file")
+    @app_commands.describe(
+        team_name="Enter team name (optional)",
+        file_format="File format (default: csv)"
+    )
+    async def export_roster(
+        self,
+        interaction: discord.Interaction,
+        team_name: Optional[str] = None,
+        file_format: Literal['csv', 'json'] = 'csv'
+    ):
+        try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
+            # Defer response immediately to prevent timeout
+            try:
+                await interaction.response.defer()
+            except discord.InteractionResponded:
+                logger.warning("Interaction already responded to during defer in export-roster")
+                return
+
+            try:
+                async with asyncio.timeout(5.0):  # 5 second timeout for roster export
+                    if team_name:
+                        team = await data_manager.get_team_by_name(team_name)
                     else:
-                        embed.add_field(
-                            name="Status",
-                            value="This team has no players yet.",
-                            inline=False
-                        )
+                        team = await data_manager.get_team_by_owner(interaction.user.id)
 
-                    embed.set_footer(text="Use /add-player to add new players to the team")
-                    await interaction.followup.send(embed=embed)
+                    if not team:
+                        await interaction.followup.send("Team not found!", ephemeral=True)
+                        return
+
+                    buffer = io.BytesIO()
+                    for chunk in iter_roster_export(team, file_format):
+                        buffer.write(chunk)
+                    buffer.seek(0)
+                    await interaction.followup.send(
+                        f"Roster for **{team['name']}** ({len(team['players'])}/{team['max_size']} players)",
+                        file=discord.File(buffer, filename=f"{team['name']}_roster.{file_format}")
+                    )
 
             except asyncio.TimeoutError:
-                logger.error("Timeout while listing players")
+                logger.error("Timeout while exporting roster")
                 await interaction.followup.send(
-                    "The player listing process timed out. Please try again.",
+                    "The roster export timed out. Please try again.",
                     ephemeral=True
                 )
                 return
 
         except Exception as e:
-            logger.error(f"Error in list-players command: {str(e)}")
+            logger.error("Error in export-roster command: %s", e)
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(
@@ -463,7 +735,24 @@ class TeamManagement(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
+
+
+    @add_player.autocomplete('team_name')
+    @view_team.autocomplete('team_name')
+    @remove_player.autocomplete('team_name')
+    @list_players.autocomplete('team_name')
+    @import_roster.autocomplete('team_name')
+    @export_roster.autocomplete('team_name')
+    async def team_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await team_choices(self.leagues.for_guild(interaction.guild_id), current)
+
+    @remove_player.autocomplete('player_id')
+    async def player_id_autocomplete(self, interaction: discord.Interaction, current: str):
+        team_name = interaction.namespace.team_name
+        if not team_name:
+            return []
+        return await player_choices(self.leagues.for_guild(interaction.guild_id), team_name, current)
 
 
 async def setup(bot):
@@ -0,0 +1,203 @@
+import os
+import threading
+from itertools import combinations
+from bisect import bisect_left, bisect_right
+
+from utils.league_stats import TradeStats
+from utils.serializers import loads_line
+
+
+def trade_player_ids(trade):
+    """All player ids moved by a trade, in any of the recorded formats."""
+    players = trade.get('players1', []) + trade.get('players2', []) + trade.get('moves', [])
+    for key in ('player1', 'player2'):
+        if key in trade:
+            players.append(trade[key])
+    return [str(p['id']) for p in players]
+
+
+def trade_teams(trade):
+    """Every team in a trade: the "teams" list of an N-team trade, else team1/team2."""
+    return list(dict.fromkeys(trade.get('teams') or (trade['team1'], trade['team2'])))
+
+
+class TradeIndex:
+    """Secondary indexes over the append-only trade log.
+
+    Each trade gets a sequence number (its line number). Posting lists map
+    team, player id and team pair to ascending sequence numbers; byte
+    offsets let a query read back only the trades it returns. refresh()
+    indexes lines appended since the last call, so upkeep tracks new
+    trades and queries never scan the whole history.
+    """
+
+    def __init__(self, history_file):
+        self.history_file = history_file
+        self.stats = TradeStats()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.positions = []  # seq -> (byte offset, length) of its line
+        self.timestamps = []  # seq -> ISO timestamp
+        self.timestamps_sorted = True
+        self.by_team = {}
+        self.by_player = {}
+        self.by_pair = {}
+        self.stats.reset()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def refresh(self):
+        with self._lock:
+            try:
+                size = os.path.getsize(self.history_file)
+            except FileNotFoundError:
+                size = 0
+            if size < self.offset:
+                # The log was replaced or cut back; index it again from scratch
+                self._reset()
+            if size == self.offset:
+                return
+            with open(self.history_file, 'rb') as f:
+                f.seek(self.offset)
+                chunk = f.read(size - self.offset)
+            # Leave a partially written last line for the next refresh
+            end = chunk.rfind(b'\n') + 1
+            position = self.offset
+            for line in chunk[:end].splitlines(keepends=True):
+                if line.strip():
+                    self._add(position, len(line), loads_line(line))
+                position += len(line)
+            self.offset += end
+
+    def _add(self, position, length, trade):
+        seq = len(self.positions)
+        self.positions.append((position, length))
+        timestamp = trade['timestamp']
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self.timestamps_sorted = False
+        self.timestamps.append(timestamp)
+        teams = trade_teams(trade)
+        for team_name in teams:
+            self.by_team.setdefault(team_name, []).append(seq)
+        pairs = combinations(sorted(teams), 2) if len(teams) > 1 else [(teams[0], teams[0])]
+        for pair in pairs:
+            self.by_pair.setdefault(pair, []).append(seq)
+        for player_id in dict.fromkeys(trade_player_ids(trade)):
+            self.by_player.setdefault(player_id, []).append(seq)
+        self.stats.record_trade(trade)
+
+    def _matching(self, team_name, other_team, player_id, since, until,
+                  before=None, after=None, ascending=False):
+        """Yield matching sequence numbers, newest first unless ascending.
+
+        before/after are exclusive sequence-number bounds (page cursors).
+        """
+        postings = []
+        if other_team == team_name:
+            other_team = None
+        if team_name and other_team:
+            postings.append(self.by_pair.get(tuple(sorted((team_name, other_team))), []))
+        elif team_name or other_team:
+            postings.append(self.by_team.get(team_name or other_team, []))
+        if player_id:
+            postings.append(self.by_player.get(str(player_id), []))
+
+        if postings:
+            postings.sort(key=len)
+            driver, others = postings[0], postings[1:]
+        else:
+            driver, others = range(len(self.positions)), []
+
+        lo, hi = 0, len(driver)
+        if self.timestamps_sorted:
+            # `until` is inclusive, so a bare date covers that whole day
+            if since:
+                lo = bisect_left(driver, since, key=self.timestamps.__getitem__)
+            if until:
+                hi = bisect_right(driver, until + '\x7f', key=self.timestamps.__getitem__)
+        if before is not None:
+            hi = min(hi, bisect_left(driver, before))
+        if after is not None:
+            lo = max(lo, bisect_right(driver, after))
+
+        steps = range(lo, hi) if ascending else range(hi - 1, lo - 1, -1)
+        for i in steps:
+            seq = driver[i]
+            if not self.timestamps_sorted:
+                timestamp = self.timestamps[seq]
+                if (since and timestamp < since) or (until and timestamp > until + '\x7f'):
+                    continue
+            if all(self._contains(other, seq) for other in others):
+                yield seq
+
+    @staticmethod
+    def _contains(postings, seq):
+        i = bisect_left(postings, seq)
+        return i < len(postings) and postings[i] == seq
+
+    def query(self, team_name=None, other_team=None, player_id=None,
+              since=None, until=None, limit=10, offset=0):
+        """Return matching trades, skipping the `offset` newest, oldest first.
+
+        Filters combine: team_name and other_team restrict to trades
+        between those teams, player_id to trades that moved that player,
+        since/until to an ISO date or timestamp range (until inclusive).
+        """
+        self.refresh()
+        with self._lock:
+            seqs = []
+            if limit > 0:
+                for n, seq in enumerate(self._matching(team_name, other_team, player_id, since, until)):
+                    if n < offset:
+                        continue
+                    seqs.append(seq)
+                    if len(seqs) >= limit:
+                        break
+            positions = [self.positions[seq] for seq in reversed(seqs)]
+        return self._read(positions)
+
+    def page(self, team_name=None, other_team=None, player_id=None,
+             since=None, until=None, limit=10, before=None, after=None):
+        """Return one page of matching trades plus cursors to its neighbours.
+
+        With no cursor this is the newest page. `before` pages back to
+        older trades, `after` forward to newer ones. The result is
+        {"trades": [...] oldest first, "older": cursor or None,
+        "newer": cursor or None}; pass a cursor back as `before`/`after`.
+        """
+        self.refresh()
+        filters = (team_name, other_team, player_id, since, until)
+        with self._lock:
+            seqs = []
+            if limit > 0:
+                if after is not None:
+                    matches = self._matching(*filters, after=after, ascending=True)
+                else:
+                    matches = self._matching(*filters, before=before)
+                for seq in matches:
+                    seqs.append(seq)
+                    if len(seqs) >= limit:
+                        break
+            seqs.sort()
+            older = newer = None
+            if seqs:
+                if next(self._matching(*filters, before=seqs[0]), None) is not None:
+                    older = seqs[0]
+                if next(self._matching(*filters, after=seqs[-1], ascending=True), None) is not None:
+                    newer = seqs[-1]
+            positions = [self.positions[seq] for seq in seqs]
+        return {"trades": self._read(positions), "older": older, "newer": newer}
+
+    def _read(self, positions):
+        trades = []
+        if not positions:
+            return trades
+        with open(self.history_file, 'rb') as f:
+            for position, length in positions:
+                f.seek(position)
+                trades.append(loads_line(f.read(length)))
+        return trades
@@ -1,23 +1,480 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.data_manager import DataManager
+from utils.autocomplete import player_choices, player_list_choices, team_choices
+from utils.data_manager import create_async_data_manager
+from utils.proposals import ProposalStore
 from typing import Optional
+from datetime import datetime, timezone
 import logging
 import asyncio
+import os
 
-logger = logging.getLogger('discord')
+logger = logging.getLogger('trade_bot.trading')
 
 logger.info("Trading cog initialized.")
 
+# Discord rejects embeds with more than 25 fields, 1024 characters in a
+# field value or 6000 characters overall.
+MAX_TRADES_PER_PAGE = 10
+MAX_FIELD_VALUE = 1024
+MAX_EMBED_LENGTH = 6000
+
+# How long a /propose-trade offer stays open, and how many a team may have at once
+PROPOSAL_TTL = int(os.getenv('TRADE_PROPOSAL_TTL_MINUTES', '1440')) * 60
+MAX_OPEN_PROPOSALS_PER_TEAM = 25
+# Reply to a button click on a proposal another click already closed
+ALREADY_HANDLED = "This trade proposal has already been handled."
+
+
+def trade_history_embed(trades, description):
+    """Render one page of trades, keeping the embed within Discord's limits."""
+    embed = discord.Embed(
+        title="Trade History",
+        description=description,
+        color=discord.Color.blue()
+    )
+    # Split what is left of the embed budget evenly between the trades
+    budget = (MAX_EMBED_LENGTH - len(embed) - 100) // max(1, len(trades))
+    for trade in trades:
+        trade_time = discord.utils.format_dt(discord.utils.parse_time(trade["timestamp"]), style='R')
+        status_emoji = "✅"  # Completed trade indicator
+
+        if 'moves' in trade:
+            # N-team trade: list what each team sent and where it went
+            sections = []
+            for team_name in trade['teams']:
+                sent = "\n• ".join(
+                    f"{m['name']} (ID: {m['id']}) → {m['to']}" for m in trade['moves'] if m['from'] == team_name
+                )
+                if sent:
+                    sections.append(f"**{team_name}** traded:\n• {sent}")
+            trade_desc = f"{status_emoji} Trade Summary ({len(trade['teams'])} teams):\n\n" + "\n\n".join(sections)
+        else:
+            # Handle both single-player and multi-player trade formats
+            players1 = trade.get('players1') or ([trade['player1']] if 'player1' in trade else [])
+            players2 = trade.get('players2') or ([trade['player2']] if 'player2' in trade else [])
+            players1_text = "\n• ".join([f"{p['name']} (ID: {p['id']})" for p in players1])
+            players2_text = "\n• ".join([f"{p['name']} (ID: {p['id']})" for p in players2])
+            trade_desc = (
+                f"{status_emoji} Trade Summary:\n\n"
+                f"**{trade['team1']}** traded:\n• {players1_text}\n\n"
+                f"**{trade['team2']}** traded:\n• {players2_text}"
+            )
+        limit = min(MAX_FIELD_VALUE, budget - len(f"Trade {trade_time}"))
+        if len(trade_desc) > limit:
+            trade_desc = trade_desc[:limit - 1] + "…"
+        embed.add_field(name=f"Trade {trade_time}", value=trade_desc, inline=False)
+    return embed
+
+
+def parse_moves(text):
+    """Parse 'from_team:player_id>to_team; ...' into (player_id, from_team, to_team) tuples.
+
+    Returns (moves, error); error is a message for the user or None.
+    """
+    moves = []
+    for part in text.replace('\n', ';').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        source, arrow, to_team = part.rpartition('>')
+        from_team, colon, player_id = source.rpartition(':')
+        if not arrow or not colon or not from_team.strip() or not player_id.strip() or not to_team.strip():
+            return None, f"Couldn't read '{part}'. Use from_team:player_id>to_team."
+        moves.append((player_id.strip(), from_team.strip(), to_team.strip()))
+    if not moves:
+        return None, "List at least one move as from_team:player_id>to_team."
+    return moves, None
+
+
+class TradeProposalView(discord.ui.View):
+    """Accept/Reject buttons on a pending /propose-trade or /propose-multi-trade offer.
+
+    The buttons only carry the proposal id; the Trading cog owns the
+    proposal and decides who may press what.
+    """
+
+    def __init__(self, cog, proposal_id):
+        super().__init__(timeout=None)
+        self.cog = cog
+        self.proposal_id = proposal_id
+
+    @discord.ui.button(label="Accept", style=discord.ButtonStyle.success)
+    async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.accept_proposal(interaction, self.proposal_id)
+
+    @discord.ui.button(label="Reject", style=discord.ButtonStyle.danger)
+    async def reject_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.reject_proposal(interaction, self.proposal_id)
+
+
+class TradeHistoryView(discord.ui.View):
+    """Older/Newer buttons for /trade-history.
+
+    Holds only the filters and the cursors around the page on screen;
+    each click fetches just the next page from the data manager.
+    """
+
+    def __init__(self, data_manager, user_id, filters, description, page, page_size):
+        super().__init__(timeout=180)
+        self.data_manager = data_manager
+        self.user_id = user_id
+        self.filters = filters
+        self.description = description
+        self.page_size = page_size
+        self.message = None
+        self._set_cursors(page)
+
+    def _set_cursors(self, page):
+        self.older = page["older"]
+        self.newer = page["newer"]
+        self.older_button.disabled = self.older is None
+        self.newer_button.disabled = self.newer is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(
+                "Only the person who ran this command can page through it.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    async def _show(self, interaction, **cursor):
+        try:
+            async with asyncio.timeout(5.0):
+                page = await self.data_manager.get_trade_page(
+                    limit=self.page_size, **self.filters, **cursor
+                )
+            if not page["trades"]:
+                # History changed under us; go back to the newest page
+                page = await self.data_manager.get_trade_page(limit=self.page_size, **self.filters)
+            self._set_cursors(page)
+            await interaction.response.edit_message(
+                embed=trade_history_embed(page["trades"], self.description),
+                view=self
+            )
+        except Exception as e:
+            logger.error("Error paging trade history: %s", e)
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An error occurred while fetching trade history.",
+                    ephemeral=True
+                )
+
+    @discord.ui.button(label="◀ Older", style=discord.ButtonStyle.secondary)
+    async def older_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, before=self.older)
+
+    @discord.ui.button(label="Newer ▶", style=discord.ButtonStyle.secondary)
+    async def newer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, after=self.newer)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
 class Trading(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = DataManager()
+        self.leagues = create_async_data_manager()
+        self.proposals = ProposalStore()
+        self._proposal_wakeup = asyncio.Event()
+        self._expiry_task = None
+
+    async def cog_load(self):
+        self._expiry_task = asyncio.create_task(self._expire_proposals())
+
+    async def cog_unload(self):
+        if self._expiry_task:
+            self._expiry_task.cancel()
+
+    async def _expire_proposals(self):
+        """Single timer for every open proposal: sleep until the earliest
+        expiry (or until a new proposal wakes us), then close what is due."""
+        while True:
+            try:
+                self._proposal_wakeup.clear()
+                delay = self.proposals.seconds_until_next_expiry()
+                try:
+                    await asyncio.wait_for(self._proposal_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                for proposal in self.proposals.pop_expired():
+                    logger.info("Trade proposal %s expired", proposal['id'])
+                    await self._close_proposal_message(proposal, "⌛ This trade proposal expired.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error expiring trade proposals: %s", e)
+                await asyncio.sleep(5)
+
+    def _proposal_embed(self, proposal, title, color, status=None):
+        if 'moves' in proposal:
+            return self._multi_proposal_embed(proposal, title, color, status)
+        embed = discord.Embed(
+            title=title,
+            description=status or (
+                f"**{proposal['proposer_team']}** offers a trade to **{proposal['target_team']}**.\n"
+                f"Expires {discord.utils.format_dt(datetime.fromtimestamp(proposal['expires_at'], timezone.utc), style='R')}"
+            ),
+            color=color
+        )
+        embed.add_field(
+            name=f"{proposal['proposer_team']} Sends ({len(proposal['offer_players'])} players)",
+            value="\n".join(f"📤 {p['name']} (ID: {p['id']})" for p in proposal['offer_players']) or "No players",
+            inline=False
+        )
+        embed.add_field(
+            name=f"{proposal['target_team']} Sends ({len(proposal['request_players'])} players)",
+            value="\n".join(f"📥 {p['name']} (ID: {p['id']})" for p in proposal['request_players']) or "No players",
+            inline=False
+        )
+        embed.set_footer(text=f"Proposal #{proposal['id']}")
+        return embed
+
+    def _multi_proposal_embed(self, proposal, title, color, status=None):
+        expires = discord.utils.format_dt(datetime.fromtimestamp(proposal['expires_at'], timezone.utc), style='R')
+        embed = discord.Embed(
+            title=title,
+            description=status or (
+                f"**{proposal['proposer_team']}** proposes a trade between "
+                f"{', '.join(f'**{name}**' for name in proposal['teams'])}.\n"
+                f"Waiting for: {', '.join(proposal['awaiting'])}\n"
+                f"Expires {expires}"
+            ),
+            color=color
+        )
+        names = proposal.get('player_names', {})
+        for team_name in proposal['teams']:
+            sent = "\n".join(
+                f"📤 {names.get(pid, pid)} (ID: {pid}) → {to_team}"
+                for pid, from_team, to_team in proposal['moves'] if from_team == team_name
+            )
+            if sent:
+                if len(sent) > MAX_FIELD_VALUE:
+                    sent = sent[:MAX_FIELD_VALUE - 1] + "…"
+                embed.add_field(name=f"{team_name} Sends", value=sent, inline=False)
+        embed.set_footer(text=f"Proposal #{proposal['id']}")
+        return embed
+
+    async def _close_proposal_message(self, proposal, status):
+        """Replace a closed proposal's buttons with a final status."""
+        channel = self.bot.get_channel(proposal.get('channel_id'))
+        if channel is None:
+            return
+        try:
+            await channel.get_partial_message(proposal['message_id']).edit(
+                embed=self._proposal_embed(proposal, "Trade Proposal Closed", discord.Color.light_grey(), status),
+                view=None
+            )
+        except discord.HTTPException as e:
+            logger.warning("Could not update trade proposal %s message: %s", proposal['id'], e)
+
+    async def _invalidate_moved_players(self, guild_id, moved):
+        """Close open proposals that reference players who just changed teams.
+
+        moved is a list of (team the players left, their ids) in guild_id's league.
+        """
+        for team_name, player_ids in moved:
+            for proposal in self.proposals.invalidate_players(guild_id, team_name, player_ids):
+                logger.info("Trade proposal %s cancelled: players left %s", proposal['id'], team_name)
+                await self._close_proposal_message(
+                    proposal, "❌ Cancelled: a player in this trade has changed teams."
+                )
+
+    async def accept_proposal(self, interaction: discord.Interaction, proposal_id):
+        try:
+            proposal = self.proposals.get(proposal_id)
+            if not proposal:
+                await interaction.response.send_message("This trade proposal is no longer open.", ephemeral=True)
+                return
+            if 'moves' in proposal:
+                await self._accept_multi_proposal(interaction, proposal)
+                return
+            data_manager = self.leagues.for_guild(proposal['guild_id'])
+
+            target_team = await data_manager.get_team_by_name(proposal['target_team'])
+            if not target_team or target_team['owner_id'] != interaction.user.id:
+                await interaction.response.send_message(
+                    f"Only the owner of {proposal['target_team']} can accept this trade.",
+                    ephemeral=True
+                )
+                return
+
+            # Claim the proposal before the next await; a second click that got
+            # this far while we awaited finds it gone and stops here
+            if self.proposals.remove(proposal_id) is None:
+                await interaction.response.send_message(ALREADY_HANDLED, ephemeral=True)
+                return
+            await interaction.response.defer()
+
+            # execute_propose_trade re-checks both rosters as they are now
+            success, message = await data_manager.execute_propose_trade(
+                proposal['proposer_team'],
+                proposal['target_team'],
+                proposal['offer_ids'],
+                proposal['request_ids']
+            )
+            if not success:
+                await interaction.edit_original_response(
+                    embed=self._proposal_embed(
+                        proposal, "Trade Proposal Closed", discord.Color.red(),
+                        f"❌ The trade could no longer be completed: {message}"
+                    ),
+                    view=None
+                )
+                logger.info("Trade proposal %s failed at accept time: %s", proposal_id, message)
+                return
+
+            proposing_team = await data_manager.get_team_by_name(proposal['proposer_team'])
+            target_team = await data_manager.get_team_by_name(proposal['target_team'])
+            status = (
+                f"Trade between **{proposal['proposer_team']}** and "
+                f"**{proposal['target_team']}** executed successfully!\n\n"
+                f"📊 Post-Trade Roster Status:\n"
+                f"• {proposing_team['name']}: {len(proposing_team['players'])}/{proposing_team['max_size']} players\n"
+                f"• {target_team['name']}: {len(target_team['players'])}/{target_team['max_size']} players"
+            )
+            await interaction.edit_original_response(
+                embed=self._proposal_embed(proposal, "Multi-Player Trade Completed ✅", discord.Color.green(), status),
+                view=None
+            )
+            logger.info(
+                "Trade completed - Proposal %s: %s <-> %s", proposal_id, proposal['proposer_team'], proposal['target_team'],
+                extra={"offered": proposal['offer_ids'], "received": proposal['request_ids']}
+            )
+            await self._invalidate_moved_players(proposal['guild_id'], [
+                (proposal['proposer_team'], proposal['offer_ids']),
+                (proposal['target_team'], proposal['request_ids'])
+            ])
+
+        except Exception as e:
+            logger.error("Error accepting trade proposal %s: %s", proposal_id, e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An unexpected error occurred while accepting the trade.", ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An unexpected error occurred while accepting the trade.", ephemeral=True
+                    )
+            except (discord.InteractionResponded, discord.HTTPException) as send_error:
+                logger.error("Failed to send error message: %s", send_error)
+
+    async def _owned_teams(self, data_manager, team_names, user_id):
+        """The names among team_names whose team user_id owns."""
+        owned = []
+        for team_name in team_names:
+            team = await data_manager.get_team_by_name(team_name)
+            if team and team['owner_id'] == user_id:
+                owned.append(team_name)
+        return owned
+
+    async def _accept_multi_proposal(self, interaction, proposal):
+        """Record one owner's acceptance; run the trade once every sending team has accepted."""
+        data_manager = self.leagues.for_guild(proposal['guild_id'])
+        owned = await self._owned_teams(data_manager, proposal['awaiting'], interaction.user.id)
+        # Other clicks may have accepted, closed or run the trade while we awaited;
+        # from here to the claim below nothing awaits, so work on the live proposal
+        proposal = self.proposals.get(proposal['id'])
+        if proposal is None:
+            await interaction.response.send_message(ALREADY_HANDLED, ephemeral=True)
+            return
+        accepting = [name for name in owned if name in proposal['awaiting']]
+        if not accepting:
+            await interaction.response.send_message(
+                "You have already accepted this trade." if owned
+                else f"Only the owners of {', '.join(proposal['awaiting'])} can accept this trade.",
+                ephemeral=True
+            )
+            return
+        proposal['awaiting'] = [name for name in proposal['awaiting'] if name not in accepting]
+        logger.info("Trade proposal %s accepted by %s", proposal['id'], ', '.join(accepting))
+        if proposal['awaiting']:
+            await interaction.response.edit_message(
+                embed=self._proposal_embed(proposal, "Multi-Team Trade Proposal 📨", discord.Color.blue())
+            )
+            return
+
+        if self.proposals.remove(proposal['id']) is None:
+            await interaction.response.send_message(ALREADY_HANDLED, ephemeral=True)
+            return
+        await interaction.response.defer()
+
+        # execute_multi_trade re-checks every roster as it is now
+        success, message = await data_manager.execute_multi_trade(proposal['moves'])
+        if not success:
+            await interaction.edit_original_response(
+                embed=self._proposal_embed(
+                    proposal, "Trade Proposal Closed", discord.Color.red(),
+                    f"❌ The trade could no longer be completed: {message}"
+                ),
+                view=None
+            )
+            logger.info("Trade proposal %s failed at accept time: %s", proposal['id'], message)
+            return
+
+        status = f"Trade between {', '.join(f'**{name}**' for name in proposal['teams'])} executed successfully!"
+        await interaction.edit_original_response(
+            embed=self._proposal_embed(proposal, "Multi-Team Trade Completed ✅", discord.Color.green(), status),
+            view=None
+        )
+        logger.info("Multi-team trade completed - Proposal %s: %s", proposal['id'], ', '.join(proposal['teams']))
+        await self._invalidate_moved_players(
+            proposal['guild_id'], [(from_team, [player_id]) for player_id, from_team, _ in proposal['moves']]
+        )
+
+    async def reject_proposal(self, interaction: discord.Interaction, proposal_id):
+        try:
+            proposal = self.proposals.get(proposal_id)
+            if not proposal:
+                await interaction.response.send_message("This trade proposal is no longer open.", ephemeral=True)
+                return
+            data_manager = self.leagues.for_guild(proposal['guild_id'])
+
+            # An owner asked to give players up can reject; the proposer can withdraw
+            if 'moves' in proposal:
+                senders = list(dict.fromkeys(
+                    from_team for _, from_team, _ in proposal['moves'] if from_team != proposal['proposer_team']
+                ))
+            else:
+                senders = [proposal['target_team']]
+            rejecting = await self._owned_teams(data_manager, senders, interaction.user.id)
+            if not rejecting and interaction.user.id != proposal['proposer_id']:
+                await interaction.response.send_message(
+                    f"Only the owners of {', '.join(senders)} or the proposer can close this trade.",
+                    ephemeral=True
+                )
+                return
+
+            if self.proposals.remove(proposal_id) is None:
+                await interaction.response.send_message(ALREADY_HANDLED, ephemeral=True)
+                return
+            status = f"❌ Rejected by {', '.join(rejecting)}." if rejecting else "↩️ Withdrawn by the proposing team."
+            await interaction.response.edit_message(
+                embed=self._proposal_embed(proposal, "Trade Proposal Closed", discord.Color.red(), status),
+                view=None
+            )
+            logger.info("Trade proposal %s closed by %s: %s", proposal_id, interaction.user.id, status)
+
+        except Exception as e:
+            logger.error("Error rejecting trade proposal %s: %s", proposal_id, e)
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An unexpected error occurred while closing the trade.", ephemeral=True
+                )
 
     @app_commands.command(
         name="propose-trade",
-        description="Trade multiple players between teams (up to 5 players per side)"
+        description="Propose a trade of multiple players with another team (up to 5 players per side)"
     )
     @app_commands.describe(
         target_team="Name of the team to trade with",
@@ -31,6 +488,7 @@ class Trading(commands.Cog):
         offer_player_ids: str,
         request_player_ids: str
     ):
+        data_manager = self.leagues.for_guild(interaction.guild_id)
         try:
             # Defer response immediately to prevent timeout
             try:
@@ -63,7 +521,7 @@ class Trading(commands.Cog):
                         return
                         
                     # Log trade attempt
-                    logger.info(f"Trade proposed - From: {interaction.user.id}, Offering: {offer_ids}, Requesting: {request_ids}")
+                    logger.info("Trade proposed - From: %s, Offering: %s, Requesting: %s", interaction.user.id, offer_ids, request_ids)
                         
                     # Remove duplicates while preserving order
                     offer_ids = list(dict.fromkeys(offer_ids))
@@ -93,8 +551,8 @@ class Trading(commands.Cog):
                         return
 
                     # Get teams and validate ownership
-                    proposing_team = self.data_manager.get_team_by_owner(interaction.user.id)
-                    target_team_data = self.data_manager.get_team_by_name(target_team)
+                    proposing_team = await data_manager.get_team_by_owner(interaction.user.id)
+                    target_team_data = await data_manager.get_team_by_name(target_team)
 
                     # Validate team existence
                     if not proposing_team:
@@ -114,7 +572,7 @@ class Trading(commands.Cog):
                     # Find all offered players
                     offer_players = []
                     for pid in offer_ids:
-                        player = next((p for p in proposing_team['players'] if str(p['id']) == pid), None)
+                        player = await data_manager.get_player(proposing_team['name'], pid)
                         if not player:
                             await interaction.followup.send(
                                 f"Player with ID {pid} not found in your team!",
@@ -126,7 +584,7 @@ class Trading(commands.Cog):
                     # Find all requested players
                     request_players = []
                     for pid in request_ids:
-                        player = next((p for p in target_team_data['players'] if str(p['id']) == pid), None)
+                        player = await data_manager.get_player(target_team_data['name'], pid)
                         if not player:
                             await interaction.followup.send(
                                 f"Player with ID {pid} not found in target team!",
@@ -155,55 +613,40 @@ class Trading(commands.Cog):
                         )
                         return
 
-                    # Execute trade immediately
-                    success, message = self.data_manager.execute_propose_trade(
+                    if self.proposals.count_for_team(interaction.guild_id, proposing_team['name']) >= MAX_OPEN_PROPOSALS_PER_TEAM:
+                        await interaction.followup.send(
+                            f"Your team already has {MAX_OPEN_PROPOSALS_PER_TEAM} open trade proposals. "
+                            f"Wait for some to close before proposing more.",
+                            ephemeral=True
+                        )
+                        return
+
+                    # Hold the offer until the target team's owner answers; rosters
+                    # are checked again when it is accepted
+                    proposal = self.proposals.add(
                         proposing_team['name'],
                         target_team_data['name'],
                         [p['id'] for p in offer_players],
-                        [p['id'] for p in request_players]
+                        [p['id'] for p in request_players],
+                        ttl=PROPOSAL_TTL,
+                        guild_id=interaction.guild_id,
+                        proposer_id=interaction.user.id,
+                        offer_players=offer_players,
+                        request_players=request_players
+                    )
+                    message = await interaction.followup.send(
+                        content=f"<@{target_team_data['owner_id']}>, you have a new trade proposal!",
+                        embed=self._proposal_embed(proposal, "Trade Proposal 📨", discord.Color.blue()),
+                        view=TradeProposalView(self, proposal['id']),
+                        wait=True
+                    )
+                    proposal['channel_id'] = message.channel.id
+                    proposal['message_id'] = message.id
+                    self._proposal_wakeup.set()
+                    logger.info(
+                        "Trade proposal %s opened - %s -> %s", proposal['id'], proposing_team['name'], target_team_data['name'],
+                        extra={"proposer_size_after": proposing_team_final_size, "target_size_after": target_team_final_size}
                     )
-
-                    if success:
-                        # Create trade completion embed with enhanced multi-player format
-                        embed = discord.Embed(
-                            title="Multi-Player Trade Completed ✅",
-                            description=(
-                                f"Trade between **{proposing_team['name']}** and "
-                                f"**{target_team_data['name']}** executed successfully!\n\n"
-                                f"📊 Post-Trade Roster Status:\n"
-                                f"• {proposing_team['name']}: {proposing_team_final_size}/{proposing_team['max_size']} players\n"
-                                f"• {target_team_data['name']}: {target_team_final_size}/{target_team_data['max_size']} players"
-                            ),
-                            color=discord.Color.green()
-                        )
-
-                        # Enhanced multi-player trade display
-                        offer_text = "\n".join([f"📤 {p['name']} (ID: {p['id']})" for p in offer_players])
-                        embed.add_field(
-                            name=f"{proposing_team['name']} Sent ({len(offer_players)} players)",
-                            value=offer_text or "No players",
-                            inline=False
-                        )
-
-                        request_text = "\n".join([f"📥 {p['name']} (ID: {p['id']})" for p in request_players])
-                        embed.add_field(
-                            name=f"{target_team_data['name']} Sent ({len(request_players)} players)",
-                            value=request_text or "No players",
-                            inline=False
-                        )
-
-                        await interaction.followup.send(embed=embed)
-                        logger.info(
-                            f"Trade completed - Details:\n"
-                            f"Team1: {proposing_team['name']} (New size: {proposing_team_final_size})\n"
-                            f"Offered: {', '.join(p['name'] for p in offer_players)}\n"
-                            f"Team2: {target_team_data['name']} (New size: {target_team_final_size})\n"
-                            f"Received: {', '.join(p['name'] for p in request_players)}"
-                        )
-                    else:
-                        error_msg = f"Failed to execute trade: {message}"
-                        await interaction.followup.send(error_msg, ephemeral=True)
-                        logger.error(f"Trade execution failed:\n{error_msg}\nTeams: {proposing_team['name']} <-> {target_team_data['name']}")
 
             except asyncio.TimeoutError:
                 logger.error("Timeout while processing trade")
@@ -222,19 +665,15 @@ class Trading(commands.Cog):
             
             # Try to get team information from the data manager
             try:
-                proposing_team_data = self.data_manager.get_team_by_owner(interaction.user.id)
+                proposing_team_data = await data_manager.get_team_by_owner(interaction.user.id)
                 if proposing_team_data and isinstance(proposing_team_data, dict):
                     proposing_team_name = proposing_team_data.get('name', 'Unknown')
             except Exception as name_error:
-                logger.error(f"Error getting proposing team data: {str(name_error)}")
+                logger.error("Error getting proposing team data: %s", name_error)
             
             logger.error(
-                f"Error in propose_trade command:\n"
-                f"Error message: {error_msg}\n"
-                f"User ID: {interaction.user.id}\n"
-                f"Teams involved: {proposing_team_name} <-> {target_team_name}\n"
-                f"Offered IDs: {offer_player_ids if 'offer_player_ids' in locals() else 'Not provided'}\n"
-                f"Requested IDs: {request_player_ids if 'request_player_ids' in locals() else 'Not provided'}"
+                "Error in propose_trade command: %s - Teams involved: %s <-> %s", error_msg, proposing_team_name, target_team_name,
+                extra={"offered": offer_player_ids, "requested": request_player_ids}
             )
             
             try:
@@ -257,58 +696,281 @@ class Trading(commands.Cog):
                         ephemeral=True
                     )
             except (discord.InteractionResponded, discord.HTTPException) as send_error:
-                logger.error(f"Failed to send error message: {str(send_error)}")
+                logger.error("Failed to send error message: %s", send_error)
+
+    @app_commands.command(
+        name="propose-multi-trade",
+        description="Propose a trade between three or more teams; it runs once every team sending players accepts"
+    )
+    @app_commands.describe(
+        moves="Moves separated by ';', each from_team:player_id>to_team (e.g. 'Team A:p1>Team B; Team B:p7>Team C')"
+    )
+    async def propose_multi_trade(
+        self,
+        interaction: discord.Interaction,
+        moves: str
+    ):
+        data_manager = self.leagues.for_guild(interaction.guild_id)
+        try:
+            # Defer response immediately to prevent timeout
+            try:
+                await interaction.response.defer()
+            except discord.InteractionResponded:
+                logger.warning("Interaction already responded to during defer in propose-multi-trade")
+                return
+
+            try:
+                async with asyncio.timeout(5.0):  # 5 second timeout for trade processing
+                    parsed, error = parse_moves(moves)
+                    if error:
+                        await interaction.followup.send(error, ephemeral=True)
+                        return
+
+                    proposing_team = await data_manager.get_team_by_owner(interaction.user.id)
+                    if not proposing_team:
+                        await interaction.followup.send("You don't own a team!", ephemeral=True)
+                        return
+
+                    team_names = list(dict.fromkeys(name for _, from_team, to_team in parsed for name in (from_team, to_team)))
+                    if proposing_team['name'] not in team_names:
+                        await interaction.followup.send(
+                            "Your team must be one of the teams in the trade!",
+                            ephemeral=True
+                        )
+                        return
+                    if all(from_team == proposing_team['name'] for _, from_team, _ in parsed):
+                        await interaction.followup.send(
+                            "You must request at least one player from another team!",
+                            ephemeral=True
+                        )
+                        return
+
+                    if self.proposals.count_for_team(interaction.guild_id, proposing_team['name']) >= MAX_OPEN_PROPOSALS_PER_TEAM:
+                        await interaction.followup.send(
+                            f"Your team already has {MAX_OPEN_PROPOSALS_PER_TEAM} open trade proposals. "
+                            f"Wait for some to close before proposing more.",
+                            ephemeral=True
+                        )
+                        return
+
+                    # Dry run of the checks execute_multi_trade makes again at accept time
+                    def check_in_transaction(tx):
+                        owners = {name: (tx.get_team(name) or {}).get('owner_id') for name in team_names}
+                        player_names = {
+                            pid: (tx.get_player(from_team, pid) or {}).get('name', pid)
+                            for pid, from_team, _ in parsed
+                        }
+                        result = tx.multi_trade(parsed)
+                        tx.rollback()
+                        return result, owners, player_names
+
+                    (valid, message), owners, player_names = await data_manager.transaction(
+                        check_in_transaction, *team_names
+                    )
+                    if not valid:
+                        await interaction.followup.send(f"Invalid trade: {message}", ephemeral=True)
+                        return
+
+                    logger.info("Multi-team trade proposed - From: %s, Moves: %s", interaction.user.id, parsed)
+                    # Nothing moves until every other team that gives up players accepts
+                    proposal = self.proposals.add_multi(
+                        proposing_team['name'],
+                        parsed,
+                        ttl=PROPOSAL_TTL,
+                        guild_id=interaction.guild_id,
+                        proposer_id=interaction.user.id,
+                        player_names=player_names
+                    )
+                    mentions = " ".join(dict.fromkeys(f"<@{owners[name]}>" for name in proposal['awaiting']))
+                    message = await interaction.followup.send(
+                        content=f"{mentions}, you have a new multi-team trade proposal!",
+                        embed=self._proposal_embed(proposal, "Multi-Team Trade Proposal 📨", discord.Color.blue()),
+                        view=TradeProposalView(self, proposal['id']),
+                        wait=True
+                    )
+                    proposal['channel_id'] = message.channel.id
+                    proposal['message_id'] = message.id
+                    self._proposal_wakeup.set()
+                    logger.info(
+                        "Trade proposal %s opened - %s, waiting for %s",
+                        proposal['id'], ', '.join(team_names), ', '.join(proposal['awaiting'])
+                    )
+
+            except asyncio.TimeoutError:
+                logger.error("Timeout while processing multi-team trade")
+                await interaction.followup.send(
+                    "The trade process timed out. Please try again.",
+                    ephemeral=True
+                )
+                return
+
+        except Exception as e:
+            logger.error("Error in propose_multi_trade command: %s", e)
+            try:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "An unexpected error occurred while processing your trade.",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.followup.send(
+                        "An unexpected error occurred while processing your trade.",
+                        ephemeral=True
+                    )
+            except (discord.InteractionResponded, discord.HTTPException) as send_error:
+                logger.error("Failed to send error message: %s", send_error)
+
+    @app_commands.command(name="my-trade-offers", description="List your team's open trade proposals")
+    async def my_trade_offers(self, interaction: discord.Interaction):
+        try:
+            data_manager = self.leagues.for_guild(interaction.guild_id)
+            team = await data_manager.get_team_by_owner(interaction.user.id)
+            if not team:
+                await interaction.response.send_message("You don't own a team!", ephemeral=True)
+                return
+
+            proposals = self.proposals.for_team(interaction.guild_id, team['name'])
+            if not proposals:
+                await interaction.response.send_message("Your team has no open trade proposals.", ephemeral=True)
+                return
+
+            embed = discord.Embed(
+                title=f"Open Trade Proposals for {team['name']}",
+                color=discord.Color.blue()
+            )
+            for label, incoming in (("📥 Received", True), ("📤 Sent", False)):
+                lines = []
+                for proposal in proposals:
+                    if (proposal['proposer_team'] != team['name']) != incoming:
+                        continue
+                    expires = discord.utils.format_dt(
+                        datetime.fromtimestamp(proposal['expires_at'], timezone.utc), style='R'
+                    )
+                    if 'moves' in proposal:
+                        lines.append(
+                            f"#{proposal['id']} {len(proposal['teams'])}-team trade"
+                            f"{' from **' + proposal['proposer_team'] + '**' if incoming else ''}: "
+                            f"{len(proposal['moves'])} moves, waiting for {', '.join(proposal['awaiting'])} (expires {expires})"
+                        )
+                        continue
+                    other = proposal['proposer_team'] if incoming else proposal['target_team']
+                    lines.append(
+                        f"#{proposal['id']} {'from' if incoming else 'to'} **{other}**: "
+                        f"{', '.join(proposal['offer_ids'])} for {', '.join(proposal['request_ids'])} (expires {expires})"
+                    )
+                if lines:
+                    value = "\n".join(lines)
+                    if len(value) > MAX_FIELD_VALUE:
+                        value = value[:MAX_FIELD_VALUE - 1] + "…"
+                    embed.add_field(name=f"{label} ({len(lines)})", value=value, inline=False)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        except Exception as e:
+            logger.error("Error in my_trade_offers: %s", e)
+            await interaction.response.send_message(
+                "An error occurred while fetching your trade proposals.", ephemeral=True
+            )
 
     @app_commands.command(name="trade-history", description="View trade history")
     @app_commands.describe(
         team_name="Filter trades by team name (optional)",
-        limit="Number of trades to show (default: 10)"
+        limit=f"Trades per page (default: 10, max: {MAX_TRADES_PER_PAGE})",
+        with_team="Only trades between team_name and this team (optional)",
+        player_id="Only trades that moved this player (optional)",
+        since="Only trades on or after this date, YYYY-MM-DD (optional)",
+        until="Only trades on or before this date, YYYY-MM-DD (optional)"
     )
     async def trade_history(
         self,
         interaction: discord.Interaction,
         team_name: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        with_team: Optional[str] = None,
+        player_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
     ):
         try:
-            trades = self.data_manager.get_trade_history(team_name, max(1, limit))
-            
-            if not trades:
+            for label, value in (("since", since), ("until", until)):
+                if value:
+                    try:
+                        datetime.strptime(value, "%Y-%m-%d")
+                    except ValueError:
+                        await interaction.response.send_message(
+                            f"Invalid {label} date '{value}'. Use YYYY-MM-DD.",
+                            ephemeral=True
+                        )
+                        return
+
+            query = {
+                "team_name": team_name,
+                "other_team": with_team,
+                "player_id": player_id.strip() if player_id else None,
+                "since": since,
+                "until": until
+            }
+            page_size = min(max(1, limit), MAX_TRADES_PER_PAGE)
+            data_manager = self.leagues.for_guild(interaction.guild_id)
+            page = await data_manager.get_trade_page(limit=page_size, **query)
+
+            if not page["trades"]:
                 await interaction.response.send_message("No trade history found!", ephemeral=True)
                 return
 
-            embed = discord.Embed(
-                title="Trade History",
-                description=f"Recent trades{' for ' + team_name if team_name else ''}",
-                color=discord.Color.blue()
-            )
-            
-            for trade in trades:
-                trade_time = discord.utils.format_dt(discord.utils.parse_time(trade["timestamp"]), style='R')
-                status_emoji = "✅"  # Completed trade indicator
-                
-                # Handle both single-player and multi-player trade formats
-                # Enhanced multi-player trade format with better organization
-                players1_text = "\n• ".join([f"{p['name']} (ID: {p['id']})" for p in trade.get('players1', [])])
-                players2_text = "\n• ".join([f"{p['name']} (ID: {p['id']})" for p in trade.get('players2', [])])
-                trade_desc = (
-                    f"{status_emoji} Trade Summary:\n\n"
-                    f"**{trade['team1']}** traded:\n• {players1_text}\n\n"
-                    f"**{trade['team2']}** traded:\n• {players2_text}"
-                )
-                embed.add_field(name=f"Trade {trade_time}", value=trade_desc, inline=False)
+            filters = []
+            if team_name:
+                filters.append(f"for {team_name}")
+            if with_team:
+                filters.append(f"with {with_team}")
+            if player_id:
+                filters.append(f"involving player {player_id}")
+            if since or until:
+                filters.append(f"from {since or 'the start'} to {until or 'today'}")
+            description = f"Recent trades{' ' + ' '.join(filters) if filters else ''}"
 
-            await interaction.response.send_message(embed=embed)
-            logger.debug(f"Trade history displayed for {team_name if team_name else 'all teams'}")
+            embed = trade_history_embed(page["trades"], description)
+            if page["older"] is None:
+                await interaction.response.send_message(embed=embed)
+            else:
+                view = TradeHistoryView(
+                    data_manager, interaction.user.id, query, description, page, page_size
+                )
+                await interaction.response.send_message(embed=embed, view=view)
+                view.message = await interaction.original_response()
+            logger.debug("Trade history displayed for %s", team_name if team_name else 'all teams')
 
         except Exception as e:
-            logger.error(f"Error in trade_history: {str(e)}")
+            logger.error("Error in trade_history: %s", e)
             await interaction.response.send_message("An error occurred while fetching trade history.", ephemeral=True)
 
+    @propose_trade.autocomplete('target_team')
+    @trade_history.autocomplete('team_name')
+    @trade_history.autocomplete('with_team')
+    async def team_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await team_choices(self.leagues.for_guild(interaction.guild_id), current)
+
+    @propose_trade.autocomplete('offer_player_ids')
+    async def offer_player_ids_autocomplete(self, interaction: discord.Interaction, current: str):
+        data_manager = self.leagues.for_guild(interaction.guild_id)
+        own = await data_manager.get_team_version(owner_id=interaction.user.id)
+        return await player_list_choices(data_manager, own[0] if own else None, current)
+
+    @propose_trade.autocomplete('request_player_ids')
+    async def request_player_ids_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await player_list_choices(
+            self.leagues.for_guild(interaction.guild_id), interaction.namespace.target_team, current
+        )
+
+    @trade_history.autocomplete('player_id')
+    async def player_id_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await player_choices(
+            self.leagues.for_guild(interaction.guild_id), interaction.namespace.team_name, current
+        )
+
 async def setup(bot):
     try:
         await bot.add_cog(Trading(bot))
         logger.info("Trading cog loaded successfully")
     except Exception as e:
-        logger.error(f"Error loading Trading cog: {str(e)}")
+        logger.error("Error loading Trading cog: %s", e)
         raise
@@ -0,0 +1,262 @@
+import copy
+from datetime import datetime
+
+from utils.validators import validate_roster_size
+
+MAX_PLAYERS_PER_TRADE = 5
+MAX_MOVES_PER_MULTI_TRADE = 20
+
+
+class Transaction:
+    """A batch of team, player and trade changes that commit together.
+
+    Handed out by DataManager.transaction() / SQLiteDataManager.transaction().
+    Teams are copied in the first time they are touched (the backend's
+    _tx_load_team) and every change is made on those copies, so nothing
+    is visible to other callers until the `with` block exits cleanly. The backend then writes the changed
+    teams and the recorded trades in one step. An exception or rollback()
+    discards the lot.
+
+    Methods mirror the DataManager mutators and return the same values.
+    """
+
+    def __init__(self, backend, team_names=None):
+        self.backend = backend
+        # None means every team may be touched (the backend locks them all)
+        self.team_names = frozenset(team_names) if team_names is not None else None
+        self.teams = {}  # team name -> working copy, or None if it doesn't exist
+        self.changed = {}  # names of teams to write back, in first-change order
+        self.trades = []
+
+    def _team(self, team_name):
+        if self.team_names is not None and team_name not in self.team_names:
+            raise ValueError(f"Team '{team_name}' is not locked by this transaction")
+        if team_name not in self.teams:
+            self.teams[team_name] = self.backend._tx_load_team(team_name)
+        return self.teams[team_name]
+
+    def _mark(self, team_name):
+        self.changed[team_name] = None
+
+    def _position(self, team_name, team, player_id):
+        """Roster position of player_id on team (the working copy of team_name), or None.
+
+        While the team is as the backend loaded it, the backend's own
+        index answers when it has one (DataManager does); otherwise the
+        working copy is scanned.
+        """
+        if team_name not in self.changed:
+            index_position = getattr(self.backend, '_tx_position', None)
+            if index_position is not None:
+                return index_position(team_name, player_id)
+        player_id = str(player_id)
+        for position, player in enumerate(team['players']):
+            if str(player['id']) == player_id:
+                return position
+        return None
+
+    def rollback(self):
+        """Throw away everything staged so far; later changes still apply."""
+        self.teams.clear()
+        self.changed.clear()
+        self.trades.clear()
+
+    def get_team(self, team_name):
+        team = self._team(team_name)
+        return copy.deepcopy(team)
+
+    def get_player(self, team_name, player_id):
+        team = self._team(team_name)
+        if not team:
+            return None
+        position = self._position(team_name, team, player_id)
+        return dict(team['players'][position]) if position is not None else None
+
+    def create_team(self, team_data):
+        if self._team(team_data['name']) is not None:
+            return False
+        self.teams[team_data['name']] = copy.deepcopy(team_data)
+        self._mark(team_data['name'])
+        return True
+
+    def save_team(self, team):
+        existing = self._team(team['name'])
+        self.teams[team['name']] = copy.deepcopy(team)
+        self.teams[team['name']]['version'] = (existing or {}).get('version', 0)
+        self._mark(team['name'])
+        return True
+
+    def add_player(self, team_name, player):
+        """Append a player; fails if the team is missing, full or already has this id."""
+        team = self._team(team_name)
+        # Ensure player ID is stored as string
+        player = dict(player, id=str(player['id']))
+        if not team or not validate_roster_size(team):
+            return False
+        if self._position(team_name, team, player['id']) is not None:
+            return False
+        team['players'].append(player)
+        self._mark(team_name)
+        return True
+
+    def add_players(self, team_name, players):
+        """Append many players, all or nothing. Returns (success, message)."""
+        team = self._team(team_name)
+        if not team:
+            return False, "Team not found"
+        players = [{"name": p['name'], "id": str(p['id'])} for p in players]
+        existing = {str(p['id']) for p in team['players']}
+        seen = set()
+        for player in players:
+            if not player['id'] or player['id'] in seen:
+                return False, f"Duplicate or missing player ID: {player['id']}"
+            if player['id'] in existing:
+                return False, f"Player ID {player['id']} is already on {team_name}"
+            seen.add(player['id'])
+        if len(team['players']) + len(players) > team['max_size']:
+            return False, f"Roster limit exceeded ({team['max_size']} players)"
+        if not players:
+            return True, "No players to add"
+        team['players'].extend(players)
+        self._mark(team_name)
+        return True, f"Added {len(players)} players to {team_name}"
+
+    def remove_player(self, team_name, player_id):
+        """Remove a player. Returns the removed player or None."""
+        team = self._team(team_name)
+        if not team:
+            return None
+        position = self._position(team_name, team, player_id)
+        if position is None:
+            return None
+        player = team['players'].pop(position)
+        self._mark(team_name)
+        return player
+
+    def trade(self, team1_name, team2_name, players1_ids, players2_ids):
+        """Swap players between two teams and record the trade.
+
+        Same rules and messages as DataManager.execute_propose_trade.
+        Returns (success, message).
+        """
+        # Validate that lists are not empty and within reasonable limits
+        if not players1_ids or not players2_ids:
+            return False, "Both teams must offer at least one player"
+        if len(players1_ids) > MAX_PLAYERS_PER_TRADE or len(players2_ids) > MAX_PLAYERS_PER_TRADE:
+            return False, f"Maximum {MAX_PLAYERS_PER_TRADE} players allowed per team in a trade"
+
+        # Convert all IDs to strings and remove duplicates
+        players1_ids = list(dict.fromkeys(str(pid) for pid in players1_ids))
+        players2_ids = list(dict.fromkeys(str(pid) for pid in players2_ids))
+        if set(players1_ids) & set(players2_ids):
+            return False, "Cannot trade the same player ID between teams"
+
+        team1 = self._team(team1_name)
+        team2 = self._team(team2_name)
+        if not team1 or not team2:
+            return False, "One or both teams not found"
+
+        positions1 = []
+        for pid in players1_ids:
+            position = self._position(team1_name, team1, pid)
+            if position is None:
+                return False, f"Player with ID {pid} not found in {team1_name}"
+            positions1.append(position)
+        positions2 = []
+        for pid in players2_ids:
+            position = self._position(team2_name, team2, pid)
+            if position is None:
+                return False, f"Player with ID {pid} not found in {team2_name}"
+            positions2.append(position)
+
+        players1 = [team1['players'][pos] for pos in positions1]
+        players2 = [team2['players'][pos] for pos in positions2]
+
+        # Check if teams would exceed max_size after trade
+        team1_final_size = len(team1['players']) - len(players1) + len(players2)
+        team2_final_size = len(team2['players']) - len(players2) + len(players1)
+        if team1_final_size > team1['max_size']:
+            return False, f"{team1_name} would exceed maximum roster size (would have {team1_final_size}/{team1['max_size']} players)"
+        if team2_final_size > team2['max_size']:
+            return False, f"{team2_name} would exceed maximum roster size (would have {team2_final_size}/{team2['max_size']} players)"
+
+        traded1, traded2 = set(positions1), set(positions2)
+        team1['players'] = [p for pos, p in enumerate(team1['players']) if pos not in traded1] + players2
+        team2['players'] = [p for pos, p in enumerate(team2['players']) if pos not in traded2] + players1
+        self._mark(team1_name)
+        self._mark(team2_name)
+
+        self.trades.append({
+            "timestamp": datetime.now().isoformat(),
+            "team1": team1_name,
+            "team2": team2_name,
+            "players1": [{"id": p['id'], "name": p['name']} for p in players1],
+            "players2": [{"id": p['id'], "name": p['name']} for p in players2]
+        })
+        return True, "Trade executed successfully"
+
+    def multi_trade(self, moves):
+        """Move players between any number of teams as one trade.
+
+        moves is a list of (player_id, from_team, to_team). Every move is
+        checked (teams exist, the player is on from_team, nobody moves
+        twice) and every final roster size is checked before anything
+        changes; then all moves apply and one trade record is written.
+        Returns (success, message).
+        """
+        if not moves:
+            return False, "A trade needs at least one player movement"
+        if len(moves) > MAX_MOVES_PER_MULTI_TRADE:
+            return False, f"Maximum {MAX_MOVES_PER_MULTI_TRADE} player movements allowed in a trade"
+
+        moves = [(str(pid), from_team, to_team) for pid, from_team, to_team in moves]
+        team_names = list(dict.fromkeys(name for _, from_team, to_team in moves for name in (from_team, to_team)))
+        if len(team_names) < 2:
+            return False, "A trade needs at least two teams"
+
+        teams = {}
+        for team_name in team_names:
+            team = self._team(team_name)
+            if not team:
+                return False, f"Team {team_name} not found"
+            teams[team_name] = team
+
+        outgoing = {name: set() for name in team_names}
+        incoming = {name: [] for name in team_names}
+        for pid, from_team, to_team in moves:
+            if from_team == to_team:
+                return False, f"Player {pid} can't be traded from {from_team} to itself"
+            position = self._position(from_team, teams[from_team], pid)
+            if position is None:
+                return False, f"Player with ID {pid} not found in {from_team}"
+            if position in outgoing[from_team]:
+                return False, f"Player {pid} from {from_team} is moved more than once"
+            outgoing[from_team].add(position)
+            incoming[to_team].append((teams[from_team]['players'][position], from_team))
+
+        for name, team in teams.items():
+            final_size = len(team['players']) - len(outgoing[name]) + len(incoming[name])
+            if final_size > team['max_size']:
+                return False, f"{name} would exceed maximum roster size (would have {final_size}/{team['max_size']} players)"
+
+        record_moves = []
+        for name, team in teams.items():
+            team['players'] = (
+                [p for pos, p in enumerate(team['players']) if pos not in outgoing[name]]
+                + [player for player, _ in incoming[name]]
+            )
+            record_moves.extend(
+                {"id": player['id'], "name": player['name'], "from": from_team, "to": name}
+                for player, from_team in incoming[name]
+            )
+            self._mark(name)
+
+        self.trades.append({
+            "timestamp": datetime.now().isoformat(),
+            # team1/team2 keep two-team readers and indexes working
+            "team1": team_names[0],
+            "team2": team_names[1],
+            "teams": team_names,
+            "moves": record_moves
+        })
+        return True, f"Trade between {len(team_names)} teams executed successfully"
@@ -1,18 +1,18 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.data_manager import DataManager
+from utils.data_manager import create_async_data_manager
 from typing import Optional
 import logging
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 
-logger = logging.getLogger('discord')
+logger = logging.getLogger('trade_bot.analytics')
 
 class Analytics(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = DataManager()
+        self.leagues = create_async_data_manager()
 
     @app_commands.command(
         name="league-stats",
@@ -25,24 +25,15 @@ class Analytics(commands.Cog):
         try:
             await interaction.response.defer()
 
-            data = self.data_manager._load_data()
-            teams = list(data.values())
-            history = self.data_manager._load_history().get("trades", [])
+            stats = await self.leagues.for_guild(interaction.guild_id).get_league_stats()
+
+            total_teams = stats['total_teams']
+            total_players = stats['total_players']
+            total_trades = stats['total_trades']
+            recent_volume = stats['recent_volume']
 
-            total_teams = len(teams)
-            total_players = sum(len(t['players']) for t in teams)
-            total_trades = len(history)
-            
             # Calculate averages
             avg_roster_size = round(total_players / total_teams) if total_teams > 0 else 0
-            
-            # Calculate recent activity (last 7 days)
-            now = datetime.now()
-            recent_trades = [
-                t for t in history 
-                if (now - datetime.fromisoformat(t['timestamp'])) < timedelta(days=7)
-            ]
-            recent_volume = len(recent_trades)
 
             embed = discord.Embed(
                 title="📊 League Analytics Dashboard",
@@ -79,14 +70,13 @@ class Analytics(commands.Cog):
             )
 
             # Largest Rosters
-            sorted_teams = sorted(teams, key=lambda x: len(x['players']), reverse=True)
-            top_3_teams = sorted_teams[:3]
-            
+            top_3_teams = stats['top_teams']
+
             top_teams_text = ""
             for i, team in enumerate(top_3_teams):
-                bar_length = int((len(team['players']) / team['max_size']) * 10)
+                bar_length = int((team['players'] / team['max_size']) * 10)
                 progress_bar = "█" * bar_length + "░" * (10 - bar_length)
-                top_teams_text += f"{i+1}. **{team['name']}** ({len(team['players'])}/{team['max_size']})\n`{progress_bar}`\n"
+                top_teams_text += f"{i+1}. **{team['name']}** ({team['players']}/{team['max_size']})\n`{progress_bar}`\n"
 
             if top_teams_text:
                 embed.add_field(
@@ -100,7 +90,7 @@ class Analytics(commands.Cog):
             await interaction.followup.send(embed=embed)
 
         except Exception as e:
-            logger.error(f"Error in league-stats: {str(e)}")
+            logger.error("Error in league-stats: %s", e)
             await interaction.followup.send("An error occurred generating stats.", ephemeral=True)
 
 async def setup(bot):